@@ -0,0 +1,19 @@
+import importlib
+
+# Public names and the modules defining them, imported on first access so that
+# python -m benchmarks.suite does not import the suite twice.
+_EXPORTS = {
+    'CASES': 'benchmarks.suite',
+    'compare': 'benchmarks.suite',
+    'run_case': 'benchmarks.suite',
+    'run_suite': 'benchmarks.suite',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module), name)
\ No newline at end of file
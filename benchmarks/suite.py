@@ -0,0 +1,373 @@
+import argparse
+import atexit
+import fnmatch
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is not reported
+    resource = None
+
+from benchmarks import synthetic
+from instrumentation import profile
+from patterns import get_backend
+from search.load_test import percentile
+
+# Format version of the JSON reports. Version 2 computes percentiles with the exact
+# nearest rank; latencies of older reports are not compared with it.
+REPORT_VERSION = 2
+
+# Default problem sizes; what a size counts (values, lines, paragraphs, documents) depends on the case.
+DEFAULT_SIZES = [250, 1000]
+
+# Default number of timed passes per case and size.
+DEFAULT_REPEAT = 3
+
+# Default relative slowdown (or memory growth) reported as a regression by compare.
+DEFAULT_TOLERANCE = 0.25
+
+# Latency changes smaller than this (milliseconds) are timer noise, never regressions.
+MIN_LATENCY_DELTA_MS = 0.05
+
+# Number of queries per pass of the search cases.
+QUERY_COUNT = 50
+
+# Number of topics of the LDA case, and largest cluster count of the clustering case.
+NUM_TOPICS = 5
+MAX_CLUSTERS = 6
+
+# Metrics compared by compare: name -> True if higher is better.
+COMPARED_METRICS = {'throughput': True, 'p50_ms': False, 'p99_ms': False, 'peak_rss_mb': False}
+
+
+def _checker_is_valid(size, seed, repeat):
+    from checker import RegexChecker
+
+    checker = RegexChecker()
+    batches = [[(kind, value) for kind in synthetic.VALUE_GENERATORS
+                for value in synthetic.values_of_kind(kind, size // len(synthetic.VALUE_GENERATORS), seed + r)]
+               for r in range(repeat)]
+    return (lambda pair: checker.is_valid(*pair)), batches, None, len(batches[0])
+
+
+def _checker_validate_many(size, seed, repeat):
+    from checker import RegexChecker
+
+    checker = RegexChecker()
+    batches = [[(kind, synthetic.values_of_kind(kind, size, seed + r)) for kind in synthetic.VALUE_GENERATORS]
+               for r in range(repeat)]
+    return (lambda pair: checker.validate_many(*pair)), batches, None, size * len(synthetic.VALUE_GENERATORS)
+
+
+def _extraction_extract_data(size, seed, repeat):
+    from extraction import RegexExtractor
+
+    extractor = RegexExtractor()
+    batches = [synthetic.log_lines(size, seed + r) for r in range(repeat)]
+    return extractor.extract_data, batches, None, size
+
+
+def _search_document(size, seed):
+    """Write a synthetic document of `size` paragraphs, removed at exit, and return its path."""
+    directory = tempfile.mkdtemp(prefix='textfusion-bench-')
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    return synthetic.write_document(os.path.join(directory, 'document.txt'), size, seed=seed)
+
+
+def _search_build(size, seed, repeat):
+    from search import TextSearch
+    from search.model_registry import get_nlp
+
+    get_nlp()  # The shared spaCy model is loaded once per process, outside the timings
+    return TextSearch, [[_search_document(size, seed)]] * repeat, None, size
+
+
+def _search_search(size, seed, repeat):
+    from search import TextSearch
+    from search.search_utils import query_cache
+
+    text_search = TextSearch(_search_document(size, seed))
+    batches = [synthetic.typo_queries(QUERY_COUNT, seed + r) for r in range(repeat)]
+    return text_search.search, batches, query_cache.clear, QUERY_COUNT
+
+
+def _search_spelling(size, seed, repeat):
+    from search import TextSearch
+    from search.spelling import SpellingCorrector
+
+    text_search = TextSearch(_search_document(size, seed))
+    batches = [synthetic.typo_queries(QUERY_COUNT, seed + r) for r in range(repeat)]
+
+    def reset():
+        # A new corrector per pass, so its cache of corrections starts empty
+        text_search.spelling_corrector = SpellingCorrector(text_search.document_words)
+
+    return (lambda query: text_search.spelling_corrector.correct_query(query)), batches, reset, QUERY_COUNT
+
+
+def _modeling_preprocess(size, seed, repeat):
+    from modeling import TopicModeling
+
+    return TopicModeling, [[synthetic.prose_documents(size, seed=seed + r)] for r in range(repeat)], None, size
+
+
+def _modeling_lda(size, seed, repeat):
+    from modeling import TopicModeling
+
+    topic_modeling = TopicModeling(synthetic.prose_documents(size, seed=seed))
+    return (lambda num_topics: topic_modeling.perform_lda(num_topics, random_state=seed)), \
+        [[NUM_TOPICS]] * repeat, None, size
+
+
+def _modeling_cluster(size, seed, repeat):
+    from modeling import TopicModeling
+
+    topic_modeling = TopicModeling(synthetic.prose_documents(size, seed=seed))
+    X = topic_modeling.tfidf_matrix
+    return (lambda scalable: topic_modeling.evaluate_num_clusters(X, MAX_CLUSTERS, scalable=scalable,
+                                                                  random_state=seed)), \
+        [[True]] * repeat, None, size
+
+
+# Benchmark cases: name -> (setup, what a size counts, what the throughput counts). A setup
+# function (size, seed, repeat) returns the timed function, one list of inputs per pass (each
+# input is one timed call), an optional function called before every pass outside the
+# timings, and the number of items a pass processes.
+CASES = {
+    'checker.is_valid': (_checker_is_valid, 'values', 'values'),
+    'checker.validate_many': (_checker_validate_many, 'values per kind', 'values'),
+    'extraction.extract_data': (_extraction_extract_data, 'log lines', 'lines'),
+    'search.build': (_search_build, 'paragraphs', 'paragraphs'),
+    'search.search': (_search_search, 'paragraphs', 'queries'),
+    'search.spelling': (_search_spelling, 'paragraphs', 'queries'),
+    'modeling.preprocess': (_modeling_preprocess, 'documents', 'documents'),
+    'modeling.lda': (_modeling_lda, 'documents', 'documents'),
+    'modeling.cluster': (_modeling_cluster, 'documents', 'documents'),
+}
+
+
+def peak_rss_mb():
+    """
+    Returns:
+        float: Peak resident set size of this process in MiB, or None where the
+        resource module is unavailable.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def run_case(name, size, seed=0, repeat=DEFAULT_REPEAT):
+    """
+    Time one benchmark case at one size.
+
+    Args:
+        name (str): Name of the case (see CASES).
+        size (int): Problem size.
+        seed (int): Seed of the synthetic inputs.
+        repeat (int): Number of timed passes, each over fresh inputs.
+
+    Returns:
+        dict: Case, size, timed calls per pass, median seconds per pass, throughput in
+        items per second, p50/p90/p99/max latency of one call in milliseconds and peak
+        RSS in MiB. A case whose dependencies are missing gets an 'error' instead of
+        measurements.
+    """
+    setup, size_unit, item_unit = CASES[name]
+    result = {'case': name, 'size': size, 'size_unit': size_unit, 'throughput_unit': f'{item_unit}/s'}
+    try:
+        function, batches, reset, items = setup(size, seed, repeat)
+    except ImportError as error:
+        result['error'] = f"{type(error).__name__}: {error}"
+        return result
+
+    latencies, pass_seconds = [], []
+    for batch in batches:
+        if reset is not None:
+            reset()
+        started = time.perf_counter()
+        for item in batch:
+            call_started = time.perf_counter()
+            function(item)
+            latencies.append(time.perf_counter() - call_started)
+        pass_seconds.append(time.perf_counter() - started)
+
+    latencies.sort()
+    seconds = statistics.median(pass_seconds)
+    result.update({
+        'calls': len(batches[0]),
+        'seconds': seconds,
+        'throughput': items / seconds if seconds else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p90_ms': percentile(latencies, 0.90) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'max_ms': latencies[-1] * 1000,
+        'peak_rss_mb': peak_rss_mb(),
+    })
+    return result
+
+
+def select_cases(patterns=None):
+    """
+    Args:
+        patterns (list): Shell-style patterns of case names, e.g. 'search.*'; None for all.
+
+    Returns:
+        list: Matching case names, in CASES order.
+    """
+    if not patterns:
+        return list(CASES)
+    return [name for name in CASES if any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)]
+
+
+def run_suite(cases=None, sizes=DEFAULT_SIZES, repeat=DEFAULT_REPEAT, seed=0, isolate=True):
+    """
+    Run benchmark cases over a size sweep.
+
+    Args:
+        cases (list): Case names; defaults to all of them.
+        sizes (list): Problem sizes.
+        repeat (int): Timed passes per case and size.
+        seed (int): Seed of the synthetic inputs.
+        isolate (bool): Run every case and size in a fresh process, so peak RSS and
+            caches (spaCy, compiled patterns) are measured per case.
+
+    Returns:
+        dict: Report with the format version, the environment, the configuration and one
+        result per case and size (see run_case).
+    """
+    cases = cases or list(CASES)
+    results = []
+    for name in cases:
+        for size in sizes:
+            if isolate:
+                with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+                    results.append(executor.submit(run_case, name, size, seed, repeat).result())
+            else:
+                results.append(run_case(name, size, seed, repeat))
+
+    return {
+        'version': REPORT_VERSION,
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'regex_backend': get_backend(),
+        },
+        'config': {'sizes': list(sizes), 'repeat': repeat, 'seed': seed, 'isolate': isolate},
+        'results': results,
+    }
+
+
+def compare(baseline, report, tolerance=DEFAULT_TOLERANCE):
+    """
+    Flag the results of a report that regressed against a baseline report.
+
+    Args:
+        baseline (dict): Earlier report of run_suite.
+        report (dict): New report.
+        tolerance (float): Relative change tolerated, e.g. 0.25 for 25%.
+
+    Returns:
+        list: One dict per regressed metric, with the case, size, metric, baseline and
+        current values and the relative change. Results missing from the baseline (or
+        failed in either report) are not compared, nor are the latency percentiles of a
+        baseline with another report version.
+    """
+    previous = {(result['case'], result['size']): result for result in baseline['results']}
+    same_version = baseline.get('version') == report.get('version')
+    regressions = []
+    for result in report['results']:
+        base = previous.get((result['case'], result['size']))
+        if base is None or 'error' in base or 'error' in result:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = base.get(metric), result.get(metric)
+            if not old or new is None or (metric.endswith('_ms') and not same_version):
+                continue
+            change = (new - old) / old
+            if metric.endswith('_ms') and abs(new - old) < MIN_LATENCY_DELTA_MS:
+                continue
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append({'case': result['case'], 'size': result['size'], 'metric': metric,
+                                    'baseline': old, 'current': new, 'change': change})
+    return regressions
+
+
+def _print_report(report):
+    print(f"{'case':<25}{'size':>7}{'throughput':>22}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'RSS MiB':>10}")
+    for result in report['results']:
+        if 'error' in result:
+            print(f"{result['case']:<25}{result['size']:>7}  skipped ({result['error']})")
+            continue
+        rss = f"{result['peak_rss_mb']:>10.1f}" if result['peak_rss_mb'] is not None else f"{'-':>10}"
+        throughput = f"{result['throughput']:.1f} {result['throughput_unit']}"
+        print(f"{result['case']:<25}{result['size']:>7}{throughput:>22}{result['p50_ms']:>10.2f}"
+              f"{result['p90_ms']:>10.2f}{result['p99_ms']:>10.2f}{rss}")
+
+
+def main(argv=None):
+    """Command line entry point: python -m benchmarks.suite."""
+    parser = argparse.ArgumentParser(description="Benchmark the checker, extractor, search and modeling modules "
+                                                 "on synthetic data.")
+    parser.add_argument('--cases', nargs='+', help="Case names or patterns such as 'search.*' (defaults to all).")
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES)
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--in-process', action='store_true',
+                        help="Run all cases in this process (faster, but peak RSS is cumulative).")
+    parser.add_argument('--output', help="Write the JSON report to this file.")
+    parser.add_argument('--baseline', help="JSON report to compare with; regressions make the exit status 1.")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--list', action='store_true', help="List the cases and exit.")
+    parser.add_argument('--profile', action='store_true',
+                        help="Print the time spent in each instrumented stage (implies --in-process).")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON.")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, (_, size_unit, item_unit) in CASES.items():
+            print(f"{name:<25}size = {size_unit}, throughput = {item_unit}/s")
+        return 0
+
+    cases = select_cases(args.cases)
+    if not cases:
+        parser.error(f"No case matches {args.cases}")
+    if args.profile:
+        with profile():
+            report = run_suite(cases, args.sizes, args.repeat, args.seed, isolate=False)
+    else:
+        report = run_suite(cases, args.sizes, args.repeat, args.seed, isolate=not args.in_process)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            regressions = compare(json.load(file), report, args.tolerance)
+        report['regressions'] = regressions
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+        for regression in regressions:
+            print(f"Regression {regression['case']} (size {regression['size']}): {regression['metric']} "
+                  f"{regression['baseline']:.2f} -> {regression['current']:.2f} ({regression['change']:+.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,183 @@
+import random
+import string
+
+# Top-level domains of the synthetic emails and URLs; all are known to RegexExtractor.
+TLDS = ['com', 'org', 'net', 'io', 'dev', 'info', 'app', 'tech']
+
+# Vocabulary of the synthetic prose, grouped by theme so topic models have structure to find.
+TOPIC_WORDS = {
+    'computing': ['algorithm', 'compiler', 'database', 'network', 'processor', 'software', 'server', 'kernel',
+                  'memory', 'cache', 'thread', 'protocol', 'interface', 'storage', 'cluster', 'encryption'],
+    'space': ['orbit', 'planet', 'telescope', 'galaxy', 'rocket', 'satellite', 'astronaut', 'comet', 'nebula',
+              'gravity', 'launch', 'mission', 'asteroid', 'spacecraft', 'observatory', 'universe'],
+    'sports': ['player', 'season', 'league', 'coach', 'stadium', 'goal', 'match', 'team', 'championship',
+               'referee', 'tournament', 'score', 'defense', 'striker', 'victory', 'transfer'],
+    'medicine': ['patient', 'doctor', 'treatment', 'vaccine', 'hospital', 'disease', 'symptom', 'therapy',
+                 'diagnosis', 'clinic', 'surgery', 'infection', 'medicine', 'research', 'trial', 'nurse'],
+    'finance': ['market', 'investor', 'stock', 'inflation', 'currency', 'budget', 'interest', 'revenue',
+                'portfolio', 'dividend', 'banking', 'economy', 'credit', 'payment', 'capital', 'trading'],
+}
+
+# Words joining the theme words into sentences.
+FILLER_WORDS = ['the', 'a', 'new', 'recent', 'large', 'important', 'report', 'about', 'with', 'after',
+                'during', 'shows', 'improves', 'needs', 'describes', 'several', 'many', 'early', 'major']
+
+# Severity levels of the synthetic log lines.
+LOG_LEVELS = ['INFO', 'WARN', 'ERROR', 'DEBUG']
+
+
+def _word(rng, length_range=(3, 9)):
+    """A random lowercase word."""
+    return ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(*length_range)))
+
+
+def email(rng):
+    """A random email address."""
+    return f"{_word(rng)}.{_word(rng)}{rng.randint(1, 99)}@{_word(rng)}.{rng.choice(TLDS)}"
+
+
+def url(rng):
+    """A random URL, sometimes with a path."""
+    path = f"/{_word(rng)}/{_word(rng)}" if rng.random() < 0.5 else ''
+    return f"https://www.{_word(rng)}.{rng.choice(TLDS)}{path}"
+
+
+def phone(rng):
+    """A random USA phone number in one of the formats the phone pattern accepts."""
+    area, prefix, line = rng.randint(200, 999), rng.randint(200, 999), rng.randint(0, 9999)
+    return rng.choice([f"+1 ({area}) {prefix}-{line:04d}", f"{area}-{prefix}-{line:04d}",
+                       f"({area}) {prefix}.{line:04d}"])
+
+
+def date(rng):
+    """A random DD-MM-YYYY date, occasionally not a real calendar date."""
+    return f"{rng.randint(1, 31):02d}-{rng.randint(1, 12):02d}-{rng.randint(1990, 2030)}"
+
+
+# Generators of the values log_lines embeds, by kind.
+VALUE_GENERATORS = {'email': email, 'url': url, 'phone': phone, 'date': date}
+
+
+def log_lines(count, seed=0):
+    """
+    Generate log-like lines rich in emails, URLs, phone numbers and dates.
+
+    Args:
+        count (int): Number of lines.
+        seed (int): Seed making the lines reproducible.
+
+    Returns:
+        list: The lines.
+    """
+    rng = random.Random(seed)
+    lines = []
+    for i in range(count):
+        values = [VALUE_GENERATORS[kind](rng) for kind in rng.sample(list(VALUE_GENERATORS), rng.randint(1, 4))]
+        words = [_word(rng) for _ in range(rng.randint(3, 10))]
+        lines.append(f"{date(rng)} {rng.choice(LOG_LEVELS)} [worker-{i % 16}] "
+                     f"{' '.join(words)} {' '.join(values)}")
+    return lines
+
+
+def values_of_kind(kind, count, seed=0, invalid_fraction=0.2):
+    """
+    Generate strings to validate, a fraction of them corrupted.
+
+    Args:
+        kind (str): 'email', 'url', 'phone' or 'date'.
+        count (int): Number of values.
+        seed (int): Seed making the values reproducible.
+        invalid_fraction (float): Fraction of values with a character replaced.
+
+    Returns:
+        list: The values.
+    """
+    rng = random.Random(seed)
+    values = []
+    for _ in range(count):
+        value = VALUE_GENERATORS[kind](rng)
+        if rng.random() < invalid_fraction:
+            position = rng.randrange(len(value))
+            value = value[:position] + rng.choice('#! ') + value[position + 1:]
+        values.append(value)
+    return values
+
+
+def sentence(rng, topic, length_range=(8, 16)):
+    """A sentence mostly made of the words of one topic."""
+    words = [rng.choice(TOPIC_WORDS[topic]) if rng.random() < 0.6 else rng.choice(FILLER_WORDS)
+             for _ in range(rng.randint(*length_range))]
+    return ' '.join(words).capitalize() + '.'
+
+
+def prose_documents(count, sentences_per_document=8, seed=0):
+    """
+    Generate prose documents, each mostly about one of the TOPIC_WORDS themes.
+
+    Args:
+        count (int): Number of documents.
+        sentences_per_document (int): Size of each document.
+        seed (int): Seed making the documents reproducible.
+
+    Returns:
+        list: The documents.
+    """
+    rng = random.Random(seed)
+    topics = list(TOPIC_WORDS)
+    return [' '.join(sentence(rng, topics[i % len(topics)]) for _ in range(sentences_per_document))
+            for i in range(count)]
+
+
+def write_document(path, paragraphs, sentences_per_paragraph=5, seed=0):
+    """
+    Write a prose document for TextSearch, one paragraph per line.
+
+    Args:
+        path (str): Output file.
+        paragraphs (int): Number of paragraphs.
+        sentences_per_paragraph (int): Size of each paragraph.
+        seed (int): Seed making the document reproducible.
+
+    Returns:
+        str: The path.
+    """
+    with open(path, 'w', encoding='utf-8') as file:
+        for document in prose_documents(paragraphs, sentences_per_paragraph, seed):
+            file.write(document + '\n\n')
+    return path
+
+
+def add_typo(rng, word):
+    """Apply one random edit (deletion, insertion, substitution or swap) to a word."""
+    if len(word) < 3:
+        return word
+    position = rng.randrange(1, len(word) - 1)
+    edit = rng.randrange(4)
+    if edit == 0:
+        return word[:position] + word[position + 1:]
+    if edit == 1:
+        return word[:position] + rng.choice(string.ascii_lowercase) + word[position:]
+    if edit == 2:
+        return word[:position] + rng.choice(string.ascii_lowercase) + word[position + 1:]
+    return word[:position - 1] + word[position] + word[position - 1] + word[position + 1:]
+
+
+def typo_queries(count, seed=0, typo_rate=0.3):
+    """
+    Generate search queries from the prose vocabulary, some words misspelled.
+
+    Args:
+        count (int): Number of queries.
+        seed (int): Seed making the queries reproducible.
+        typo_rate (float): Probability of a typo in each word.
+
+    Returns:
+        list: The queries.
+    """
+    rng = random.Random(seed)
+    topics = list(TOPIC_WORDS)
+    queries = []
+    for _ in range(count):
+        words = rng.sample(TOPIC_WORDS[rng.choice(topics)], rng.randint(1, 3))
+        queries.append(' '.join(add_typo(rng, word) if rng.random() < typo_rate else word for word in words))
+    return queries
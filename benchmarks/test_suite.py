@@ -0,0 +1,20 @@
+from benchmarks.suite import REPORT_VERSION, compare
+
+
+def report(version=REPORT_VERSION, **metrics):
+    result = {'case': 'search.search', 'size': 250, 'throughput': 100.0, 'p50_ms': 1.0, 'p99_ms': 2.0,
+              'peak_rss_mb': 50.0}
+    result.update(metrics)
+    return {'version': version, 'results': [result]}
+
+
+def test_compare_flags_regressions_beyond_the_tolerance():
+    regressions = compare(report(), report(throughput=70.0, p99_ms=2.4, peak_rss_mb=60.0), tolerance=0.25)
+    assert [regression['metric'] for regression in regressions] == ['throughput']
+    regressions = compare(report(), report(p50_ms=1.5, peak_rss_mb=70.0), tolerance=0.25)
+    assert [regression['metric'] for regression in regressions] == ['p50_ms', 'peak_rss_mb']
+
+
+def test_compare_ignores_latencies_of_older_reports():
+    regressions = compare(report(version=1), report(throughput=50.0, p50_ms=5.0), tolerance=0.25)
+    assert [regression['metric'] for regression in regressions] == ['throughput']
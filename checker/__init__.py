@@ -1 +1 @@
-from .checker import RegexChecker
\ No newline at end of file
+from .regex_checker import RegexChecker
\ No newline at end of file
@@ -0,0 +1,69 @@
+import re
+
+from patterns.backend import translate_unicode_classes
+
+try:
+    import numpy as np
+except ImportError:  # Batch validation falls back to bytearrays without NumPy
+    np = None
+
+
+def is_pandas_series(column) -> bool:
+    """Check if a column is a pandas Series, without importing pandas."""
+    return type(column).__name__ == 'Series' and type(column).__module__.startswith('pandas')
+
+
+def as_arrow_strings(column):
+    """
+    Return a column as a pyarrow ChunkedArray if it is Arrow-backed string data.
+
+    :param column: A pyarrow Array/ChunkedArray, a pandas Series or any sequence.
+    :return: The ChunkedArray, or None if the column is not Arrow-backed or pyarrow is
+             not installed.
+    """
+    if type(column).__module__.split('.')[0] not in ('pyarrow', 'pandas'):
+        return None
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return None
+
+    if is_pandas_series(column):
+        array = column.array
+        if not hasattr(array, '__arrow_array__'):
+            return None
+        column = pa.array(array)
+    if isinstance(column, pa.Array):
+        column = pa.chunked_array([column])
+    if not isinstance(column, pa.ChunkedArray) or not (pa.types.is_string(column.type)
+                                                      or pa.types.is_large_string(column.type)):
+        return None
+    return column
+
+
+def arrow_match(column, pattern, flags=0):
+    """
+    Match every string of an Arrow column against a pattern with Arrow's RE2 engine.
+
+    :param column: pyarrow ChunkedArray of strings.
+    :param pattern: The regular expression the whole string has to match.
+    :param flags: re flags of the pattern; only re.IGNORECASE is supported.
+    :return: Boolean NumPy array; missing values are False. None if RE2 cannot match the
+             pattern like re does (lookarounds, backreferences, \\b, other flags), so the caller
+             can fall back to re.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if flags & ~re.IGNORECASE:
+        return None
+    try:
+        # RE2's \d, \w and \s are ASCII-only, unlike re's
+        pattern = translate_unicode_classes(pattern)
+    except ValueError:
+        return None
+    try:
+        matched = pc.match_substring_regex(column, f'^(?:{pattern})$', ignore_case=bool(flags & re.IGNORECASE))
+    except pa.ArrowInvalid:
+        return None
+    return pc.fill_null(matched, False).to_numpy(zero_copy_only=False)
@@ -1,37 +1,56 @@
-import re
-from datetime import datetime
+from checker.checker_utils import np, is_pandas_series, as_arrow_strings, arrow_match
+from instrumentation import stage
+from patterns import get_pattern
+from patterns.backend import LINEAR_MIN_LENGTH
 
 
 class RegexChecker:
     """
     A class to validate various types of inputs such as URLs, phone numbers,
     email addresses, and dates using regular expressions.
+
+    The patterns come from the shared registry of the patterns package, where they are
+    compiled once per process, so any registered pattern (e.g. 'iban', 'ipv4', 'ipv6',
+    'uuid' or 'credit_card') can be validated by name.
     """
 
-    def __init__(self):
-        # URL pattern to match common URL formats (http, https, with or without 'www')
-        self.url_pattern = (
-            r'^(https?:\/\/)?'                 # Optional protocol (http or https)
-            r'(([a-zA-Z0-9_-]+\.)+[a-zA-Z]{2,})' # Domain name
-            r'(:\d+)?'                        # Optional port number
-            r'(\/[^\s]*)?$'                   # Optional path
-        )
-
-        # USA phone number pattern that matches a variety of formats
-        self.phone_pattern = (
-            r'^(\+1\s?)?'                     # Optional country code (+1)
-            r'(\(?\d{3}\)?[-.\s]?)'           # Area code (with or without parentheses)
-            r'\d{3}[-.\s]?\d{4}$'             # The rest of the phone number (7 digits)
-        )
-
-        # Email pattern for standard email formats
-        self.email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-
-        # Date pattern to support DD-MM-YYYY and MM-DD-YYYY formats
-        self.date_pattern = (
-            r'^(?:0[1-9]|[12][0-9]|3[01])[-/](?:0[1-9]|1[0-2])[-/](?:19|20)\d{2}$|'  # DD-MM-YYYY
-            r'(?:0[1-9]|1[0-2])[-/](?:0[1-9]|[12][0-9]|3[01])[-/](?:19|20)\d{2}$'    # MM-DD-YYYY
-        )
+    @property
+    def url_pattern(self) -> str:
+        """Pattern of URL formats (http, https, with or without 'www', optional port)."""
+        return get_pattern('url').pattern
+
+    @property
+    def phone_pattern(self) -> str:
+        """Pattern of USA phone numbers in a variety of formats."""
+        return get_pattern('phone').pattern
+
+    @property
+    def email_pattern(self) -> str:
+        """Pattern of standard email formats."""
+        return get_pattern('email').pattern
+
+    @property
+    def date_pattern(self) -> str:
+        """Pattern of DD-MM-YYYY and MM-DD-YYYY dates."""
+        return get_pattern('date').pattern
+
+    @staticmethod
+    def _entry(kind: str):
+        """Look up the registered pattern validating a kind."""
+        try:
+            return get_pattern(kind)
+        except KeyError as error:
+            raise ValueError(error.args[0]) from None
+
+    def is_valid(self, kind: str, value: str) -> bool:
+        """
+        Validate a string against a registered pattern and its validator.
+
+        :param kind: Name of a registered pattern, e.g. 'email' or 'iban'.
+        :param value: The string to validate.
+        :return: True if valid, False otherwise.
+        """
+        return self._entry(kind).is_valid(value)
 
     def is_valid_url(self, url: str) -> bool:
         """
@@ -40,7 +59,7 @@ class RegexChecker:
         :param url: The URL string to validate.
         :return: True if valid, False otherwise.
         """
-        return re.match(self.url_pattern, url) is not None
+        return self.is_valid('url', url)
 
     def is_valid_phone(self, phone: str) -> bool:
         """
@@ -49,7 +68,7 @@ class RegexChecker:
         :param phone: The phone number string to validate.
         :return: True if valid, False otherwise.
         """
-        return re.match(self.phone_pattern, phone) is not None
+        return self.is_valid('phone', phone)
 
     def is_valid_email(self, email: str) -> bool:
         """
@@ -58,7 +77,7 @@ class RegexChecker:
         :param email: The email address string to validate.
         :return: True if valid, False otherwise.
         """
-        return re.match(self.email_pattern, email) is not None
+        return self.is_valid('email', email)
 
     def is_valid_date(self, date_str: str) -> bool:
         """
@@ -68,16 +87,79 @@ class RegexChecker:
         :param date_str: The date string to validate.
         :return: True if valid, False otherwise.
         """
-        if re.match(self.date_pattern, date_str):
-            try:
-                # First attempt to parse as DD-MM-YYYY
-                datetime.strptime(date_str, '%d-%m-%Y')
-                return True
-            except ValueError:
-                try:
-                    # Then attempt to parse as MM-DD-YYYY
-                    datetime.strptime(date_str, '%m-%d-%Y')
-                    return True
-                except ValueError:
-                    return False
-        return False
+        # Day-in-month and leap year arithmetic instead of two strptime attempts
+        return self.is_valid('date', date_str)
+
+    def validate_many(self, kind: str, values):
+        """
+        Validate many strings of one kind at once.
+
+        Patterns are matched with the C-level map over precompiled fullmatch calls (long
+        values on the linear-time backend), and kinds with a batch validator (dates) are
+        checked with vectorized arithmetic.
+
+        :param kind: Name of a registered pattern, e.g. 'url', 'phone', 'email' or 'date'.
+        :param values: Sequence (or iterable) of strings.
+        :return: Boolean NumPy array with one flag per value, or a bytearray of 0/1 flags
+                 if NumPy is not installed.
+        """
+        entry = self._entry(kind)
+        if not hasattr(values, '__len__'):
+            values = list(values)
+
+        with stage(f'checker.validate_many.{kind}', len(values)):
+            if np is not None and entry.batch_validator is not None:
+                return entry.batch_validator(entry, values)
+            if entry.validator is None:
+                # Values go straight to re unless some are long enough for the linear-time backend
+                long_values = entry.backend != 're' and max(map(len, values), default=0) >= LINEAR_MIN_LENGTH
+                fullmatch = entry.fullmatch if long_values else entry.regex.fullmatch
+                flags = map(bool, map(fullmatch, values))
+            else:
+                flags = map(entry.is_valid, values)
+
+            if np is None:
+                return bytearray(flags)
+            return np.fromiter(flags, dtype=bool, count=len(values))
+
+    def validate_column(self, kind: str, column):
+        """
+        Validate a pandas Series or a pyarrow Array/ChunkedArray of strings.
+
+        Arrow-backed data (pyarrow arrays and Series with an Arrow string dtype) is
+        validated without creating a Python string per row: patterns are matched by
+        Arrow's RE2 engine, whose \\d and \\s only match ASCII, and dates are read from
+        the raw buffers. Patterns RE2 cannot express (lookarounds, backreferences) and other
+        columns go through validate_many. Missing values are invalid.
+
+        :param kind: Name of a registered pattern, e.g. 'url', 'phone', 'email' or 'date'.
+        :param column: The column to validate.
+        :return: A boolean Series with the column's index for a Series, otherwise a
+                 boolean NumPy array.
+        """
+        entry = self._entry(kind)
+        arrow = as_arrow_strings(column)
+        if arrow is not None:
+            if entry.arrow_validator is not None:
+                valid = entry.arrow_validator(entry, arrow)
+            else:
+                valid = arrow_match(arrow, entry.pattern, entry.flags)
+                if valid is None:
+                    values = arrow.to_pylist()
+                    present = np.fromiter((value is not None for value in values), dtype=bool, count=len(values))
+                    valid = np.zeros(len(values), dtype=bool)
+                    valid[present] = self.validate_many(kind, [value for value in values if value is not None])
+                elif entry.validator is not None:
+                    for row in np.flatnonzero(valid):
+                        valid[row] = entry.validator(arrow[int(row)].as_py())
+        elif is_pandas_series(column):
+            present = ~column.isna().to_numpy()
+            valid = np.zeros(len(column), dtype=bool)
+            valid[present] = self.validate_many(kind, column.to_numpy(dtype=object)[present])
+        else:
+            return self.validate_many(kind, column)
+
+        if is_pandas_series(column):
+            import pandas as pd
+            return pd.Series(valid, index=column.index, name=column.name)
+        return valid
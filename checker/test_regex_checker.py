@@ -1,4 +1,13 @@
+import random
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
 from checker import RegexChecker
+from patterns import register, unregister
 
 # Initialize the RegexChecker class
 checker = RegexChecker()
@@ -30,4 +39,63 @@ print(f"Email '{invalid_email}' is valid: {checker.is_valid_email(invalid_email)
 
 # Validate date
 print(f"Date '{sample_date}' is valid: {checker.is_valid_date(sample_date)}")
-print(f"Date '{invalid_date}' is valid: {checker.is_valid_date(invalid_date)}")
\ No newline at end of file
+print(f"Date '{invalid_date}' is valid: {checker.is_valid_date(invalid_date)}")
+
+
+def strptime_valid(value):
+    """The original is_valid_date: the date pattern, then strptime as DD-MM-YYYY or MM-DD-YYYY."""
+    if not re.fullmatch(checker.date_pattern, value):
+        return False
+    for format in ('%d-%m-%Y', '%m-%d-%Y'):
+        try:
+            datetime.strptime(value, format)
+            return True
+        except ValueError:
+            pass
+    return False
+
+
+def test_vectorized_dates_match_strptime():
+    rng = random.Random(0)
+    values = [f"{rng.randint(0, 39):02d}{rng.choice('-/.')}{rng.randint(0, 19):02d}-{rng.randint(1890, 2110)}"
+              for _ in range(20000)]
+    values += ['29-02-2000', '29-02-1900', '02-29-2024', '29-02-2023', '31-04-2024', '00-01-2024', '1-01-2024']
+    expected = [strptime_valid(value) for value in values]
+    assert checker.validate_many('date', values).tolist() == expected
+    assert [checker.is_valid_date(value) for value in values] == expected
+
+
+def test_validate_column_agrees_with_lists():
+    rng = random.Random(1)
+    values = ['user@example.com', 'invalid-email', 'https://www.example.com', '+1 (405) 456-7890', '123',
+              '25-12-2024', '31-02-2024', '', None]
+    values += [value + rng.choice(['', 'x', ' ']) for value in values if value] * 20
+    present = [value for value in values if value is not None]
+    for kind in ('url', 'phone', 'email', 'date'):
+        expected = checker.validate_many(kind, present).tolist()
+        for column in (pa.array(values), pa.chunked_array([values[:10], values[10:]]),
+                       pd.Series(values, dtype='string[pyarrow]'), pd.Series(values, dtype=object)):
+            valid = np.asarray(checker.validate_column(kind, column))
+            assert not valid[[value is None for value in values]].any(), kind
+            assert valid[[value is not None for value in values]].tolist() == expected, (kind, type(column))
+
+
+def test_validate_column_matches_unicode_classes_like_re():
+    values = ['٣٣٣-٣٣٣-٣٣٣٣', '333-333-3333', '３３３.３３３.３３３３', 'ééé', 'abc', '٣٣٣\u00a0٣٣٣٣', None]
+    register('test_unicode_word', r'\w+\s?\w*')
+    try:
+        for kind in ('phone', 'test_unicode_word'):
+            expected = checker.validate_many(kind, values[:-1]).tolist() + [False]
+            assert checker.validate_column(kind, pa.array(values)).tolist() == expected, kind
+    finally:
+        unregister('test_unicode_word')
+    assert checker.validate_column('phone', pa.array(['٣٣٣-٣٣٣-٣٣٣٣'])).tolist() == [True]
+
+
+def test_validate_column_falls_back_for_re2_unsupported_patterns():
+    register('test_lookahead_word', r'(?=a)\w+')
+    try:
+        values = ['abc', 'bcd', None, 'a']
+        assert checker.validate_column('test_lookahead_word', pa.array(values)).tolist() == [True, False, False, True]
+    finally:
+        unregister('test_lookahead_word')
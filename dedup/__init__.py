@@ -0,0 +1 @@
+from .minhash import REMOVED, MinHasher, NearDuplicateDetector, deduplicate, kept_rows, shingles, similarity
\ No newline at end of file
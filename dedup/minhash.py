@@ -0,0 +1,340 @@
+import zlib
+
+import numpy as np
+
+from instrumentation import stage
+
+# Default estimated Jaccard similarity of shingle sets above which two items are near-duplicates.
+DEFAULT_THRESHOLD = 0.8
+
+# Default number of MinHash permutations per signature.
+DEFAULT_NUM_PERM = 128
+
+# Default number of consecutive tokens per shingle.
+DEFAULT_SHINGLE_SIZE = 3
+
+# Mersenne prime modulus of the universal hash functions simulating the permutations.
+_PRIME = (1 << 61) - 1
+
+# Signature value of an item without shingles.
+_EMPTY = np.uint64(0xFFFFFFFF)
+
+# Representative of a removed item.
+REMOVED = -1
+
+
+def shingles(tokens, size=DEFAULT_SHINGLE_SIZE):
+    """
+    Split a token list into overlapping shingles of `size` consecutive tokens.
+
+    Args:
+        tokens (list): Tokens of one item.
+        size (int): Tokens per shingle. Items shorter than that form a single shingle.
+
+    Returns:
+        set: The shingles, as space-joined strings.
+    """
+    if len(tokens) <= size:
+        return {' '.join(tokens)} if tokens else set()
+    return {' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def optimal_bands(threshold, num_perm):
+    """
+    Pick the LSH banding for a similarity threshold.
+
+    Items whose signatures agree on all rows of at least one band become candidates,
+    which happens with probability 1 - (1 - s^rows)^bands for similarity s. The banding
+    whose S-curve crosses 1/2 closest below the threshold is chosen, so pairs at the
+    threshold are likely to be compared and pairs far below it rarely are; candidates
+    are verified on the full signatures afterwards.
+
+    Args:
+        threshold (float): Similarity threshold.
+        num_perm (int): Signature length.
+
+    Returns:
+        tuple: (bands, rows), with bands * rows <= num_perm.
+    """
+    best = (num_perm, 1)
+    best_midpoint = 0.0
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        # Similarity at which an item pair becomes a candidate with probability 1/2
+        midpoint = (1 - 0.5 ** (1 / bands)) ** (1 / rows)
+        if best_midpoint < midpoint <= threshold:
+            best, best_midpoint = (bands, rows), midpoint
+    return best
+
+
+class MinHasher:
+    """Computes MinHash signatures of token lists, reproducibly across processes."""
+
+    def __init__(self, num_perm=DEFAULT_NUM_PERM, shingle_size=DEFAULT_SHINGLE_SIZE, seed=1):
+        """
+        Args:
+            num_perm (int): Signature length.
+            shingle_size (int): Tokens per shingle.
+            seed (int): Seed of the hash functions; signatures are only comparable
+                between hashers with the same seed and length.
+        """
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        rng = np.random.RandomState(seed)
+        # a * x + b stays below 2^63 for 32-bit shingle hashes x, so it never overflows
+        self._a = rng.randint(1, 1 << 31, size=num_perm, dtype=np.uint64)[:, None]
+        self._b = rng.randint(0, 1 << 31, size=num_perm, dtype=np.uint64)[:, None]
+
+    def signature(self, tokens):
+        """
+        Args:
+            tokens (list): Tokens of one item.
+
+        Returns:
+            ndarray: uint64 signature of length num_perm.
+        """
+        hashes = np.fromiter((zlib.crc32(shingle.encode('utf-8'))
+                              for shingle in shingles(tokens, self.shingle_size)), dtype=np.uint64)
+        if not len(hashes):
+            return np.full(self.num_perm, _EMPTY, dtype=np.uint64)
+        return ((self._a * hashes + self._b) % np.uint64(_PRIME) & np.uint64(0xFFFFFFFF)).min(axis=1)
+
+
+def similarity(first, second):
+    """
+    Estimate the Jaccard similarity of two items from their signatures.
+
+    Args:
+        first (ndarray): Signature of the first item.
+        second (ndarray): Signature of the second item, from the same MinHasher.
+
+    Returns:
+        float: Share of equal signature values.
+    """
+    return float(np.count_nonzero(first == second)) / len(first)
+
+
+class NearDuplicateDetector:
+    """
+    Streaming near-duplicate detector over token lists, with MinHash signatures and LSH.
+
+    Items are added one at a time (or in batches). Each item is compared with the kept
+    items sharing one of its LSH bands; if one reaches the threshold the item collapses
+    into it, otherwise the item is kept. An item is only compared with those candidates,
+    not with every kept item. Items can also be removed, so the detector can follow an
+    edited collection without hashing the unchanged items again.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, num_perm=DEFAULT_NUM_PERM, shingle_size=DEFAULT_SHINGLE_SIZE,
+                 seed=1):
+        """
+        Args:
+            threshold (float): Estimated Jaccard similarity of the shingle sets at which
+                an item is a near-duplicate of a kept item (1.0 for exact duplicates).
+            num_perm (int): Signature length; longer signatures estimate similarity
+                more precisely.
+            shingle_size (int): Tokens per shingle; 1 compares bags of words.
+            seed (int): Seed of the MinHash functions.
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError(f"threshold must be in (0, 1], got {threshold!r}")
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm, shingle_size, seed)
+        self.bands, self.rows = optimal_bands(threshold, num_perm)
+        # Id of the kept item every added item collapsed into (its own id if it was kept,
+        # REMOVED if it was removed)
+        self.representatives = []
+        # Signatures of the items not removed, and the ids collapsed into every kept item
+        self._signatures = {}
+        self._members = {}
+        self._buckets = [{} for _ in range(self.bands)]
+
+    def __len__(self):
+        return len(self.representatives)
+
+    @property
+    def settings(self):
+        """Keyword arguments creating an empty detector that hashes and groups items like this one."""
+        return {'threshold': self.threshold, 'num_perm': self.hasher.num_perm,
+                'shingle_size': self.hasher.shingle_size, 'seed': self.hasher.seed}
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [signature[band * rows:(band + 1) * rows].tobytes() for band in range(self.bands)]
+
+    def add(self, tokens):
+        """
+        Add an item.
+
+        Args:
+            tokens (list): Tokens of the item.
+
+        Returns:
+            int: Id of the kept item it collapsed into, or its own id (its position in
+            the order items were added) if it was kept.
+        """
+        item_id = len(self.representatives)
+        self.representatives.append(item_id)
+        return self._place(item_id, self.hasher.signature(tokens))
+
+    def _place(self, item_id, signature):
+        """Collapse an item into the most similar kept item, or keep it, and return its representative."""
+        keys = self._band_keys(signature)
+        best, best_similarity = item_id, self.threshold
+        candidates = {candidate for bucket, key in zip(self._buckets, keys) for candidate in bucket.get(key, ())}
+        # Most similar kept item wins; ties go to the earliest one
+        for candidate in sorted(candidates):
+            estimate = similarity(signature, self._signatures[candidate])
+            if estimate > best_similarity or (estimate == best_similarity and best == item_id):
+                best, best_similarity = candidate, estimate
+
+        self._signatures[item_id] = signature
+        if best == item_id:
+            for bucket, key in zip(self._buckets, keys):
+                bucket.setdefault(key, []).append(item_id)
+        else:
+            self._members.setdefault(best, []).append(item_id)
+        self.representatives[item_id] = best
+        return best
+
+    def remove(self, item_id):
+        """
+        Remove an item.
+
+        If it was kept, the near-duplicates collapsed into it are placed again among the
+        remaining kept items, in the order they were added: the first one matching none
+        of them is kept, and the others can collapse into it.
+
+        Args:
+            item_id (int): Id of the item.
+
+        Returns:
+            list: Ids of the items whose representative changed, besides the removed one.
+        """
+        representative = self.representatives[item_id]
+        if representative == REMOVED:
+            return []
+        self.representatives[item_id] = REMOVED
+        signature = self._signatures.pop(item_id)
+        if representative != item_id:
+            members = self._members[representative]
+            members.remove(item_id)
+            if not members:
+                del self._members[representative]
+            return []
+
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            ids = bucket[key]
+            ids.remove(item_id)
+            if not ids:
+                del bucket[key]
+        members = self._members.pop(item_id, [])
+        for member in members:
+            self._place(member, self._signatures[member])
+        return members
+
+    def add_kept(self, signatures):
+        """
+        Add items known to be kept, from their signatures, e.g. ones saved with a checkpoint.
+
+        The items are neither hashed nor compared with the kept items: every one is kept
+        and indexed in the LSH bands, whose keys are slices of the signatures.
+
+        Args:
+            signatures (iterable): uint64 signature of every item, from a MinHasher with
+                this detector's num_perm and seed.
+
+        Returns:
+            list: Ids of the added items.
+        """
+        item_ids = []
+        for signature in signatures:
+            item_id = len(self.representatives)
+            self.representatives.append(item_id)
+            self._signatures[item_id] = signature
+            for bucket, key in zip(self._buckets, self._band_keys(signature)):
+                bucket.setdefault(key, []).append(item_id)
+            item_ids.append(item_id)
+        return item_ids
+
+    def signatures(self, item_ids):
+        """
+        Args:
+            item_ids (iterable): Ids of items that were not removed.
+
+        Returns:
+            list: The signature of every item, e.g. to restore kept items with add_kept.
+        """
+        return [self._signatures[item_id] for item_id in item_ids]
+
+    def add_many(self, token_lists):
+        """
+        Add items in order.
+
+        Args:
+            token_lists (iterable): Tokens of every item.
+
+        Returns:
+            list: The add result of every item.
+        """
+        token_lists = list(token_lists)
+        with stage('dedup.add', len(token_lists)):
+            return [self.add(tokens) for tokens in token_lists]
+
+    @property
+    def kept(self):
+        """Ids of the kept items, in the order they were added."""
+        return [item_id for item_id, representative in enumerate(self.representatives) if item_id == representative]
+
+    def collapsed(self):
+        """
+        Returns:
+            dict: Id of every kept item that absorbed near-duplicates -> ids of those
+            near-duplicates, in the order they were added.
+        """
+        groups = {}
+        for item_id, representative in enumerate(self.representatives):
+            if item_id != representative and representative != REMOVED:
+                groups.setdefault(representative, []).append(item_id)
+        return groups
+
+
+def deduplicate(token_lists, threshold=DEFAULT_THRESHOLD, num_perm=DEFAULT_NUM_PERM,
+                shingle_size=DEFAULT_SHINGLE_SIZE, seed=1):
+    """
+    Collapse near-duplicate token lists.
+
+    Args:
+        token_lists (iterable): Tokens of every item.
+        threshold (float): Similarity threshold (see NearDuplicateDetector).
+        num_perm (int): Signature length.
+        shingle_size (int): Tokens per shingle.
+        seed (int): Seed of the MinHash functions.
+
+    Returns:
+        tuple: The detector, holding the report of collapsed items, and an int array
+        mapping every item to its row among the kept items.
+    """
+    detector = NearDuplicateDetector(threshold, num_perm, shingle_size, seed)
+    detector.add_many(token_lists)
+    return detector, kept_rows(detector)
+
+
+def kept_rows(detector, start=0):
+    """
+    Map items of a detector to their rows among the kept items.
+
+    Args:
+        detector (NearDuplicateDetector): Detector the items were added to.
+        start (int): Id of the first item to map.
+
+    Returns:
+        ndarray: For every item from `start` on, the position of the kept item it
+        collapsed into within detector.kept (-1 for removed items).
+    """
+    representatives = np.asarray(detector.representatives, dtype=np.int64)
+    kept = np.flatnonzero(representatives == np.arange(len(representatives)))
+    rows = np.searchsorted(kept, representatives[start:])
+    rows[representatives[start:] == REMOVED] = -1
+    return rows
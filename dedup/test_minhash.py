@@ -0,0 +1,73 @@
+import random
+
+import numpy as np
+
+from benchmarks import synthetic
+from dedup import REMOVED, MinHasher, NearDuplicateDetector, deduplicate, kept_rows, similarity
+
+
+def token_lists(count, seed):
+    rng = random.Random(seed)
+    base = [document.split() for document in synthetic.prose_documents(count, 4, seed=seed)]
+    items = []
+    for tokens in base:
+        items.append(tokens)
+        if rng.random() < 0.5:
+            # A near-duplicate: one token changed
+            copy = list(tokens)
+            copy[rng.randrange(len(copy))] = 'changed'
+            items.append(copy)
+    return items
+
+
+def test_signatures_are_reproducible():
+    tokens = 'the quick brown fox jumps over the lazy dog'.split()
+    first, second = MinHasher(seed=3).signature(tokens), MinHasher(seed=3).signature(tokens)
+    assert np.array_equal(first, second)
+    assert similarity(first, MinHasher(seed=3).signature(tokens[:-1])) > 0.5
+    assert similarity(first, MinHasher(seed=4).signature(tokens)) < 0.2
+
+
+def test_near_duplicates_collapse_into_the_first_item():
+    items = token_lists(40, seed=1)
+    detector, rows = deduplicate(items, threshold=0.7)
+    kept = detector.kept
+    assert len(kept) < len(items)
+    for item_id, representative in enumerate(detector.representatives):
+        assert representative <= item_id
+        assert kept[rows[item_id]] == representative
+    hasher = detector.hasher
+    for representative, members in detector.collapsed().items():
+        for member in members:
+            assert similarity(hasher.signature(items[member]), hasher.signature(items[representative])) >= 0.7
+
+
+def test_remove_places_the_members_again():
+    items = token_lists(30, seed=2)
+    detector, _ = deduplicate(items, threshold=0.7)
+    representative, members = next(iter(detector.collapsed().items()))
+    changed = detector.remove(representative)
+    assert changed == members
+    assert detector.representatives[representative] == REMOVED
+    assert detector.representatives[members[0]] == members[0]
+    assert kept_rows(detector)[representative] == -1
+
+    # Removing every item but one leaves it kept
+    for item_id in range(len(items) - 1):
+        detector.remove(item_id)
+    assert detector.kept == [len(items) - 1]
+
+
+def test_restored_detector_matches_the_original():
+    items = token_lists(40, seed=3)
+    original, _ = deduplicate(items, threshold=0.7)
+    restored = NearDuplicateDetector(**original.settings)
+    assert restored.add_kept(original.signatures(original.kept)) == list(range(len(original.kept)))
+
+    new_items = token_lists(20, seed=4) + [items[i] for i in original.kept[:5]]
+    ids = {kept_id: row for row, kept_id in enumerate(original.kept)}
+    start = len(original)
+    expected = original.add_many(new_items)
+    actual = restored.add_many(new_items)
+    # Restored ids are the rows of the kept items, followed by the new items
+    assert actual == [ids[item_id] if item_id < start else item_id - start + len(ids) for item_id in expected]
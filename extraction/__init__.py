@@ -1 +1 @@
-from .extractor import RegexExtractor
\ No newline at end of file
+from .regex_extractor import RegexExtractor
\ No newline at end of file
@@ -0,0 +1,135 @@
+import csv
+import hashlib
+import json
+import math
+import mmap
+import os
+from contextlib import contextmanager
+
+# Columns written by write_csv, one row per extracted value.
+CSV_FIELDS = ['record', 'kind', 'value', 'purpose']
+
+# extract_data result keys and the kind each of their values is written as.
+_RESULT_KINDS = [('emails', 'email'), ('urls', 'url'), ('phones', 'phone'), ('dates', 'date')]
+
+
+class BloomFilter:
+    """
+    A fixed-size probabilistic set used to drop repeated values from a stream.
+
+    Memory does not grow with the number of values added. Membership tests can return
+    false positives (a new value reported as already seen) at roughly the configured
+    error rate once `capacity` values were added, but never false negatives.
+    """
+
+    def __init__(self, capacity=1000000, error_rate=0.001):
+        """
+        :param capacity: Number of distinct values the filter is sized for.
+        :param error_rate: Acceptable false-positive rate at full capacity.
+        """
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def add(self, item):
+        """
+        Add a value to the filter.
+
+        :param item: The string to add.
+        :return: True if the value was not seen before, False if it (probably) was.
+        """
+        added = False
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                added = True
+        return added
+
+
+def _iter_file_chunks(file, chunk_size):
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+@contextmanager
+def open_byte_source(source, chunk_size):
+    """
+    Open a file path, binary file object or iterable of chunks for streaming extraction.
+
+    Regular files are memory-mapped so they can be scanned without being read into
+    memory; anything else is consumed chunk by chunk.
+
+    :param source: A path, a binary file object or an iterable of bytes or str chunks.
+    :param chunk_size: Size of the chunks read from file objects that cannot be mapped.
+    :return: A (mapped, start, chunks) triple: the read-only mmap and the offset to start
+             scanning at, or None, None and an iterator of chunks.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as file:
+            with open_byte_source(file, chunk_size) as opened:
+                yield opened
+        return
+
+    if hasattr(source, 'read'):
+        try:
+            start = source.tell()
+            mapped = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError):
+            # Pipes, sockets, in-memory and empty files cannot be mapped
+            yield None, None, _iter_file_chunks(source, chunk_size)
+            return
+        try:
+            yield mapped, start, None
+        finally:
+            mapped.close()
+        return
+
+    yield None, None, iter(source)
+
+
+def write_jsonl(indexed_results, file):
+    """
+    Write extraction results as JSON lines, one object per record.
+
+    :param indexed_results: Iterable of (record index, extract_data result) pairs.
+    :param file: Text file object to write to.
+    :return: The number of records written.
+    """
+    count = 0
+    for index, result in indexed_results:
+        file.write(json.dumps({'record': index, **result}, ensure_ascii=False))
+        file.write('\n')
+        count += 1
+    return count
+
+
+def write_csv(indexed_results, file):
+    """
+    Write extraction results as CSV with one row per extracted value (see CSV_FIELDS).
+
+    :param indexed_results: Iterable of (record index, extract_data result) pairs.
+    :param file: Text file object opened with newline=''.
+    :return: The number of records written.
+    """
+    writer = csv.writer(file)
+    writer.writerow(CSV_FIELDS)
+    count = 0
+    for index, result in indexed_results:
+        purposes = result['url_purposes']
+        for key, kind in _RESULT_KINDS:
+            writer.writerows([index, kind, value, purposes.get(value, '') if kind == 'url' else '']
+                             for value in result[key])
+        count += 1
+    return count
@@ -1,5 +1,107 @@
+import os
 import re
-from datetime import datetime
+from collections import deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+
+from extraction.extraction_utils import BloomFilter, open_byte_source, write_csv, write_jsonl
+from instrumentation import stage
+from patterns import get_pattern
+
+# Registered pattern extracted for every kind; extract_stream reports ties in this order.
+KIND_PATTERNS = {'email': 'email', 'url': 'url_known_tld', 'phone': 'phone', 'date': 'date'}
+
+# Bytes scanned per step by extract_stream.
+STREAM_CHUNK_SIZE = 1 << 20
+
+# Bytes held back at the end of every step so that matches crossing a chunk boundary
+# are found whole; matches longer than this may be cut at a boundary.
+STREAM_OVERLAP = 4096
+
+# Records sent to a worker process per task by extract_many.
+EXTRACT_CHUNK_SIZE = 256
+
+ExtractedMatch = namedtuple('ExtractedMatch', ['kind', 'value', 'offset'])
+ExtractedMatch.__doc__ = """A value found by extract_stream: its kind ('email', 'url', 'phone' or 'date'), the
+value as extract_data reports it and its byte offset in the source."""
+
+# Purpose of a website, by the top-level domain of its URL.
+TLD_PURPOSES = {
+    "com": "Commercial businesses",
+    "org": "Non-profit organizations",
+    "net": "Network services",
+    "info": "Informational sites",
+    "biz": "Business",
+    "co": "Companies and organizations",
+    "io": "Technology startups and software companies",
+    "me": "Personal websites",
+    "tech": "Technology-related sites",
+    "store": "E-commerce",
+    "design": "Design websites",
+    "online": "Online presence",
+    "blog": "Blogs",
+    "website": "General websites",
+    "site": "General sites",
+    "app": "Applications",
+    "tv": "Entertainment",
+    "dev": "Developer-oriented",
+    "us": "US-based",
+    "xyz": "General use"
+}
+
+# Trailing ".extension" of a URL path; URLs ending in one are classified by it instead of the TLD.
+_PATH_EXTENSION = re.compile(r'\.(\w+)$')
+
+
+def _email_domain_matcher(emails):
+    """
+    Build a function telling whether a URL contains the domain of any of the emails.
+
+    The domains are kept in a set and every substring of the URL with the length of a
+    domain is looked up in it, so the cost no longer grows with the number of emails.
+    Results are memoized per URL since the same URL tends to repeat in logs.
+    """
+    domains = {email.split('@')[1] for email in emails}
+    lengths = sorted({len(domain) for domain in domains})
+    seen = {}
+
+    def contains_email_domain(url):
+        found = seen.get(url)
+        if found is None:
+            found = seen[url] = any(url[i:i + length] in domains
+                                    for length in lengths
+                                    for i in range(len(url) - length + 1))
+        return found
+
+    return contains_email_domain
+
+
+# Extractor of the current extract_many worker process.
+_worker_extractor = None
+
+
+def _init_worker(extractor):
+    """Process pool initializer: keep the extractor in the worker, which compiles the shared patterns once."""
+    global _worker_extractor
+    _worker_extractor = extractor
+
+
+def _extract_chunk(start, records):
+    """Run extract_data over a chunk of records in a worker; return the chunk's start index with the results."""
+    return start, [_worker_extractor.extract_data(record) for record in records]
+
+
+def _iter_record_chunks(records, chunksize):
+    """Split an iterable of records into (start index, list of records) chunks."""
+    records = iter(records)
+    start = 0
+    while True:
+        chunk = list(islice(records, chunksize))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
 
 class RegexExtractor:
     """
@@ -7,108 +109,236 @@ class RegexExtractor:
     such as URLs, phone numbers, emails, and dates.
     """
 
-    def __init__(self):
-        """
-        Initialize patterns for URL, phone number, email, and date validation.
-        """
-        self.url_pattern = (
-            r'(https?:\/\/)?(www\.)?([a-zA-Z0-9._-]+)\.(com|org|net|info|biz|co|io|me|tech|store|design|online|blog|website|site|app|tv|dev|us|xyz)(\/[^\s]*)?'
-        )
+    @property
+    def url_pattern(self):
+        """URL pattern, from the shared pattern registry"""
+        return get_pattern(KIND_PATTERNS['url']).pattern
 
-        self.phone_pattern = (
-            r'(\+1\s?)?(\(?\d{3}\)?[-.\s]?)(\d{3})[-.\s]?(\d{4})'
-        )
+    @property
+    def phone_pattern(self):
+        """USA phone number pattern, from the shared pattern registry"""
+        return get_pattern(KIND_PATTERNS['phone']).pattern
 
-        self.email_pattern = (
-            r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-        )
+    @property
+    def email_pattern(self):
+        """Email pattern, from the shared pattern registry"""
+        return get_pattern(KIND_PATTERNS['email']).pattern
 
-        self.date_pattern = (
-            r'(?:0[1-9]|[12][0-9]|3[01])[-/](?:0[1-9]|1[0-2])[-/](?:19|20)\d{2}|'
-            r'(?:0[1-9]|1[0-9])[-/](?:0[1-9]|[12][0-9]|3[01])[-/](?:19|20)\d{2}'
-        )
+    @property
+    def date_pattern(self):
+        """Date pattern, from the shared pattern registry"""
+        return get_pattern(KIND_PATTERNS['date']).pattern
 
     def is_valid_url(self, url):
         """Validate URL format"""
-        return re.match(self.url_pattern, url) is not None
+        return get_pattern(KIND_PATTERNS['url']).regex_for(url).match(url) is not None
 
     def is_valid_phone(self, phone):
         """Validate USA phone number"""
-        return re.match(self.phone_pattern, phone) is not None
+        return get_pattern(KIND_PATTERNS['phone']).regex_for(phone).match(phone) is not None
 
     def is_valid_email(self, email):
         """Validate Email address"""
-        return re.match(self.email_pattern, email) is not None
+        return get_pattern(KIND_PATTERNS['email']).regex_for(email).match(email) is not None
 
     def is_valid_date(self, date_str):
         """
         Validate Date in DD-MM-YYYY or MM-DD-YYYY formats and check for leap years.
         """
-        if re.match(self.date_pattern, date_str):
-            try:
-                datetime.strptime(date_str, '%d-%m-%Y')
-                return True
-            except ValueError:
-                try:
-                    datetime.strptime(date_str, '%m-%d-%Y')
-                    return True
-                except ValueError:
-                    return False
-        return False
+        return get_pattern(KIND_PATTERNS['date']).is_valid(date_str)
 
     def extract_data(self, text):
         """
         Extract all valid emails, URLs, phone numbers, and dates from the provided text.
-        Also classify URLs based on their TLD.
+        Also classify URLs based on their TLD. Long texts are scanned with the linear-time
+        regex backend when one is installed.
         """
-        emails = re.findall(self.email_pattern, text)
-        urls = re.findall(self.url_pattern, text)
-        phones = re.findall(self.phone_pattern, text)
-        dates = re.findall(self.date_pattern, text)
+        with stage('extraction.findall.email') as timer:
+            emails = get_pattern(KIND_PATTERNS['email']).regex_for(text).findall(text)
+            timer.add_items(len(emails))
+        with stage('extraction.findall.url') as timer:
+            urls = get_pattern(KIND_PATTERNS['url']).regex_for(text).findall(text)
+            timer.add_items(len(urls))
+        with stage('extraction.findall.phone') as timer:
+            phones = get_pattern(KIND_PATTERNS['phone']).regex_for(text).findall(text)
+            timer.add_items(len(phones))
+        with stage('extraction.findall.date') as timer:
+            dates = get_pattern(KIND_PATTERNS['date']).regex_for(text).findall(text)
+            timer.add_items(len(dates))
 
         # Rebuild the phone numbers with the correct country code if missing
         full_phones = ['+1 ' + ''.join(phone).strip() if not phone[0] else ''.join(phone) for phone in phones]
 
-        # Extract and filter complete URLs
-        filtered_urls = [''.join([url[0] or '', url[1] or '', url[2], '.', url[3], url[4] or '']) for url in urls]
-
-        # Remove URLs that match email domains
-        filtered_urls = [url for url in filtered_urls if not any(email.split('@')[1] in url for email in emails)]
-
-        # Map URLs to purposes based on TLD
+        # Rebuild complete URLs, drop the ones containing an email domain and map the
+        # rest to purposes, reading the TLD from the match groups
+        contains_email_domain = _email_domain_matcher(emails)
+        filtered_urls = []
         url_purposes = {}
-        tld_purposes = {
-            "com": "Commercial businesses",
-            "org": "Non-profit organizations",
-            "net": "Network services",
-            "info": "Informational sites",
-            "biz": "Business",
-            "co": "Companies and organizations",
-            "io": "Technology startups and software companies",
-            "me": "Personal websites",
-            "tech": "Technology-related sites",
-            "store": "E-commerce",
-            "design": "Design websites",
-            "online": "Online presence",
-            "blog": "Blogs",
-            "website": "General websites",
-            "site": "General sites",
-            "app": "Applications",
-            "tv": "Entertainment",
-            "dev": "Developer-oriented",
-            "us": "US-based",
-            "xyz": "General use"
-        }
+        for scheme, www, domain, tld, path in urls:
+            url = ''.join((scheme, www, domain, '.', tld, path))
+            if contains_email_domain(url):
+                continue
+            filtered_urls.append(url)
 
-        for url in filtered_urls:
-            tld_match = re.search(r'\.(\w+)$', url)
-            if tld_match:
-                tld = tld_match.group(1)
-                url_purposes[url] = tld_purposes.get(tld, "Unknown")
+            if not path:
+                url_purposes[url] = TLD_PURPOSES.get(tld, "Unknown")
+            elif '.' in path:
+                extension = _PATH_EXTENSION.search(path)
+                if extension:
+                    url_purposes[url] = TLD_PURPOSES.get(extension.group(1), "Unknown")
 
         return {
             "emails": emails,
             "urls": filtered_urls,
             "phones": full_phones,
             "dates": dates,"url_purposes": url_purposes
-        }
\ No newline at end of file
+        }
+
+    def extract_many(self, records, workers=None, chunksize=EXTRACT_CHUNK_SIZE, ordered=True):
+        """
+        Run extract_data over many records with a pool of worker processes.
+
+        Every worker compiles the shared patterns once, and records travel in chunks
+        to keep the inter-process traffic low. Only a few chunks per worker are in flight
+        at a time, so `records` can be a lazy iterable of any length.
+
+        :param records: Iterable of texts.
+        :param workers: Number of worker processes; defaults to the number of CPUs, and 1
+                        extracts in the calling process.
+        :param chunksize: Number of records sent to a worker per task.
+        :param ordered: Yield results in the order of the records. If False, results are
+                        yielded as soon as their chunk is done, as (record index, result) pairs.
+        :return: Iterator of extract_data results, or of (index, result) pairs when unordered.
+        """
+        workers = workers or os.cpu_count() or 1
+        chunks = _iter_record_chunks(records, chunksize)
+
+        if workers == 1:
+            for start, chunk in chunks:
+                for index, record in enumerate(chunk, start):
+                    result = self.extract_data(record)
+                    yield result if ordered else (index, result)
+            return
+
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self,))
+        max_pending = 2 * workers
+        try:
+            if ordered:
+                pending = deque()
+                for start, chunk in chunks:
+                    pending.append(executor.submit(_extract_chunk, start, chunk))
+                    if len(pending) >= max_pending:
+                        yield from pending.popleft().result()[1]
+                while pending:
+                    yield from pending.popleft().result()[1]
+            else:
+                pending = set()
+                for start, chunk in chunks:
+                    pending.add(executor.submit(_extract_chunk, start, chunk))
+                    if len(pending) >= max_pending:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            start, results = future.result()
+                            yield from enumerate(results, start)
+                for future in pending:
+                    start, results = future.result()
+                    yield from enumerate(results, start)
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def extract_to_file(self, records, path, workers=None, chunksize=EXTRACT_CHUNK_SIZE, ordered=False,
+                        format=None):
+        """
+        Run extract_many over the records and write the results to a JSONL or CSV file.
+
+        :param records: Iterable of texts.
+        :param path: Output file path.
+        :param workers: Number of worker processes, as in extract_many.
+        :param chunksize: Number of records sent to a worker per task.
+        :param ordered: Write the records in input order instead of as soon as they are done.
+        :param format: 'jsonl' or 'csv'; inferred from the file extension by default.
+        :return: The number of records written.
+        """
+        format = format or ('csv' if str(path).lower().endswith('.csv') else 'jsonl')
+        write = {'jsonl': write_jsonl, 'csv': write_csv}[format]
+        results = self.extract_many(records, workers, chunksize, ordered)
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            return write(enumerate(results) if ordered else results, file)
+
+    def extract_stream(self, source, chunk_size=STREAM_CHUNK_SIZE, overlap=STREAM_OVERLAP, dedupe=False,
+                       counts=None):
+        """
+        Lazily extract emails, URLs, phone numbers, and dates from a file or a stream of chunks.
+
+        Regular files are memory-mapped and scanned in place; other sources are read chunk
+        by chunk, so memory stays bounded by the chunk size plus the overlap window. Each
+        kind is matched on its own as in extract_data, but on the raw bytes (so \\d and \\s
+        only match ASCII) and URLs sharing a domain with an email are not removed, since
+        that would require every email of the stream up front.
+
+        :param source: A file path, a binary file object or an iterable of bytes or str chunks
+                       (str chunks are encoded as UTF-8).
+        :param chunk_size: Number of bytes scanned per step.
+        :param overlap: Number of bytes carried over between steps.
+        :param dedupe: True to yield every (kind, value) only once, tracked in a BloomFilter
+                       of default size, or a BloomFilter to use instead.
+        :param counts: Optional collections.Counter receiving the number of matches of every
+                       kind, duplicates included.
+        :return: Iterator of ExtractedMatch records in order of their offset.
+        """
+        if dedupe is True:
+            dedupe = BloomFilter()
+        cursors = dict.fromkeys(KIND_PATTERNS, 0)
+
+        with open_byte_source(source, chunk_size) as (mapped, start, chunks):
+            if mapped is not None:
+                cursors = dict.fromkeys(cursors, start)
+                end = start
+                while end < len(mapped):
+                    end = min(len(mapped), end + chunk_size)
+                    limit = end if end == len(mapped) else end - overlap
+                    yield from self._scan_window(mapped, 0, end, limit, cursors, dedupe, counts)
+                return
+
+            buffer, base = b'', 0
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                # Drop the bytes every kind has scanned past
+                trim = min(cursors.values()) - base
+                buffer, base = buffer[trim:] + chunk, base + trim
+                yield from self._scan_window(buffer, base, len(buffer), len(buffer) - overlap, cursors, dedupe,
+                                             counts)
+            yield from self._scan_window(buffer, base, len(buffer), len(buffer), cursors, dedupe, counts)
+
+    def _scan_window(self, buffer, base, end, limit, cursors, dedupe, counts):
+        """
+        Find the matches starting before `limit` in buffer[:end], continuing every kind from
+        its cursor, and return them as ExtractedMatch records sorted by offset.
+        """
+        records = []
+        for kind, name in KIND_PATTERNS.items():
+            regex = get_pattern(name).linear_bytes_regex
+            position = cursors[kind] - base
+            for match in regex.finditer(buffer, position, end):
+                if match.start() >= limit:
+                    break
+                position = match.end()
+                value = self._stream_value(kind, match)
+                if counts is not None:
+                    counts[kind] += 1
+                if dedupe and not dedupe.add(kind + '\0' + value):
+                    continue
+                records.append(ExtractedMatch(kind, value, base + match.start()))
+            cursors[kind] = base + max(position, limit)
+
+        records.sort(key=lambda record: record.offset)
+        return records
+
+    @staticmethod
+    def _stream_value(kind, match):
+        """Format a byte match the way extract_data reports values of its kind."""
+        if kind == 'phone':
+            phone = [group.decode('ascii') for group in match.groups(b'')]
+            return '+1 ' + ''.join(phone).strip() if not phone[0] else ''.join(phone)
+        return match.group().decode('utf-8', 'replace')
\ No newline at end of file
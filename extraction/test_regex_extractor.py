@@ -1,7 +1,13 @@
-from extractor import RegexChecker
+import json
+import os
+import tempfile
+
+from benchmarks import synthetic
+from extraction import RegexExtractor
+from extraction.regex_extractor import _email_domain_matcher
 
 # Initialize the checker
-checker = RegexChecker()
+checker = RegexExtractor()
 
 # Sample text to extract data from
 sample_text = """
@@ -26,4 +32,59 @@ print("Is 'https://www.example.com' a valid URL?", checker.is_valid_url("https:/
 print("Is '+1 (123) 456-7890' a valid phone number?", checker.is_valid_phone("+1 (123) 456-7890"))
 print("Is 'valid.email@domain.com' a valid email?", checker.is_valid_email("valid.email@domain.com"))
 print("Is '31-02-2024' a valid date?", checker.is_valid_date("31-02-2024"))  # Invalid date
-print("Is '12/05/2023' a valid date?", checker.is_valid_date("12/05/2023"))  # Valid date in MM-DD-YYYY
\ No newline at end of file
+print("Is '12/05/2023' a valid date?", checker.is_valid_date("12/05/2023"))  # Valid date in MM-DD-YYYY
+
+
+def stream_by_kind(extractor, source, **options):
+    """Group the values of extract_stream by the keys of extract_data."""
+    found = {'emails': [], 'urls': [], 'phones': [], 'dates': []}
+    for match in extractor.extract_stream(source, **options):
+        found[match.kind + 's'].append(match.value)
+    return found
+
+
+def assert_stream_matches(expected, found):
+    for key in ('emails', 'phones', 'dates'):
+        assert found[key] == expected[key], key
+    # extract_stream keeps URLs sharing a domain with an email; extract_data drops them
+    contains_email_domain = _email_domain_matcher(expected['emails'])
+    assert [url for url in found['urls'] if not contains_email_domain(url)] == expected['urls']
+
+
+def test_extract_stream_matches_extract_data():
+    extractor = RegexExtractor()
+    text = '\n'.join(synthetic.log_lines(300, seed=4)) + '\n'
+    expected = extractor.extract_data(text)
+
+    # Chunks of every size cut matches in the middle
+    for size in (1, 7, 64, 1000):
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        assert_stream_matches(expected, stream_by_kind(extractor, chunks, chunk_size=64, overlap=256))
+
+    # Memory-mapped files are scanned in windows of chunk_size bytes
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'access.log')
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(text)
+    try:
+        assert_stream_matches(expected, stream_by_kind(extractor, path, chunk_size=97, overlap=256))
+    finally:
+        os.remove(path)
+        os.rmdir(directory)
+
+
+def test_extract_many_matches_extract_data(tmp_path):
+    extractor = RegexExtractor()
+    records = synthetic.log_lines(200, seed=5)
+    expected = [extractor.extract_data(record) for record in records]
+
+    for workers in (1, 2):
+        assert list(extractor.extract_many(iter(records), workers=workers, chunksize=16)) == expected
+        unordered = dict(extractor.extract_many(records, workers=workers, chunksize=16, ordered=False))
+        assert [unordered[index] for index in range(len(records))] == expected
+
+    path = str(tmp_path / 'extracted.jsonl')
+    assert extractor.extract_to_file(records, path, workers=2, chunksize=16) == len(records)
+    with open(path, encoding='utf-8') as file:
+        rows = {row.pop('record'): row for row in map(json.loads, file)}
+    assert [rows[index] for index in range(len(records))] == json.loads(json.dumps(expected))
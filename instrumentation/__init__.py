@@ -0,0 +1,5 @@
+from .hooks import stage, timed, count, cache_access, enable, disable, is_enabled, enable_from_environment
+from .sinks import Sink, HistogramSink, LoggingSink
+from .profile import profile
+
+enable_from_environment()
\ No newline at end of file
@@ -0,0 +1,38 @@
+import argparse
+import runpy
+import sys
+
+from instrumentation.profile import JSON, OPENMETRICS, TABLE, profile
+
+
+def main(argv=None):
+    """Command line entry point: python -m instrumentation [-m module | script] [args...]"""
+    parser = argparse.ArgumentParser(description="Run a TextFusion script or module and print the time spent "
+                                                 "in each instrumented stage.")
+    parser.add_argument('--format', choices=[TABLE, JSON, OPENMETRICS], default=TABLE)
+    parser.add_argument('--output', help="Write the breakdown to this file instead of standard error.")
+    parser.add_argument('-m', dest='module', action='store_true', help="Run a module, like python -m.")
+    parser.add_argument('target', nargs=argparse.REMAINDER, help="Script path (or module name) and its arguments.")
+    args = parser.parse_args(argv)
+    if not args.target:
+        parser.error("Expected a script or -m module")
+
+    stream = open(args.output, 'w', encoding='utf-8') if args.output else None
+    try:
+        with profile(stream, args.format):
+            if args.module:
+                sys.argv = args.target
+                runpy.run_module(args.target[0], run_name='__main__', alter_sys=True)
+            else:
+                sys.argv = args.target
+                runpy.run_path(args.target[0], run_name='__main__')
+    except SystemExit as exit_:
+        return exit_.code
+    finally:
+        if stream is not None:
+            stream.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
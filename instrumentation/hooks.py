@@ -0,0 +1,174 @@
+import functools
+import logging
+import os
+import threading
+import time
+
+# Environment variable enabling instrumentation at import time, with a LoggingSink
+# ('1', 'true', or a logging level name such as 'DEBUG').
+INSTRUMENTATION_ENV = 'TEXTFUSION_INSTRUMENTATION'
+
+_sinks = []
+_enabled = False
+_lock = threading.Lock()
+
+
+class _NullStage:
+    """Stage returned while instrumentation is disabled: records nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def add_items(self, items):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Stage:
+    """Times one run of a named stage and reports it to the sinks on exit."""
+
+    __slots__ = ('name', 'items', '_started')
+
+    def __init__(self, name, items=0):
+        self.name = name
+        self.items = items
+        self._started = None
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self._started
+        for sink in _sinks:
+            sink.timing(self.name, seconds, self.items)
+        return False
+
+    def add_items(self, items):
+        """Count items processed by the stage, when they are only known inside it."""
+        self.items += items
+
+
+def stage(name, items=0):
+    """
+    Time a block of code as a named stage.
+
+    While instrumentation is disabled this returns a shared no-op context manager, so
+    instrumented hot paths only pay for one function call.
+
+    Args:
+        name (str): Stage name, e.g. 'search.score'.
+        items (int): Number of items (documents, queries, ...) the stage processes.
+
+    Returns:
+        Context manager whose add_items method counts more items.
+    """
+    if not _enabled:
+        return _NULL_STAGE
+    return Stage(name, items)
+
+
+def timed(name):
+    """
+    Decorator timing every call of a function as a named stage.
+
+    Args:
+        name (str): Stage name.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            with Stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, value=1):
+    """
+    Add to a named counter.
+
+    Args:
+        name (str): Counter name.
+        value (int): Amount to add.
+    """
+    if _enabled:
+        for sink in _sinks:
+            sink.count(name, value)
+
+
+def cache_access(name, hits=0, misses=0):
+    """
+    Record lookups in a named cache, from which sinks derive its hit rate.
+
+    Args:
+        name (str): Cache name, e.g. 'search.query_cache'.
+        hits (int): Number of lookups answered by the cache.
+        misses (int): Number of lookups that had to be computed.
+    """
+    if _enabled:
+        for sink in _sinks:
+            sink.cache(name, hits, misses)
+
+
+def is_enabled():
+    """
+    Returns:
+        bool: Whether stages, counters and cache accesses are being recorded.
+    """
+    return _enabled
+
+
+def enable(*sinks):
+    """
+    Start recording into sinks, added to the ones already installed.
+
+    Args:
+        *sinks: Objects with timing, count and cache methods (see instrumentation.sinks).
+    """
+    global _sinks, _enabled
+    with _lock:
+        # Replaced rather than appended to, so threads iterating over the list are unaffected
+        _sinks = _sinks + [sink for sink in sinks if sink not in _sinks]
+        _enabled = bool(_sinks)
+
+
+def disable(*sinks):
+    """
+    Stop recording into some sinks, or into all of them when none are given.
+
+    Args:
+        *sinks: Sinks to remove.
+    """
+    global _sinks, _enabled
+    with _lock:
+        _sinks = [sink for sink in _sinks if sinks and sink not in sinks]
+        _enabled = bool(_sinks)
+
+
+def enable_from_environment():
+    """
+    Enable a LoggingSink if the TEXTFUSION_INSTRUMENTATION environment variable is set.
+
+    Returns:
+        LoggingSink: The installed sink, or None.
+    """
+    value = os.environ.get(INSTRUMENTATION_ENV, '').strip()
+    if value.lower() in ('', '0', 'false', 'no', 'off'):
+        return None
+    from instrumentation.sinks import LoggingSink
+
+    # A level name ('DEBUG') selects that level; any other truthy value ('1', 'true') means INFO
+    level = logging.getLevelName(value.upper())
+    sink = LoggingSink(level=level if isinstance(level, int) else logging.INFO)
+    enable(sink)
+    return sink
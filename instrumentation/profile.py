@@ -0,0 +1,52 @@
+import json
+import sys
+from contextlib import contextmanager
+
+from instrumentation.hooks import disable, enable
+from instrumentation.sinks import HistogramSink
+
+# Output formats of profile and the command line.
+TABLE = 'table'
+JSON = 'json'
+OPENMETRICS = 'openmetrics'
+
+
+def render(sink, output_format=TABLE):
+    """
+    Args:
+        sink (HistogramSink): Recorded data.
+        output_format (str): 'table', 'json' or 'openmetrics'.
+
+    Returns:
+        str: The data in that format.
+    """
+    if output_format == TABLE:
+        return sink.format_breakdown()
+    if output_format == JSON:
+        return json.dumps(sink.summary(), indent=2)
+    if output_format == OPENMETRICS:
+        return sink.openmetrics()
+    raise ValueError(f"Unknown format {output_format!r}, expected one of {[TABLE, JSON, OPENMETRICS]}")
+
+
+@contextmanager
+def profile(file=None, output_format=TABLE):
+    """
+    Record the instrumented stages of a block of code and print a per-stage breakdown.
+
+    Args:
+        file: Stream the breakdown is written to on exit (standard error by default),
+            or False to only keep the data in the yielded sink.
+        output_format (str): 'table', 'json' or 'openmetrics'.
+
+    Yields:
+        HistogramSink: The sink recording the block.
+    """
+    sink = HistogramSink()
+    enable(sink)
+    try:
+        yield sink
+    finally:
+        disable(sink)
+        if file is not False:
+            print(render(sink, output_format), file=file or sys.stderr)
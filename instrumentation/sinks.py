@@ -0,0 +1,247 @@
+import bisect
+import logging
+import math
+import threading
+
+# Upper bounds (seconds) of the latency histogram buckets, as in Prometheus client defaults
+# extended down to 100 microseconds for the per-query stages.
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Prefix of the metric names written by HistogramSink.openmetrics.
+METRIC_PREFIX = 'textfusion'
+
+
+class Sink:
+    """Base class of the instrumentation sinks; every method ignores its data."""
+
+    def timing(self, name, seconds, items):
+        """
+        Record one run of a stage.
+
+        Args:
+            name (str): Stage name.
+            seconds (float): Duration of the run.
+            items (int): Number of items the run processed.
+        """
+
+    def count(self, name, value):
+        """
+        Add to a counter.
+
+        Args:
+            name (str): Counter name.
+            value (int): Amount added.
+        """
+
+    def cache(self, name, hits, misses):
+        """
+        Record cache lookups.
+
+        Args:
+            name (str): Cache name.
+            hits (int): Lookups answered by the cache.
+            misses (int): Lookups that had to be computed.
+        """
+
+
+class StageStats:
+    """Aggregated runs of one stage: count, total, maximum, items and a latency histogram."""
+
+    __slots__ = ('calls', 'seconds', 'max_seconds', 'items', 'buckets')
+
+    def __init__(self, bucket_count):
+        self.calls = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.items = 0
+        # One count per bucket plus the +Inf bucket
+        self.buckets = [0] * (bucket_count + 1)
+
+
+class HistogramSink(Sink):
+    """
+    Keeps every stage's latency histogram, counters and cache hit rates in memory.
+
+    The data can be printed as a per-stage breakdown (format_breakdown) or exported in
+    the Prometheus text / OpenMetrics exposition format (openmetrics).
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Args:
+            buckets (tuple): Ascending upper bounds of the latency buckets, in seconds.
+        """
+        self.bucket_bounds = tuple(buckets)
+        self.stages = {}
+        self.counters = {}
+        self.caches = {}
+        self._lock = threading.Lock()
+
+    def timing(self, name, seconds, items):
+        with self._lock:
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = StageStats(len(self.bucket_bounds))
+            stats.calls += 1
+            stats.seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.items += items
+            stats.buckets[bisect.bisect_left(self.bucket_bounds, seconds)] += 1
+
+    def count(self, name, value):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def cache(self, name, hits, misses):
+        with self._lock:
+            previous_hits, previous_misses = self.caches.get(name, (0, 0))
+            self.caches[name] = (previous_hits + hits, previous_misses + misses)
+
+    def reset(self):
+        """Forget everything recorded so far."""
+        with self._lock:
+            self.stages.clear()
+            self.counters.clear()
+            self.caches.clear()
+
+    def percentile(self, name, fraction):
+        """
+        Estimate a latency percentile of a stage from its histogram.
+
+        Args:
+            name (str): Stage name.
+            fraction (float): Percentile as a fraction, e.g. 0.99.
+
+        Returns:
+            float: Upper bound of the bucket holding the percentile, in seconds (the
+            stage's maximum for the +Inf bucket), or None for an unknown stage.
+        """
+        stats = self.stages.get(name)
+        if stats is None:
+            return None
+        rank = max(1, math.ceil(round(fraction * stats.calls, 9)))
+        seen = 0
+        for bound, bucket in zip(self.bucket_bounds, stats.buckets):
+            seen += bucket
+            if seen >= rank:
+                return min(bound, stats.max_seconds)
+        return stats.max_seconds
+
+    def summary(self):
+        """
+        Returns:
+            dict: 'stages' (calls, total/mean/max seconds, estimated p50/p99, items and
+            share of the instrumented time), 'counters' and 'caches' (hits, misses and
+            hit rate), ready to be serialized as JSON.
+        """
+        with self._lock:
+            total = sum(stats.seconds for stats in self.stages.values()) or 1.0
+            stages = {name: {
+                'calls': stats.calls,
+                'seconds': stats.seconds,
+                'mean_seconds': stats.seconds / stats.calls,
+                'max_seconds': stats.max_seconds,
+                'p50_seconds': self.percentile(name, 0.50),
+                'p99_seconds': self.percentile(name, 0.99),
+                'items': stats.items,
+                'share': stats.seconds / total,
+            } for name, stats in self.stages.items()}
+            caches = {name: {'hits': hits, 'misses': misses,
+                             'hit_rate': hits / (hits + misses) if hits + misses else None}
+                      for name, (hits, misses) in self.caches.items()}
+            return {'stages': stages, 'counters': dict(self.counters), 'caches': caches}
+
+    def format_breakdown(self):
+        """
+        Returns:
+            str: Table of the stages, slowest first, followed by the counters and the
+            cache hit rates. Stages may be nested, so shares can add up to more than 100%.
+        """
+        summary = self.summary()
+        lines = [f"{'stage':<32}{'calls':>8}{'total ms':>12}{'mean ms':>10}{'p99 ms':>10}{'max ms':>10}"
+                 f"{'items':>10}{'share':>8}"]
+        for name, stats in sorted(summary['stages'].items(), key=lambda item: -item[1]['seconds']):
+            lines.append(f"{name:<32}{stats['calls']:>8}{stats['seconds'] * 1000:>12.2f}"
+                         f"{stats['mean_seconds'] * 1000:>10.3f}{stats['p99_seconds'] * 1000:>10.3f}"
+                         f"{stats['max_seconds'] * 1000:>10.3f}{stats['items']:>10}{stats['share']:>8.1%}")
+        for name, value in sorted(summary['counters'].items()):
+            lines.append(f"counter {name}: {value}")
+        for name, stats in sorted(summary['caches'].items()):
+            rate = f"{stats['hit_rate']:.1%}" if stats['hit_rate'] is not None else '-'
+            lines.append(f"cache {name}: {stats['hits']} hits, {stats['misses']} misses ({rate} hit rate)")
+        return '\n'.join(lines)
+
+    def openmetrics(self, prefix=METRIC_PREFIX):
+        """
+        Export the data in the OpenMetrics text format (also read by Prometheus).
+
+        Args:
+            prefix (str): Prefix of the metric names.
+
+        Returns:
+            str: The exposition, ending with '# EOF'.
+        """
+        lines = []
+        with self._lock:
+            if self.stages:
+                lines += [f"# TYPE {prefix}_stage_seconds histogram", f"# UNIT {prefix}_stage_seconds seconds",
+                          f"# HELP {prefix}_stage_seconds Duration of instrumented stages."]
+                for name, stats in sorted(self.stages.items()):
+                    label = _label('stage', name)
+                    cumulative = 0
+                    for bound, bucket in zip(self.bucket_bounds + (float('inf'),), stats.buckets):
+                        cumulative += bucket
+                        le = '+Inf' if bound == float('inf') else repr(float(bound))
+                        lines.append(f'{prefix}_stage_seconds_bucket{{{label},le="{le}"}} {cumulative}')
+                    lines.append(f"{prefix}_stage_seconds_count{{{label}}} {stats.calls}")
+                    lines.append(f"{prefix}_stage_seconds_sum{{{label}}} {stats.seconds!r}")
+                lines += [f"# TYPE {prefix}_stage_items counter",
+                          f"# HELP {prefix}_stage_items Items processed by instrumented stages."]
+                lines += [f"{prefix}_stage_items_total{{{_label('stage', name)}}} {stats.items}"
+                          for name, stats in sorted(self.stages.items())]
+            if self.counters:
+                lines += [f"# TYPE {prefix}_events counter", f"# HELP {prefix}_events Instrumentation counters."]
+                lines += [f"{prefix}_events_total{{{_label('name', name)}}} {value}"
+                          for name, value in sorted(self.counters.items())]
+            if self.caches:
+                lines += [f"# TYPE {prefix}_cache_lookups counter",
+                          f"# HELP {prefix}_cache_lookups Cache lookups by result."]
+                for name, (hits, misses) in sorted(self.caches.items()):
+                    lines.append(f'{prefix}_cache_lookups_total{{{_label("cache", name)},result="hit"}} {hits}')
+                    lines.append(f'{prefix}_cache_lookups_total{{{_label("cache", name)},result="miss"}} {misses}')
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+
+def _label(key, value):
+    """Format a label pair, escaping the value as the exposition format requires."""
+    value = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return f'{key}="{value}"'
+
+
+class LoggingSink(Sink):
+    """Logs every stage run, counter increment and cache access as it happens."""
+
+    def __init__(self, logger='textfusion.instrumentation', level=logging.DEBUG):
+        """
+        Args:
+            logger (str or logging.Logger): Logger, or the name of one.
+            level (int or str): Level of the records.
+        """
+        self.logger = logging.getLogger(logger) if isinstance(logger, str) else logger
+        if isinstance(level, str):
+            resolved = logging.getLevelName(level.upper())
+            if not isinstance(resolved, int):
+                raise ValueError(f"unknown logging level {level!r}")
+            level = resolved
+        self.level = level
+
+    def timing(self, name, seconds, items):
+        self.logger.log(self.level, "stage %s took %.3f ms (%d items)", name, seconds * 1000, items)
+
+    def count(self, name, value):
+        self.logger.log(self.level, "counter %s +%d", name, value)
+
+    def cache(self, name, hits, misses):
+        self.logger.log(self.level, "cache %s: %d hits, %d misses", name, hits, misses)
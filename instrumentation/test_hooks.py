@@ -0,0 +1,62 @@
+import logging
+
+import pytest
+
+from instrumentation import hooks
+from instrumentation.sinks import HistogramSink, LoggingSink
+
+
+@pytest.fixture(autouse=True)
+def disabled():
+    hooks.disable()
+    yield
+    hooks.disable()
+
+
+@pytest.mark.parametrize('value, level', [
+    ('1', logging.INFO), ('true', logging.INFO), ('Yes', logging.INFO), ('on', logging.INFO),
+    ('info', logging.INFO), ('DEBUG', logging.DEBUG), (' warning ', logging.WARNING),
+])
+def test_environment_enables_a_logging_sink(monkeypatch, value, level):
+    monkeypatch.setenv(hooks.INSTRUMENTATION_ENV, value)
+    sink = hooks.enable_from_environment()
+    assert isinstance(sink, LoggingSink) and sink.level == level
+    assert hooks.is_enabled()
+    with hooks.stage('test.stage', 3):
+        pass
+
+
+@pytest.mark.parametrize('value', ['', '0', 'false', 'No', 'off'])
+def test_environment_leaves_instrumentation_off(monkeypatch, value):
+    monkeypatch.setenv(hooks.INSTRUMENTATION_ENV, value)
+    assert hooks.enable_from_environment() is None
+    assert not hooks.is_enabled()
+
+
+def test_logging_sink_rejects_unknown_levels():
+    with pytest.raises(ValueError):
+        LoggingSink(level='TRUE')
+
+
+def test_histogram_sink_records_stages():
+    sink = HistogramSink()
+    hooks.enable(sink)
+    with hooks.stage('test.stage', 2) as stage:
+        stage.add_items(1)
+    hooks.count('test.counter', 4)
+    hooks.cache_access('test.cache', hits=3, misses=1)
+    summary = sink.summary()
+    assert summary['stages']['test.stage']['calls'] == 1
+    assert summary['stages']['test.stage']['items'] == 3
+    assert summary['counters'] == {'test.counter': 4}
+    assert summary['caches']['test.cache']['hit_rate'] == 0.75
+
+
+def test_histogram_percentiles_use_the_nearest_rank():
+    sink = HistogramSink(buckets=(1.0, 2.0, 3.0, 4.0))
+    for seconds in (0.5, 1.5, 2.5, 3.5, 3.6):
+        sink.timing('test.stage', seconds, 1)
+    # Nearest rank of p50 over 5 runs is the 3rd run, in the (2, 3] bucket
+    assert sink.percentile('test.stage', 0.50) == 3.0
+    assert sink.percentile('test.stage', 0.30) == 2.0
+    assert sink.percentile('test.stage', 0.99) == 3.6
@@ -1,14 +1,12 @@
 from modeling.topic_model import TopicModeling
-from modeling_utils import load_newsgroups_dataset
-from sklearn.feature_extraction.text import TfidfVectorizer
-import pandas as pd
+from modeling.modeling_utils import DEFAULT_CACHE_DIR, load_newsgroups_dataset
 
 def run_topic_modeling():
     # Load dataset
     documents, _ = load_newsgroups_dataset()
 
-    # Initialize the TopicModeling class
-    topic_modeling = TopicModeling(documents)
+    # Initialize the TopicModeling class; the preprocessed corpus is cached across runs
+    topic_modeling = TopicModeling(documents, cache_dir=DEFAULT_CACHE_DIR)
 
     # Find the best number of topics and perform LDA
     best_num_topics = topic_modeling.find_best_num_topics()
@@ -19,9 +17,8 @@ def run_topic_modeling():
     for idx, topic in lda_model.print_topics(-1):
         print(f"Topic {idx}: {topic}")
 
-    # Convert documents to a TF-IDF matrix
-    vectorizer = TfidfVectorizer(tokenizer=lambda doc: doc, lowercase=False)
-    X = vectorizer.fit_transform(topic_modeling.processed_docs)
+    # TF-IDF matrix built from the bag-of-words corpus
+    X = topic_modeling.tfidf_matrix
 
     # Find the best number of clusters
     best_num_clusters = topic_modeling.find_best_num_clusters(X)
@@ -29,13 +26,13 @@ def run_topic_modeling():
     # Cluster documents
     clusters = topic_modeling.cluster_documents(best_num_clusters, X)
 
-    # Display cluster assignments
-    df = pd.DataFrame({'Document': documents, 'Cluster': clusters})
+    # Dominant topic of every document
+    dominant_topics = topic_modeling.infer_topics().argmax(axis=1)
 
-    # Print each document with its corresponding cluster
+    # Print each document with its corresponding cluster and topic
     print("\nDocument Clustering Results:")
-    for i, row in df.iterrows():
-        print(f"Document {i+1} is in Cluster {row['Cluster']}")
+    for i, (cluster, topic) in enumerate(zip(clusters, dominant_topics)):
+        print(f"Document {i+1} is in Cluster {cluster} (Topic {topic})")
 
 if __name__ == "__main__":
     run_topic_modeling()
\ No newline at end of file
@@ -1,4 +1,66 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import nltk
+import numpy as np
+import scipy.sparse as sp
+from gensim import corpora
+from gensim.models import CoherenceModel
+from gensim.models.ldamodel import LdaModel
+from nltk.tokenize import word_tokenize
 from sklearn.datasets import fetch_20newsgroups
+from sklearn.decomposition import TruncatedSVD
+from sklearn.metrics.pairwise import euclidean_distances
+from sklearn.preprocessing import normalize
+
+from instrumentation import cache_access, count, stage
+
+# Version of the document preprocessing. Bump it whenever preprocess_text changes, so
+# cached corpora built with the old preprocessing are not reused.
+PREPROCESS_VERSION = 1
+
+# Number of documents sent to a preprocessing worker at a time.
+PREPROCESS_CHUNK_SIZE = 256
+
+# Corpora with fewer documents are preprocessed in the calling process, since starting
+# the worker processes would take longer than the work itself.
+MIN_PARALLEL_DOCUMENTS = 2000
+
+# Cache directory of preprocessed corpora used by the demo.
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'textfusion', 'corpora')
+
+# Number of passes over the corpus when training LDA models.
+LDA_PASSES = 15
+
+# Number of top words per topic scored by the coherence measure.
+COHERENCE_TOPN = 20
+
+# Number of TruncatedSVD components the scalable clustering reduces document-term matrices to.
+SVD_COMPONENTS = 100
+
+# Number of documents the scalable clustering estimates silhouette scores on.
+SILHOUETTE_SAMPLE_SIZE = 5000
+
+# Mini-batch size of the scalable clustering.
+MINIBATCH_SIZE = 1024
+
+# New words occurring fewer times than this in a batch of added documents are pruned.
+MIN_NEW_TERM_COUNT = 2
+
+# Format version of TopicModeling checkpoints.
+CHECKPOINT_VERSION = 3
+
+# Number of documents infer_topic_matrix passes to LdaModel.inference at a time.
+INFERENCE_CHUNK_SIZE = 2000
+
+_worker_stop_words = None
+_worker_lda_args = None
+
 
 def load_newsgroups_dataset(categories=None):
     """
@@ -11,4 +73,633 @@ def load_newsgroups_dataset(categories=None):
         tuple: Documents and target labels.
     """
     newsgroups = fetch_20newsgroups(subset='all', categories=categories, remove=('headers', 'footers', 'quotes'))
-    return newsgroups.data, newsgroups.target
\ No newline at end of file
+    return newsgroups.data, newsgroups.target
+
+
+def ensure_nltk_resources():
+    """
+    Make sure the NLTK tokenizer and stopword data are installed.
+
+    Resources are looked up locally first and only downloaded when missing, so offline
+    workers with the data installed never touch the network.
+
+    Returns:
+        list: Names of the resources that had to be downloaded.
+    """
+    from nltk.tokenize import punkt
+
+    # NLTK 3.8.2 and later tokenize with the pickle-free punkt_tab tables
+    tokenizer = 'punkt_tab' if hasattr(punkt, 'PunktTokenizer') else 'punkt'
+    downloaded = []
+    for name, path in ((tokenizer, f'tokenizers/{tokenizer}'), ('stopwords', 'corpora/stopwords')):
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            nltk.download(name, quiet=True)
+            downloaded.append(name)
+    return downloaded
+
+
+def preprocess_text(text, stop_words):
+    """
+    Tokenize a document into lowercase alphabetic words, dropping stopwords.
+
+    Args:
+        text (str): Raw document.
+        stop_words (set): Words to drop.
+
+    Returns:
+        list: The remaining words, in document order.
+    """
+    words = word_tokenize(text.lower())
+    return [word for word in words if word.isalpha() and word not in stop_words]
+
+
+def _init_preprocess_worker(stop_words):
+    """Keep the stopwords in the worker process, so they are sent only once."""
+    global _worker_stop_words
+    _worker_stop_words = stop_words
+
+
+def _preprocess_chunk(documents):
+    """Preprocess a chunk of documents in a worker process."""
+    return [preprocess_text(text, _worker_stop_words) for text in documents]
+
+
+def preprocess_documents(documents, stop_words, workers=None, chunksize=PREPROCESS_CHUNK_SIZE):
+    """
+    Preprocess documents with preprocess_text, over a process pool for large corpora.
+
+    Args:
+        documents (list): Raw documents.
+        stop_words (set): Words to drop.
+        workers (int): Number of worker processes. Defaults to the number of CPUs; 1
+            preprocesses in the calling process.
+        chunksize (int): Number of documents sent to a worker at a time.
+
+    Returns:
+        list: The token list of every document, in the original order.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    with stage('modeling.preprocess', len(documents)):
+        if workers <= 1 or len(documents) < MIN_PARALLEL_DOCUMENTS:
+            return [preprocess_text(text, stop_words) for text in documents]
+
+        chunks = [documents[start:start + chunksize] for start in range(0, len(documents), chunksize)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_preprocess_worker,
+                                 initargs=(stop_words,)) as executor:
+            return [tokens for chunk in executor.map(_preprocess_chunk, chunks) for tokens in chunk]
+
+
+def corpus_cache_key(documents):
+    """
+    Compute the key a preprocessed corpus is cached under.
+
+    Args:
+        documents (list): Raw documents.
+
+    Returns:
+        str: SHA-256 hex digest of the documents, the preprocessing version and the NLTK
+        version.
+    """
+    digest = hashlib.sha256(f'{PREPROCESS_VERSION}:{nltk.__version__}:{len(documents)}'.encode('utf-8'))
+    for text in documents:
+        data = text.encode('utf-8')
+        digest.update(len(data).to_bytes(8, 'little'))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def save_corpus_cache(cache_dir, key, processed_docs, dictionary, corpus):
+    """
+    Store a preprocessed corpus in the cache directory under its key.
+
+    The entry is written to a temporary directory and renamed into place, so readers
+    never see a partial entry. It holds the gensim Dictionary, the bag-of-words corpus
+    as a Matrix Market file and the token ids of the documents as NumPy arrays.
+
+    Args:
+        cache_dir (str): Cache directory.
+        key (str): Key of the corpus (see corpus_cache_key).
+        processed_docs (list): Token list of every document.
+        dictionary (Dictionary): Dictionary of the tokens.
+        corpus (list): Bag-of-words of every document.
+
+    Returns:
+        str: Path of the cache entry.
+    """
+    path = os.path.join(cache_dir, key)
+    if os.path.isdir(path):
+        return path
+    os.makedirs(cache_dir, exist_ok=True)
+
+    staging = tempfile.mkdtemp(prefix='.' + key[:16], dir=cache_dir)
+    try:
+        dictionary.save(os.path.join(staging, 'dictionary.gensim'))
+        corpora.MmCorpus.serialize(os.path.join(staging, 'corpus.mm'), corpus)
+        token2id = dictionary.token2id
+        np.save(os.path.join(staging, 'tokens.npy'),
+                np.fromiter((token2id[token] for doc in processed_docs for token in doc), dtype=np.int32))
+        np.save(os.path.join(staging, 'offsets.npy'),
+                np.cumsum([0] + [len(doc) for doc in processed_docs], dtype=np.int64))
+        os.replace(staging, path)
+    except OSError:
+        # Another process stored the same corpus first
+        if not os.path.isdir(path):
+            raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return path
+
+
+def load_mm_corpus(path):
+    """
+    Read a bag-of-words corpus written with MmCorpus.serialize.
+
+    Args:
+        path (str): Path of the Matrix Market file.
+
+    Returns:
+        list: Bag-of-words of every document, with integer counts as doc2bow returns them.
+    """
+    return [[(term_id, int(count)) for term_id, count in bow] for bow in corpora.MmCorpus(path)]
+
+
+def load_corpus_cache(cache_dir, key):
+    """
+    Load a preprocessed corpus stored by save_corpus_cache.
+
+    Args:
+        cache_dir (str): Cache directory.
+        key (str): Key of the corpus (see corpus_cache_key).
+
+    Returns:
+        tuple: (processed_docs, dictionary, corpus), or None if the corpus is not cached.
+    """
+    path = os.path.join(cache_dir, key)
+    if not os.path.isdir(path):
+        cache_access('modeling.corpus_cache', misses=1)
+        return None
+    cache_access('modeling.corpus_cache', hits=1)
+
+    dictionary = corpora.Dictionary.load(os.path.join(path, 'dictionary.gensim'))
+    corpus = load_mm_corpus(os.path.join(path, 'corpus.mm'))
+
+    words = [None] * len(dictionary.token2id)
+    for token, token_id in dictionary.token2id.items():
+        words[token_id] = token
+    tokens = [words[token_id] for token_id in np.load(os.path.join(path, 'tokens.npy')).tolist()]
+    offsets = np.load(os.path.join(path, 'offsets.npy')).tolist()
+    processed_docs = [tokens[start:end] for start, end in zip(offsets, offsets[1:])]
+    return processed_docs, dictionary, corpus
+
+
+def train_lda(corpus, dictionary, num_topics, passes=LDA_PASSES, random_state=None):
+    """
+    Train an LDA model.
+
+    Args:
+        corpus (list): Bag-of-words of every document.
+        dictionary (Dictionary): Dictionary of the corpus.
+        num_topics (int): Number of topics.
+        passes (int): Number of passes over the corpus.
+        random_state (int): Seed making the training reproducible.
+
+    Returns:
+        LdaModel: The trained model.
+    """
+    with stage('modeling.train_lda', len(corpus)):
+        return LdaModel(corpus=corpus, id2word=dictionary, num_topics=num_topics, passes=passes,
+                        random_state=random_state)
+
+
+def _init_lda_worker(corpus, dictionary, passes, random_state):
+    """Keep the training arguments in the worker process, so the corpus is sent only once."""
+    global _worker_lda_args
+    _worker_lda_args = (corpus, dictionary, passes, random_state)
+
+
+def _train_lda_worker(num_topics):
+    """Train one LDA model in a worker process."""
+    corpus, dictionary, passes, random_state = _worker_lda_args
+    return train_lda(corpus, dictionary, num_topics, passes, random_state)
+
+
+class LdaTrainer:
+    """
+    Trains LDA models for several topic counts concurrently over a process pool.
+
+    Every model is trained with the same seed, so results do not depend on the number of
+    workers or on the order the models finish in. Use it as a context manager to shut the
+    pool down.
+    """
+
+    def __init__(self, corpus, dictionary, workers=None, passes=LDA_PASSES, random_state=None):
+        """
+        Args:
+            corpus (list): Bag-of-words of every document.
+            dictionary (Dictionary): Dictionary of the corpus.
+            workers (int): Number of worker processes. Defaults to the number of CPUs; 1
+                trains in the calling process.
+            passes (int): Number of passes over the corpus.
+            random_state (int): Seed of every model.
+        """
+        self.corpus = corpus
+        self.dictionary = dictionary
+        self.workers = workers or os.cpu_count() or 1
+        self.passes = passes
+        self.random_state = random_state
+        self._executor = None
+
+    def train(self, nums_topics):
+        """
+        Train one model per topic count.
+
+        Args:
+            nums_topics (list): Topic counts.
+
+        Returns:
+            list: The models, in the order of the topic counts.
+        """
+        with stage('modeling.lda_round', len(nums_topics)):
+            if self.workers <= 1 or len(nums_topics) <= 1:
+                return [train_lda(self.corpus, self.dictionary, num_topics, self.passes, self.random_state)
+                        for num_topics in nums_topics]
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, initializer=_init_lda_worker,
+                    initargs=(self.corpus, self.dictionary, self.passes, self.random_state))
+            return list(self._executor.map(_train_lda_worker, nums_topics))
+
+    def close(self):
+        """Shut the worker processes down."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class CoherenceEstimator:
+    """
+    Scores topic models by coherence, sharing the co-occurrence statistics between them.
+
+    The sliding-window statistics of a c_v coherence model are gathered over the texts
+    once for the top words of all models scored so far, and only gathered again when new
+    models bring words outside that set, instead of once per model.
+    """
+
+    def __init__(self, texts, dictionary, coherence='c_v', topn=COHERENCE_TOPN):
+        """
+        Args:
+            texts (list): Token list of every document.
+            dictionary (Dictionary): Dictionary of the texts.
+            coherence (str): Coherence measure, e.g. 'c_v'.
+            topn (int): Number of top words per topic to score.
+        """
+        self.texts = texts
+        self.dictionary = dictionary
+        self.coherence = coherence
+        self.topn = topn
+        self.scans = 0
+        self._topics = []
+        self._words = set()
+        self._coherence_model = None
+
+    def score(self, models):
+        """
+        Compute the coherence of topic models.
+
+        Args:
+            models (list): Trained topic models.
+
+        Returns:
+            list: The coherence of every model.
+        """
+        model_topics = [CoherenceModel.top_topics_as_word_lists(model, self.dictionary, self.topn)
+                        for model in models]
+        words = {word for topics in model_topics for topic in topics for word in topic}
+        self._topics.extend(topic for topics in model_topics for topic in topics)
+        if self._coherence_model is None or not words <= self._words:
+            with stage('modeling.coherence_scan', len(self.texts)):
+                self._words |= words
+                self._coherence_model = CoherenceModel(topics=self._topics, texts=self.texts,
+                                                       dictionary=self.dictionary, coherence=self.coherence,
+                                                       topn=self.topn)
+                self._coherence_model.estimate_probabilities()
+            self.scans += 1
+            count('modeling.coherence_scans')
+
+        coherence_values = []
+        with stage('modeling.coherence', len(models)):
+            for topics in model_topics:
+                # Setting topics whose words are all known keeps the accumulated statistics
+                self._coherence_model.topics = topics
+                coherence_values.append(self._coherence_model.get_coherence())
+        return coherence_values
+
+
+def reduce_dimensions(X, n_components=SVD_COMPONENTS, random_state=None):
+    """
+    Project a document-term matrix onto its top singular vectors (latent semantic analysis).
+
+    Args:
+        X (sparse matrix): Document-term matrix (TF-IDF or similar).
+        n_components (int): Number of dimensions to keep; capped below the number of terms.
+        random_state (int): Seed of the randomized SVD.
+
+    Returns:
+        tuple: The fitted TruncatedSVD and the dense reduced matrix, with every row
+        scaled to unit length so Euclidean k-means follows cosine similarity.
+    """
+    n_components = max(1, min(n_components, X.shape[1] - 1))
+    svd = TruncatedSVD(n_components=n_components, random_state=random_state)
+    return svd, normalize(svd.fit_transform(X))
+
+
+def split_center(points, centers):
+    """
+    Initial centers for a k-means run warm-started from the centers of k - 1 clusters.
+
+    The cluster with the largest squared error over the points is split in two along its
+    principal axis, as in bisecting k-means, so no lone outlier gets seeded as a cluster.
+
+    Args:
+        points (ndarray): Points to assign, e.g. a sample of the documents.
+        centers (ndarray): Existing centers.
+
+    Returns:
+        ndarray: The centers with the worst one moved to one side of its cluster and a
+        new center on the other side.
+    """
+    distances = euclidean_distances(points, centers, squared=True)
+    labels = distances.argmin(axis=1)
+    errors = np.bincount(labels, weights=distances.min(axis=1), minlength=len(centers))
+    worst = int(errors.argmax())
+
+    members = points[labels == worst] - centers[worst]
+    _, singular_values, components = np.linalg.svd(members, full_matrices=False)
+    # One standard deviation along the direction the cluster spreads the most
+    offset = components[0] * singular_values[0] / np.sqrt(len(members))
+
+    split = centers.copy()
+    split[worst] += offset
+    return np.vstack([split, centers[worst] - offset])
+
+
+def extend_dictionary(dictionary, processed_docs, min_count=MIN_NEW_TERM_COUNT, max_terms=None):
+    """
+    Add the words of new documents to a Dictionary without renumbering existing words.
+
+    New words occurring fewer than `min_count` times in the batch are pruned, and when
+    `max_terms` is given only the most frequent new words fitting under it are added.
+    Existing ids never change (unlike Dictionary.filter_extremes), so trained models and
+    stored corpora stay valid.
+
+    Args:
+        dictionary (Dictionary): Dictionary to extend in place.
+        processed_docs (list): Token list of every new document.
+        min_count (int): Minimum number of occurrences of a new word in the batch.
+        max_terms (int): Optional maximum size of the dictionary.
+
+    Returns:
+        int: Number of words added.
+    """
+    token2id = dictionary.token2id
+    counts = Counter(token for doc in processed_docs for token in doc if token not in token2id)
+    new_terms = [token for token, count in counts.most_common() if count >= min_count]
+    if max_terms is not None:
+        new_terms = new_terms[:max(0, max_terms - len(token2id))]
+
+    admitted = set(new_terms)
+    known_docs = [[token for token in doc if token in token2id or token in admitted] for doc in processed_docs]
+    dictionary.add_documents(known_docs, prune_at=None)
+    return len(new_terms)
+
+
+def extend_lda_vocabulary(lda_model, num_terms):
+    """
+    Grow a trained LdaModel to a larger vocabulary, so online updates can use new words.
+
+    The topic-word statistics of the new words start at zero and their prior at the mean
+    prior of the existing words; LdaModel.update then learns them from the new documents.
+
+    Args:
+        lda_model (LdaModel): Model to extend in place.
+        num_terms (int): New vocabulary size, e.g. the length of the extended dictionary.
+    """
+    extra = num_terms - lda_model.num_terms
+    if extra <= 0:
+        return
+
+    def pad(values):
+        fill = np.full(values.shape[:-1] + (extra,), values.mean(), dtype=values.dtype)
+        return np.concatenate([values, fill], axis=-1)
+
+    lda_model.eta = pad(lda_model.eta)
+    lda_model.state.eta = pad(lda_model.state.eta)
+    lda_model.state.sstats = np.concatenate(
+        [lda_model.state.sstats, np.zeros((lda_model.num_topics, extra), dtype=lda_model.state.sstats.dtype)], axis=1)
+    lda_model.num_terms = num_terms
+    lda_model.sync_state()
+
+
+def _read_manifest(path):
+    """Return the manifest of a checkpoint, or None if there is none."""
+    try:
+        with open(os.path.join(path, 'manifest.json'), encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def save_checkpoint(path, documents, processed_docs, dictionary, corpus, lda_model=None, saved_count=0,
+                    dedupe=None, signatures=None):
+    """
+    Write a TopicModeling checkpoint, appending to an existing one.
+
+    A checkpoint directory holds a manifest, a state directory with the Dictionary and
+    the LdaModel, and segment directories with the documents, their tokens and their
+    bag-of-words (as a Matrix Market file), so loading does not run doc2bow again. With
+    deduplication a segment also holds the MinHash signatures of its documents, so the
+    near-duplicate detector is restored without hashing them again. Documents
+    already stored by an earlier checkpoint are not written again: only a segment with the
+    documents added since is, so saving costs time proportional to the new documents
+    (plus the dictionary and model). The manifest is replaced last, so an interrupted save
+    leaves the previous checkpoint intact.
+
+    Args:
+        path (str): Checkpoint directory.
+        documents (list): Raw documents.
+        processed_docs (list): Token list of every document.
+        dictionary (Dictionary): Dictionary of the corpus.
+        corpus (list): Bag-of-words of every document.
+        lda_model (LdaModel): Optional trained model.
+        saved_count (int): Number of leading documents the checkpoint at `path` already
+            stores; 0 rewrites the checkpoint.
+        dedupe (dict): Optional settings of the near-duplicate detector of the documents
+            (see dedup.NearDuplicateDetector.settings), stored in the manifest.
+        signatures (list): MinHash signature of every document, required with `dedupe`.
+
+    Returns:
+        int: Number of documents the checkpoint stores.
+    """
+    os.makedirs(path, exist_ok=True)
+    manifest = _read_manifest(path) if saved_count else None
+    if manifest is None or manifest.get('version') != CHECKPOINT_VERSION or manifest['num_documents'] != saved_count:
+        segments, saved_count = [], 0
+    else:
+        segments = list(manifest['segments'])
+
+    if saved_count < len(documents) or not segments:
+        segment = tempfile.mkdtemp(prefix='segment-', dir=path)
+        with open(os.path.join(segment, 'documents.jsonl'), 'w', encoding='utf-8') as file:
+            for text, tokens in zip(documents[saved_count:], processed_docs[saved_count:]):
+                file.write(json.dumps([text, tokens], ensure_ascii=False))
+                file.write('\n')
+        corpora.MmCorpus.serialize(os.path.join(segment, 'corpus.mm'), corpus[saved_count:])
+        if dedupe is not None:
+            rows = signatures[saved_count:]
+            np.save(os.path.join(segment, 'signatures.npy'),
+                    np.stack(rows) if rows else np.empty((0, dedupe['num_perm']), dtype=np.uint64))
+        segments.append(os.path.basename(segment))
+
+    state = tempfile.mkdtemp(prefix='state-', dir=path)
+    dictionary.save(os.path.join(state, 'dictionary.gensim'))
+    if lda_model is not None:
+        lda_model.save(os.path.join(state, 'lda.model'))
+
+    new_manifest = {
+        'version': CHECKPOINT_VERSION,
+        'num_documents': len(documents),
+        'segments': segments,
+        'state': os.path.basename(state),
+        'has_model': lda_model is not None,
+        'dedupe': dedupe,
+    }
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=path, suffix='.json', delete=False) as file:
+        json.dump(new_manifest, file)
+    os.replace(file.name, os.path.join(path, 'manifest.json'))
+
+    # Drop the state and segments no longer referenced
+    for name in os.listdir(path):
+        if name.startswith(('state-', 'segment-')) and name != new_manifest['state'] and name not in segments:
+            shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+    return len(documents)
+
+
+def load_checkpoint(path):
+    """
+    Read a checkpoint written by save_checkpoint.
+
+    Args:
+        path (str): Checkpoint directory.
+
+    Returns:
+        tuple: (documents, processed_docs, dictionary, corpus, lda_model, dedupe); lda_model
+        is None if the checkpoint has no model, dedupe the near-duplicate detector settings
+        and a matrix of the documents' signatures, or None if the documents were not
+        deduplicated.
+
+    Raises:
+        FileNotFoundError: If there is no checkpoint at `path`.
+        ValueError: If the checkpoint has an unsupported format version.
+    """
+    manifest = _read_manifest(path)
+    if manifest is None:
+        raise FileNotFoundError(f"No checkpoint in {path!r}")
+    if manifest.get('version') != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version {manifest.get('version')!r}")
+
+    documents, processed_docs, corpus, signatures = [], [], [], []
+    for segment in manifest['segments']:
+        with open(os.path.join(path, segment, 'documents.jsonl'), encoding='utf-8') as file:
+            for line in file:
+                text, tokens = json.loads(line)
+                documents.append(text)
+                processed_docs.append(tokens)
+        corpus.extend(load_mm_corpus(os.path.join(path, segment, 'corpus.mm')))
+        if manifest['dedupe'] is not None:
+            signatures.append(np.load(os.path.join(path, segment, 'signatures.npy')))
+
+    state = os.path.join(path, manifest['state'])
+    dictionary = corpora.Dictionary.load(os.path.join(state, 'dictionary.gensim'))
+    lda_model = None
+    if manifest['has_model']:
+        lda_model = LdaModel.load(os.path.join(state, 'lda.model'))
+        lda_model.id2word = dictionary
+    dedupe = None
+    if manifest['dedupe'] is not None:
+        dedupe = (manifest['dedupe'], np.concatenate(signatures))
+    return documents, processed_docs, dictionary, corpus, lda_model, dedupe
+
+
+def corpus_to_csr(corpus, num_terms, dtype=np.float64):
+    """
+    Convert a bag-of-words corpus to a sparse document-term count matrix.
+
+    Args:
+        corpus (list): Bag-of-words of every document, as (term id, count) pairs.
+        num_terms (int): Number of columns, e.g. the length of the dictionary.
+        dtype: Data type of the matrix.
+
+    Returns:
+        csr_matrix: Matrix of shape (documents, num_terms); column i is term id i.
+    """
+    indptr = np.zeros(len(corpus) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, corpus), dtype=np.int64, count=len(corpus)), out=indptr[1:])
+    pairs = np.fromiter((value for bow in corpus for pair in bow for value in pair), dtype=np.int64,
+                        count=2 * int(indptr[-1])).reshape(-1, 2)
+    matrix = sp.csr_matrix((pairs[:, 1].astype(dtype), pairs[:, 0], indptr), shape=(len(corpus), num_terms))
+    matrix.sort_indices()
+    return matrix
+
+
+def tfidf_from_corpus(corpus, num_terms, dtype=np.float64):
+    """
+    Weight a bag-of-words corpus by TF-IDF, without tokenizing the documents again.
+
+    The weighting matches sklearn's TfidfVectorizer defaults: raw counts, smoothed
+    idf = ln((1 + n) / (1 + df)) + 1 and rows scaled to unit length.
+
+    Args:
+        corpus (list): Bag-of-words of every document, as (term id, count) pairs.
+        num_terms (int): Number of columns, e.g. the length of the dictionary.
+        dtype: Data type of the matrix.
+
+    Returns:
+        csr_matrix: TF-IDF matrix of shape (documents, num_terms); column i is term id i.
+    """
+    matrix = corpus_to_csr(corpus, num_terms, dtype)
+    document_frequency = np.bincount(matrix.indices, minlength=num_terms)
+    idf = np.log((1 + matrix.shape[0]) / (1 + document_frequency)) + 1
+    matrix.data *= idf[matrix.indices].astype(dtype)
+    return normalize(matrix, copy=False)
+
+
+def infer_topic_matrix(lda_model, corpus, chunksize=INFERENCE_CHUNK_SIZE):
+    """
+    Infer the topic distribution of many documents with a trained LdaModel.
+
+    Runs LdaModel.inference on chunks of documents instead of calling
+    get_document_topics once per document, and keeps every topic probability.
+
+    Args:
+        lda_model (LdaModel): Trained model.
+        corpus (list): Bag-of-words of the documents, with ids of the model's dictionary.
+        chunksize (int): Number of documents inferred at a time.
+
+    Returns:
+        ndarray: Dense matrix of shape (documents, topics) whose rows sum to 1.
+    """
+    topics = np.empty((len(corpus), lda_model.num_topics), dtype=lda_model.dtype)
+    with stage('modeling.infer_topics', len(corpus)):
+        for start in range(0, len(corpus), chunksize):
+            gamma, _ = lda_model.inference(corpus[start:start + chunksize])
+            topics[start:start + len(gamma)] = gamma / gamma.sum(axis=1, keepdims=True)
+    return topics
\ No newline at end of file
@@ -0,0 +1,108 @@
+import numpy as np
+from gensim import corpora
+
+from benchmarks import synthetic
+from dedup import MinHasher
+from modeling import TopicModeling
+
+
+def make_documents(count, seed):
+    return synthetic.prose_documents(count, 6, seed=seed)
+
+
+def test_checkpoint_round_trip(tmp_path, monkeypatch):
+    path = str(tmp_path / 'checkpoint')
+    topic_modeling = TopicModeling(make_documents(40, 1), workers=1)
+    topic_modeling.perform_lda(3, random_state=0)
+    topic_modeling.save_checkpoint(path)
+    topic_modeling.add_documents(make_documents(10, 2), min_count=1)
+    topic_modeling.save_checkpoint(path)
+
+    # The bag-of-words corpus is read from the checkpoint, not rebuilt
+    def doc2bow(*args, **kwargs):
+        raise AssertionError('doc2bow called while restoring')
+    monkeypatch.setattr(corpora.Dictionary, 'doc2bow', doc2bow)
+    restored = TopicModeling.from_checkpoint(path, workers=1)
+    monkeypatch.undo()
+
+    assert restored.documents == topic_modeling.documents
+    assert restored.processed_docs == topic_modeling.processed_docs
+    assert restored.corpus == topic_modeling.corpus
+    assert restored.dictionary.token2id == topic_modeling.dictionary.token2id
+    np.testing.assert_allclose(restored.lda_model.get_topics(), topic_modeling.lda_model.get_topics())
+    np.testing.assert_allclose(restored.infer_topics(), topic_modeling.infer_topics(), atol=1e-6)
+
+
+def test_add_documents_keeps_existing_ids(tmp_path):
+    topic_modeling = TopicModeling(make_documents(30, 1), workers=1)
+    topic_modeling.perform_lda(3, random_state=0)
+    token2id = dict(topic_modeling.dictionary.token2id)
+    old_corpus = list(topic_modeling.corpus)
+
+    new_corpus = topic_modeling.add_documents(make_documents(10, 5), min_count=1)
+    assert {token: topic_modeling.dictionary.token2id[token] for token in token2id} == token2id
+    assert topic_modeling.corpus == old_corpus + new_corpus
+    assert topic_modeling.lda_model.num_terms == len(topic_modeling.dictionary)
+    assert topic_modeling.infer_topics().shape == (40, 3)
+
+
+def test_deduplicated_checkpoint_restores_the_signatures(tmp_path, monkeypatch):
+    path = str(tmp_path / 'checkpoint')
+    documents = make_documents(30, 1)
+    documents += documents[:10]
+    topic_modeling = TopicModeling(documents, workers=1, dedupe_threshold=0.8)
+    assert len(topic_modeling.processed_docs) == 30
+    topic_modeling.save_checkpoint(path)
+
+    # Restoring reads the signatures instead of hashing the documents
+    def signature(*args, **kwargs):
+        raise AssertionError('MinHash computed while restoring')
+    with monkeypatch.context() as patch:
+        patch.setattr(MinHasher, 'signature', signature)
+        restored = TopicModeling.from_checkpoint(path, workers=1)
+    assert restored.deduplicator.kept == list(range(30))
+
+    new_documents = make_documents(5, 7) + documents[3:6]
+    topic_modeling.add_documents(new_documents, min_count=1)
+    restored.add_documents(new_documents, min_count=1)
+    assert restored.processed_docs == topic_modeling.processed_docs
+    assert restored.expand(np.arange(len(restored.corpus)))[-8:].tolist() == [30, 31, 32, 33, 34, 3, 4, 5]
+
+
+def test_cached_corpus_skips_preprocessing(tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / 'cache')
+    documents = make_documents(30, 1)
+    topic_modeling = TopicModeling(documents, cache_dir=cache_dir, workers=1)
+
+    def preprocess(*args, **kwargs):
+        raise AssertionError('documents preprocessed despite the cache')
+    with monkeypatch.context() as patch:
+        patch.setattr(TopicModeling, '_preprocess_documents', preprocess)
+        cached = TopicModeling(list(documents), cache_dir=cache_dir, workers=1)
+    assert cached.processed_docs == topic_modeling.processed_docs
+    assert cached.corpus == topic_modeling.corpus
+    assert cached.dictionary.token2id == topic_modeling.dictionary.token2id
+
+    changed = TopicModeling(documents[:-1] + [documents[-1] + ' comet'], cache_dir=cache_dir, workers=1)
+    assert changed.processed_docs[-1] == topic_modeling.processed_docs[-1] + ['comet']
+
+
+def test_topic_sweeps_do_not_depend_on_workers():
+    topic_modeling = TopicModeling(make_documents(40, 1), workers=1)
+    grid = topic_modeling.evaluate_num_topics(2, 8, random_state=0, workers=1)
+    assert grid['num_topics'] == [2, 3, 4, 5, 6, 7]
+    assert topic_modeling.evaluate_num_topics(2, 8, random_state=0, workers=3) == grid
+    coherence = dict(zip(grid['num_topics'], grid['coherence']))
+
+    for workers in (1, 3):
+        early = topic_modeling.evaluate_num_topics(2, 8, strategy='early_stopping', patience=1,
+                                                   random_state=0, workers=workers)
+        # Stops at the first topic count that does not improve on the ones before it
+        stop = next((num_topics for num_topics in grid['num_topics'][1:]
+                     if coherence[num_topics] <= max(coherence[n] for n in range(2, num_topics))), 7)
+        assert early['num_topics'] == list(range(2, stop + 1))
+        assert early['coherence'] == [coherence[num_topics] for num_topics in early['num_topics']]
+
+    coarse = topic_modeling.evaluate_num_topics(2, 8, strategy='coarse_to_fine', random_state=0, workers=2)
+    assert set(coarse['num_topics']) <= set(grid['num_topics'])
+    assert coarse['coherence'] == [coherence[num_topics] for num_topics in coarse['num_topics']]
@@ -1,129 +1,505 @@
-import nltk
+import os
+
 from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from sklearn.feature_extraction.text import TfidfVectorizer
 from gensim import corpora
-from gensim.models.ldamodel import LdaModel
-from gensim.models import CoherenceModel
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
 from sklearn.metrics import silhouette_score
-import matplotlib.pyplot as plt
 import numpy as np
-from sklearn.datasets import fetch_20newsgroups
+
+from dedup import NearDuplicateDetector, deduplicate, kept_rows
+from instrumentation import cache_access, stage
+from modeling.modeling_utils import (MIN_NEW_TERM_COUNT, MINIBATCH_SIZE, SILHOUETTE_SAMPLE_SIZE, SVD_COMPONENTS,
+                                     CoherenceEstimator, LdaTrainer, corpus_cache_key, ensure_nltk_resources,
+                                     extend_dictionary, extend_lda_vocabulary, infer_topic_matrix, load_checkpoint,
+                                     load_corpus_cache, preprocess_documents, reduce_dimensions, save_checkpoint,
+                                     save_corpus_cache, split_center, tfidf_from_corpus, train_lda)
+
+# Strategies of find_best_num_topics.
+GRID = 'grid'
+EARLY_STOPPING = 'early_stopping'
+COARSE_TO_FINE = 'coarse_to_fine'
+
+# The coarse-to-fine search first tries every COARSE_STEP_FACTOR-th topic count.
+COARSE_STEP_FACTOR = 3
 
 
 class TopicModeling:
     """Class for performing topic modeling and clustering on a dataset."""
 
-    def __init__(self, documents):
+    def __init__(self, documents, cache_dir=None, workers=None, dedupe_threshold=None):
         """
         Initialize the TopicModeling object with a set of documents.
 
         Args:
             documents (list): List of raw text documents to analyze.
+            cache_dir (str): Optional directory caching the tokenized documents, dictionary
+                and bag-of-words corpus under a hash of the documents, so later runs over
+                the same documents skip preprocessing.
+            workers (int): Number of processes preprocessing the documents. Defaults to
+                the number of CPUs.
+            dedupe_threshold (float): Optional MinHash similarity of the tokenized
+                documents above which near-duplicates are collapsed into the first such
+                document, so models are trained once per distinct document (see
+                dedup.NearDuplicateDetector). processed_docs and corpus then only hold
+                the kept documents; expand maps their results back to every document.
         """
         self.documents = documents
-        self.processed_docs = self._preprocess_documents()
-        self.dictionary = corpora.Dictionary(self.processed_docs)
-        self.corpus = [self.dictionary.doc2bow(doc) for doc in self.processed_docs]
-
-    def _preprocess_documents(self):
-        """Preprocess the documents by removing stopwords and tokenizing."""
-        nltk.download('punkt')
-        nltk.download('stopwords')
-        stop_words = set(stopwords.words('english'))
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.processed_docs, self.dictionary, self.corpus = self._prepare_corpus()
+        # Near-duplicate detector, and the row of processed_docs every document maps to
+        self.deduplicator = None
+        self.document_rows = None
+        if dedupe_threshold is not None:
+            self._deduplicate(dedupe_threshold)
+        self._init_models()
+
+    def _deduplicate(self, threshold):
+        """Collapse near-duplicate documents, keeping the first document of each group."""
+        self.deduplicator, self.document_rows = deduplicate(self.processed_docs, threshold)
+        kept = self.deduplicator.kept
+        self.processed_docs = [self.processed_docs[i] for i in kept]
+        self.corpus = [self.corpus[i] for i in kept]
+
+    @property
+    def unique_documents(self):
+        """The raw documents processed_docs and corpus were built from."""
+        if self.deduplicator is None:
+            return self.documents
+        return [self.documents[i] for i in self.deduplicator.kept]
+
+    def expand(self, values):
+        """
+        Map per-row results (cluster labels, topic rows, ...) back to every document.
+
+        Args:
+            values (array-like): One value (or row) per entry of the corpus.
+
+        Returns:
+            ndarray: One value per document; near-duplicates get the value of the
+            document they were collapsed into.
+        """
+        values = np.asarray(values)
+        return values if self.document_rows is None else values[self.document_rows]
 
-        def preprocess(text):
-            words = word_tokenize(text.lower())
-            return [word for word in words if word.isalpha() and word not in stop_words]
+    def _init_models(self):
+        """Reset the trained models and the state derived from them."""
+        # Model trained by perform_lda and updated by add_documents
+        self.lda_model = None
+        # Best model of the last cluster count sweep, with the TruncatedSVD of the scalable mode
+        self.cluster_model = None
+        self.cluster_svd = None
+        # Matrix of the last sweep and the labels found for every cluster count
+        self._cluster_labels = (None, {})
+        # Number of documents stored by the checkpoint at each path saved to or loaded from
+        self._checkpoints = {}
+        # TF-IDF matrix of the corpus, with the (documents, terms) shape it was built for
+        self._tfidf = (None, None)
 
-        return [preprocess(doc) for doc in self.documents]
+    @property
+    def tfidf_matrix(self):
+        """
+        Sparse TF-IDF matrix of the documents, built from the bag-of-words corpus.
+
+        Weighted like sklearn's TfidfVectorizer, with column i holding dictionary id i, so
+        the documents are not tokenized a second time. Rebuilt after add_documents.
+
+        Returns:
+            csr_matrix: Matrix of shape (documents, dictionary size).
+        """
+        shape = (len(self.corpus), len(self.dictionary))
+        built_for, matrix = self._tfidf
+        if built_for != shape:
+            matrix = tfidf_from_corpus(self.corpus, shape[1])
+            self._tfidf = (shape, matrix)
+        return matrix
+
+    @classmethod
+    def from_checkpoint(cls, path, workers=None):
+        """
+        Restore a TopicModeling object saved with save_checkpoint.
 
-    def find_best_num_topics(self, start=2, limit=10, step=1):
+        Args:
+            path (str): Checkpoint directory.
+            workers (int): Number of processes preprocessing added documents.
+
+        Returns:
+            TopicModeling: The object, with its documents, dictionary and LDA model. If the
+            saved object deduplicated its documents, the restored one deduplicates added
+            documents with the same settings.
+        """
+        topic_modeling = cls.__new__(cls)
+        topic_modeling.cache_dir = None
+        topic_modeling.workers = workers
+        topic_modeling.deduplicator = None
+        topic_modeling.document_rows = None
+        (topic_modeling.documents, topic_modeling.processed_docs, topic_modeling.dictionary, topic_modeling.corpus,
+         lda_model, dedupe) = load_checkpoint(path)
+        if dedupe is not None:
+            # The saved documents are the kept ones; their signatures are restored, not recomputed
+            settings, signatures = dedupe
+            topic_modeling.deduplicator = NearDuplicateDetector(**settings)
+            topic_modeling.deduplicator.add_kept(signatures)
+            topic_modeling.document_rows = kept_rows(topic_modeling.deduplicator)
+        topic_modeling._init_models()
+        topic_modeling.lda_model = lda_model
+        topic_modeling._checkpoints[os.path.abspath(path)] = len(topic_modeling.documents)
+        return topic_modeling
+
+    def save_checkpoint(self, path):
+        """
+        Save the documents, dictionary and LDA model to a checkpoint directory.
+
+        Saving again to the same path only writes the documents added since, together with
+        the dictionary and model, so a daily save does not rewrite the whole history. With
+        deduplication only the kept documents are saved.
+
+        Args:
+            path (str): Checkpoint directory.
+        """
+        path = os.path.abspath(path)
+        dedupe = signatures = None
+        if self.deduplicator is not None:
+            dedupe = self.deduplicator.settings
+            signatures = self.deduplicator.signatures(self.deduplicator.kept)
+        self._checkpoints[path] = save_checkpoint(path, self.unique_documents, self.processed_docs, self.dictionary,
+                                                  self.corpus, self.lda_model, self._checkpoints.get(path, 0), dedupe,
+                                                  signatures)
+
+    def add_documents(self, documents, min_count=MIN_NEW_TERM_COUNT, max_terms=None):
+        """
+        Add a batch of new documents, updating the LDA model online.
+
+        Only the new documents are preprocessed. Their words are added to the dictionary
+        without renumbering existing ones (see extend_dictionary), and a model trained by
+        perform_lda is updated with the bag-of-words of the new documents only. With
+        deduplication, new near-duplicates are collapsed and not added to the corpus.
+
+        Args:
+            documents (list): New raw documents.
+            min_count (int): New words occurring fewer times in the batch are pruned.
+            max_terms (int): Optional maximum size of the dictionary.
+
+        Returns:
+            list: Bag-of-words of the new documents added to the corpus.
+        """
+        documents = list(documents)
+        processed_docs = self._preprocess_documents(documents)
+        if self.deduplicator is not None:
+            # New near-duplicates of earlier (or batch) documents are only mapped to them
+            start = len(self.deduplicator)
+            representatives = self.deduplicator.add_many(processed_docs)
+            processed_docs = [doc for i, (doc, representative) in enumerate(zip(processed_docs, representatives))
+                              if representative == start + i]
+            self.document_rows = np.concatenate([self.document_rows, kept_rows(self.deduplicator, start)])
+        extend_dictionary(self.dictionary, processed_docs, min_count, max_terms)
+        corpus = [self.dictionary.doc2bow(doc) for doc in processed_docs]
+
+        self.documents = list(self.documents) + documents
+        self.processed_docs.extend(processed_docs)
+        self.corpus.extend(corpus)
+        if self.lda_model is not None:
+            self.update_lda(corpus)
+        return corpus
+
+    def infer_topics(self, documents=None):
+        """
+        Infer the topic distribution of documents with the trained LDA model.
+
+        New documents are preprocessed in parallel like the corpus, and inferred in
+        batches; they are not added to the corpus.
+
+        Args:
+            documents (list): Raw documents; defaults to the documents of the corpus,
+                which are then not preprocessed again (near-duplicates get the row of
+                the document they were collapsed into).
+
+        Returns:
+            ndarray: Dense matrix of shape (documents, topics) whose rows sum to 1.
+
+        Raises:
+            ValueError: If no model has been trained by perform_lda.
+        """
+        if self.lda_model is None:
+            raise ValueError("No LDA model, call perform_lda first")
+        if documents is None:
+            return self.expand(infer_topic_matrix(self.lda_model, self.corpus))
+        corpus = [self.dictionary.doc2bow(doc) for doc in self._preprocess_documents(list(documents))]
+        return infer_topic_matrix(self.lda_model, corpus)
+
+    def update_lda(self, corpus):
+        """
+        Update the LDA model online with new bag-of-words documents.
+
+        Args:
+            corpus (list): Bag-of-words of the new documents, with ids of self.dictionary.
+        """
+        extend_lda_vocabulary(self.lda_model, len(self.dictionary))
+        self.lda_model.update(corpus)
+
+    def _prepare_corpus(self):
+        """Load the preprocessed corpus from the cache, or build (and cache) it."""
+        key = None
+        if self.cache_dir is not None:
+            key = corpus_cache_key(self.documents)
+            cached = load_corpus_cache(self.cache_dir, key)
+            if cached is not None:
+                return cached
+
+        processed_docs = self._preprocess_documents()
+        dictionary = corpora.Dictionary(processed_docs)
+        corpus = [dictionary.doc2bow(doc) for doc in processed_docs]
+        if key is not None:
+            save_corpus_cache(self.cache_dir, key, processed_docs, dictionary, corpus)
+        return processed_docs, dictionary, corpus
+
+    def _preprocess_documents(self, documents=None):
+        """Preprocess the documents by removing stopwords and tokenizing, in parallel for large corpora."""
+        ensure_nltk_resources()
+        stop_words = set(stopwords.words('english'))
+        return preprocess_documents(self.documents if documents is None else documents, stop_words, self.workers)
+
+    def find_best_num_topics(self, start=2, limit=10, step=1, strategy=GRID, patience=2, workers=None,
+                             random_state=None, plot=True):
         """
         Find the best number of topics by computing coherence scores.
 
+        Candidate models are trained concurrently and scored with shared co-occurrence
+        statistics (see _topic_sweep). Use evaluate_num_topics to get the scores as data.
+
         Args:
             start (int): Starting number of topics.
             limit (int): Maximum number of topics to test.
             step (int): Step size between topic numbers.
+            strategy (str): GRID tries every topic count. EARLY_STOPPING tries them in
+                ascending order and stops once `patience` counts in a row did not improve
+                the best coherence. COARSE_TO_FINE tries every COARSE_STEP_FACTOR-th count,
+                then the counts around the best one.
+            patience (int): Patience of the EARLY_STOPPING strategy.
+            workers (int): Number of models trained at once. Defaults to the number of CPUs.
+            random_state (int): Seed of the LDA models, making the result reproducible.
+            plot (bool): Whether to plot the coherence scores. matplotlib is only imported
+                when plotting, so batch jobs can pass False to run headless.
 
         Returns:
             int: Best number of topics based on coherence score.
         """
-        model_list, coherence_values = self._compute_coherence_values(start, limit, step)
+        metrics = self.evaluate_num_topics(start, limit, step, strategy, patience, workers, random_state)
+        if plot:
+            self._plot_coherence_values(metrics['num_topics'], metrics['coherence'])
+
+        best_num_topics = metrics['best_num_topics']
+        print(f"The best number of topics based on coherence score is: {best_num_topics}")
+        return best_num_topics
+
+    def evaluate_num_topics(self, start=2, limit=10, step=1, strategy=GRID, patience=2, workers=None,
+                            random_state=None):
+        """
+        Score topic counts by coherence without plotting or printing.
+
+        Takes the arguments of find_best_num_topics.
+
+        Returns:
+            dict: 'strategy', the evaluated 'num_topics' in ascending order, their
+            'coherence' values and the 'best_num_topics'.
+        """
+        x, _, coherence_values = self._topic_sweep(start, limit, step, strategy, patience, workers, random_state)
+
+        # Find the number of topics with the highest coherence score
+        best_num_topics = x[coherence_values.index(max(coherence_values))]
+        return {
+            'strategy': strategy,
+            'num_topics': x,
+            'coherence': [float(value) for value in coherence_values],
+            'best_num_topics': best_num_topics,
+        }
+
+    def _plot_coherence_values(self, x, coherence_values):
+        """Plot coherence score vs number of topics."""
+        import matplotlib.pyplot as plt
 
-        # Plot coherence score vs number of topics
-        x = range(start, limit, step)
         plt.plot(x, coherence_values)
         plt.xlabel("Number of Topics")
         plt.ylabel("Coherence Score")
         plt.title("Coherence Score vs Number of Topics")
         plt.show()
 
-        # Find the number of topics with the highest coherence score
-        best_num_topics = x[coherence_values.index(max(coherence_values))]
-        print(f"The best number of topics based on coherence score is: {best_num_topics}")
-        return best_num_topics
-
-    def _compute_coherence_values(self, start, limit, step):
+    def _compute_coherence_values(self, start, limit, step, workers=None, random_state=None):
         """Compute coherence values for different numbers of topics."""
-        coherence_values = []
-        model_list = []
+        _, model_list, coherence_values = self._topic_sweep(start, limit, step, GRID, workers=workers,
+                                                            random_state=random_state)
+        return model_list, coherence_values
 
-        for num_topics in range(start, limit, step):
-            model = LdaModel(corpus=self.corpus, id2word=self.dictionary, num_topics=num_topics, passes=15)
-            model_list.append(model)
-            coherence_model = CoherenceModel(model=model, texts=self.processed_docs, dictionary=self.dictionary,
-                                             coherence='c_v')
-            coherence_values.append(coherence_model.get_coherence())
+    def _topic_sweep(self, start, limit, step, strategy=GRID, patience=2, workers=None, random_state=None):
+        """
+        Train and score LDA models for the topic counts a search strategy picks.
 
-        return model_list, coherence_values
+        Each round of candidates is trained over a process pool and scored by one
+        CoherenceEstimator, which scans the documents once per round at most instead of
+        once per model. Early stopping decides in ascending topic order and discards
+        models trained past the stopping point, so the result does not depend on `workers`.
+
+        Returns:
+            tuple: The evaluated topic counts in ascending order, their models and their
+            coherence values.
+        """
+        if strategy not in (GRID, EARLY_STOPPING, COARSE_TO_FINE):
+            raise ValueError(f"Unknown strategy {strategy!r}, expected one of {[GRID, EARLY_STOPPING, COARSE_TO_FINE]}")
+        candidates = list(range(start, limit, step))
+        estimator = CoherenceEstimator(self.processed_docs, self.dictionary)
+        results = {}
+
+        with LdaTrainer(self.corpus, self.dictionary, workers, random_state=random_state) as trainer:
+            def evaluate(nums_topics):
+                pending = [num_topics for num_topics in nums_topics if num_topics not in results]
+                models = trainer.train(pending)
+                for num_topics, model, coherence in zip(pending, models, estimator.score(models)):
+                    results[num_topics] = (model, coherence)
+
+            if strategy == GRID:
+                evaluate(candidates)
+            elif strategy == COARSE_TO_FINE:
+                evaluate(candidates[::COARSE_STEP_FACTOR])
+                best = max(results, key=lambda num_topics: results[num_topics][1])
+                evaluate([num_topics for num_topics in candidates
+                          if abs(num_topics - best) < step * COARSE_STEP_FACTOR])
+            else:
+                best_coherence, waited = None, 0
+                for position in range(0, len(candidates), trainer.workers):
+                    batch = candidates[position:position + trainer.workers]
+                    evaluate(batch)
+                    for index, num_topics in enumerate(batch):
+                        coherence = results[num_topics][1]
+                        if best_coherence is None or coherence > best_coherence:
+                            best_coherence, waited = coherence, 0
+                        else:
+                            waited += 1
+                        if waited >= patience:
+                            for skipped in batch[index + 1:]:
+                                del results[skipped]
+                            break
+                    if waited >= patience:
+                        break
 
-    def perform_lda(self, num_topics):
+        nums_topics = sorted(results)
+        return (nums_topics, [results[num_topics][0] for num_topics in nums_topics],
+                [results[num_topics][1] for num_topics in nums_topics])
+
+    def perform_lda(self, num_topics, random_state=None):
         """
         Perform Latent Dirichlet Allocation (LDA) with the given number of topics.
 
         Args:
             num_topics (int): Number of topics to use in the LDA model.
+            random_state (int): Seed making the model reproducible.
 
         Returns:
-            LdaModel: Trained LDA model.
+            LdaModel: Trained LDA model, also kept as self.lda_model for online updates.
         """
-        lda_model = LdaModel(corpus=self.corpus, num_topics=num_topics, id2word=self.dictionary, passes=15)
+        lda_model = train_lda(self.corpus, self.dictionary, num_topics, random_state=random_state)
+        self.lda_model = lda_model
         return lda_model
 
-    def find_best_num_clusters(self, X, max_clusters=10):
+    def find_best_num_clusters(self, X, max_clusters=10, plot=True, scalable=False, n_components=SVD_COMPONENTS,
+                               sample_size=SILHOUETTE_SAMPLE_SIZE, batch_size=MINIBATCH_SIZE, random_state=42):
         """
         Find the best number of clusters using the Elbow method and Silhouette Score.
 
         Args:
             X (sparse matrix): Document-term matrix (TF-IDF or similar).
             max_clusters (int): Maximum number of clusters to test.
+            plot (bool): Whether to plot the WCSS and silhouette scores. matplotlib is only
+                imported when plotting.
+            scalable (bool): Cluster large corpora with MiniBatchKMeans on a TruncatedSVD
+                projection and sampled silhouette scores (see evaluate_num_clusters).
+            n_components (int): Number of SVD dimensions of the scalable mode.
+            sample_size (int): Number of documents silhouette scores are estimated on in the
+                scalable mode.
+            batch_size (int): Mini-batch size of the scalable mode.
+            random_state (int): Seed of the clustering.
+
         Returns:
-                    int: Best number of clusters based on silhouette score.
-                """
+            int: Best number of clusters based on silhouette score.
+        """
+        metrics = self.evaluate_num_clusters(X, max_clusters, scalable, n_components, sample_size, batch_size,
+                                             random_state)
+        if plot:
+            # Plot Elbow Method results and Silhouette Scores
+            self._plot_clustering_results(metrics['num_clusters'], metrics['wcss'], metrics['silhouette'])
+
+        best_num_clusters = metrics['best_num_clusters']
+        print(f"The best number of clusters based on silhouette score is: {best_num_clusters}")
+        return best_num_clusters
+
+    def evaluate_num_clusters(self, X, max_clusters=10, scalable=False, n_components=SVD_COMPONENTS,
+                              sample_size=SILHOUETTE_SAMPLE_SIZE, batch_size=MINIBATCH_SIZE, random_state=42):
+        """
+        Score cluster counts by WCSS and silhouette without plotting or printing.
+
+        The exact mode fits KMeans on X and computes exact silhouette scores, which take
+        memory and time quadratic in the number of documents. The scalable mode projects X
+        once with TruncatedSVD, fits MiniBatchKMeans for every count warm-started by splitting
+        a cluster of the previous count, and estimates silhouette scores on `sample_size`
+        documents; its WCSS is measured in the projected space.
+
+        The labels of every count and the best model are kept, so cluster_documents with
+        the same X does not refit them.
+
+        Takes the arguments of find_best_num_clusters.
+
+        Returns:
+            dict: The tested 'num_clusters', their 'wcss' and 'silhouette' scores and the
+            'best_num_clusters'.
+        """
         wcss = []  # Within-cluster sum of squares for each k
         silhouette_scores = []  # Silhouette scores for each k
         range_clusters = range(2, max_clusters + 1)
+        models = {}
+
+        svd = None
+        if scalable:
+            svd, data = reduce_dimensions(X, n_components, random_state)
+            rng = np.random.default_rng(random_state)
+            sample = data[rng.choice(len(data), min(sample_size, len(data)), replace=False)]
+            silhouette_sample = sample_size if sample_size < len(data) else None
+        else:
+            data = X
 
         for k in range_clusters:
-            kmeans = KMeans(n_clusters=k, random_state=42)
-            kmeans.fit(X)
+            if not scalable:
+                kmeans = KMeans(n_clusters=k, random_state=random_state)
+            elif k == range_clusters[0]:
+                kmeans = MiniBatchKMeans(n_clusters=k, batch_size=batch_size, n_init=3, random_state=random_state)
+            else:
+                # Warm start from the centers found for k - 1 clusters
+                kmeans = MiniBatchKMeans(n_clusters=k, init=split_center(sample, models[k - 1].cluster_centers_),
+                                         n_init=1, batch_size=batch_size, random_state=random_state)
+            kmeans.fit(data)
+            models[k] = kmeans
             wcss.append(kmeans.inertia_)  # Sum of squared distances
-            silhouette_avg = silhouette_score(X, kmeans.labels_)
+            if scalable:
+                silhouette_avg = silhouette_score(data, kmeans.labels_, sample_size=silhouette_sample,
+                                                  random_state=random_state)
+            else:
+                silhouette_avg = silhouette_score(X, kmeans.labels_)
             silhouette_scores.append(silhouette_avg)
 
-        # Plot Elbow Method results and Silhouette Scores
-        self._plot_clustering_results(range_clusters, wcss, silhouette_scores)
-
         # Determine best number of clusters
         best_num_clusters = range_clusters[np.argmax(silhouette_scores)]
-        print(f"The best number of clusters based on silhouette score is: {best_num_clusters}")
-        return best_num_clusters
+        self.cluster_model = models[best_num_clusters]
+        self.cluster_svd = svd
+        self._cluster_labels = (X, {k: model.labels_ for k, model in models.items()})
+        return {
+            'num_clusters': list(range_clusters),
+            'wcss': [float(value) for value in wcss],
+            'silhouette': [float(value) for value in silhouette_scores],
+            'best_num_clusters': int(best_num_clusters),
+        }
 
     def _plot_clustering_results(self, range_clusters, wcss, silhouette_scores):
         """Plot the Elbow Method results and Silhouette Scores."""
+        import matplotlib.pyplot as plt
+
         plt.figure(figsize=(12, 6))
 
         # Elbow Method plot
@@ -146,6 +522,9 @@ class TopicModeling:
         """
         Perform KMeans clustering on the documents.
 
+        If the last find_best_num_clusters or evaluate_num_clusters call already clustered
+        the same X into num_clusters clusters, its labels are returned without refitting.
+
         Args:
             num_clusters (int): Number of clusters to use in KMeans.
             X (sparse matrix): Document-term matrix (TF-IDF or similar).
@@ -153,6 +532,13 @@ class TopicModeling:
         Returns:
             list: Cluster labels for each document.
         """
-        kmeans = KMeans(n_clusters=num_clusters, random_state=42)
-        kmeans.fit(X)
+        swept_X, labels = self._cluster_labels
+        if swept_X is X and num_clusters in labels:
+            cache_access('modeling.cluster_labels', hits=1)
+            return labels[num_clusters]
+        cache_access('modeling.cluster_labels', misses=1)
+
+        with stage('modeling.kmeans', X.shape[0]):
+            kmeans = KMeans(n_clusters=num_clusters, random_state=42)
+            kmeans.fit(X)
         return kmeans.labels_
\ No newline at end of file
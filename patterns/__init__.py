@@ -0,0 +1,3 @@
+from .registry import PatternEntry, register, unregister, get_pattern, pattern_names, pattern_versions
+from .backend import available_backends, get_backend, set_backend
+from . import builtin
\ No newline at end of file
@@ -0,0 +1,204 @@
+import os
+import re
+
+# Environment variable choosing the regex backend at import time: 're', 're2' or 'auto'.
+BACKEND_ENV = 'TEXTFUSION_REGEX_BACKEND'
+
+# Inputs at least this long are matched with the linear-time backend. Shorter ones stay on
+# re: its per-call overhead is much lower and backtracking on short input is bounded.
+LINEAR_MIN_LENGTH = 1024
+
+# re flags a linear-time backend receives as inline flags; patterns with other flags stay on re.
+_INLINE_FLAGS = {re.IGNORECASE: 'i', re.MULTILINE: 'm', re.DOTALL: 's'}
+
+# Unicode classes of re's \d, \w and \s for str patterns, as RE2 class contents.
+_UNICODE_CLASSES = {
+    'd': r'\p{Nd}',
+    'w': r'\p{L}\p{N}_',
+    's': r'\t-\r\x{1c}-\x{20}\x{85}\x{a0}\x{1680}\x{2000}-\x{200a}\x{2028}\x{2029}\x{202f}\x{205f}\x{3000}',
+}
+
+
+def translate_unicode_classes(pattern, multiline=False):
+    """
+    Rewrite a str pattern for RE2 so that it matches exactly what re matches.
+
+    RE2's \\d, \\w and \\s only match ASCII, while re's match Unicode digits, word
+    characters and spaces in str patterns; RE2's $ never matches before a final newline.
+
+    :param pattern: The regular expression.
+    :param multiline: Whether the pattern is compiled with re.MULTILINE.
+    :return: The equivalent RE2 pattern.
+    :raises ValueError: If a construct cannot be expressed for RE2 (\\b, \\B, $ without
+                        re.MULTILINE, or a negated class inside a set).
+    """
+    translated = []
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\' and i + 1 < len(pattern):
+            escape = pattern[i + 1]
+            i += 2
+            if escape in _UNICODE_CLASSES:
+                contents = _UNICODE_CLASSES[escape]
+                translated.append(contents if in_class else f'[{contents}]')
+            elif escape in ('D', 'W', 'S'):
+                if in_class:
+                    raise ValueError(f'\\{escape} inside a set has no RE2 equivalent')
+                translated.append(f'[^{_UNICODE_CLASSES[escape.lower()]}]')
+            elif escape in ('b', 'B') and not in_class:
+                raise ValueError(f'\\{escape} has no Unicode RE2 equivalent')
+            elif escape == 'Z':
+                translated.append(r'\z')
+            else:
+                translated.append(char + escape)
+            continue
+
+        if in_class:
+            if char == ']':
+                in_class = False
+        elif char == '[':
+            in_class = True
+            translated.append(char)
+            i += 1
+            # A ']' right after '[' or '[^' is a literal
+            for literal in ('^', ']'):
+                if pattern.startswith(literal, i):
+                    translated.append(literal)
+                    i += 1
+            continue
+        elif char == '$' and not multiline:
+            raise ValueError('$ also matches before a final newline in re')
+        translated.append(char)
+        i += 1
+    return ''.join(translated)
+
+
+def _load_re2():
+    """Return the compile function of google-re2 (the `re2` module)."""
+    import re2
+
+    text_options = re2.Options()
+    text_options.log_errors = False
+    bytes_options = re2.Options()
+    bytes_options.log_errors = False
+    # Match bytes one by one, like re does, instead of decoding them as UTF-8
+    bytes_options.encoding = re2.Options.Encoding.LATIN1
+
+    def compile_re2(pattern, flags):
+        inline = ''.join(letter for flag, letter in _INLINE_FLAGS.items() if flags & flag)
+        if flags & ~(re.IGNORECASE | re.MULTILINE | re.DOTALL | re.ASCII | re.UNICODE):
+            raise ValueError('Unsupported re flags')
+        if isinstance(pattern, bytes):
+            prefix = f'(?{inline})'.encode('ascii') if inline else b''
+            if b'$' in pattern and not flags & re.MULTILINE:
+                raise ValueError('$ also matches before a final newline in re')
+            options = bytes_options
+        else:
+            if not flags & re.ASCII:
+                pattern = translate_unicode_classes(pattern, bool(flags & re.MULTILINE))
+            elif '$' in pattern and not flags & re.MULTILINE:
+                raise ValueError('$ also matches before a final newline in re')
+            prefix = f'(?{inline})' if inline else ''
+            options = text_options
+        try:
+            return re2.compile(prefix + pattern, options)
+        except re2.error as error:
+            raise ValueError(str(error)) from None
+
+    return compile_re2
+
+
+# Loaders of the linear-time backends, tried in this order by 'auto'.
+_LOADERS = {'re2': _load_re2}
+
+_compilers = {'re': re.compile}
+_backend = 're'
+_generation = 0
+
+
+def _compiler(name):
+    """Load a backend once and return its compile function."""
+    if name not in _compilers:
+        _compilers[name] = _LOADERS[name]()
+    return _compilers[name]
+
+
+def available_backends():
+    """
+    :return: Names of the regex backends that can be used here, 're' first.
+    """
+    names = ['re']
+    for name in _LOADERS:
+        try:
+            _compiler(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def set_backend(name):
+    """
+    Choose the engine the registry's patterns are matched with on long input.
+
+    Patterns are recompiled on their next use. Patterns the backend cannot express
+    exactly (backreferences, lookarounds, \\b, ...) keep using re.
+
+    :param name: 're', 're2', or 'auto' for the first installed linear-time backend
+                 (re if none is installed).
+    :return: The name of the backend now in use.
+    :raises ValueError: If the name is unknown.
+    :raises ImportError: If the requested backend is not installed.
+    """
+    global _backend, _generation
+    if name == 'auto':
+        name = next((backend for backend in available_backends() if backend != 're'), 're')
+    elif name != 're':
+        if name not in _LOADERS:
+            raise ValueError(f"Unknown regex backend {name!r}, expected one of {['re', 'auto', *_LOADERS]}")
+        _compiler(name)
+    _backend = name
+    _generation += 1
+    return name
+
+
+def get_backend():
+    """
+    :return: The name of the backend in use.
+    """
+    return _backend
+
+
+def backend_generation():
+    """
+    :return: A number changing whenever the backend changes, so compiled patterns can
+             be invalidated.
+    """
+    return _generation
+
+
+def compile_pattern(pattern, flags=0, backend=None):
+    """
+    Compile a pattern with a backend, falling back to re if the backend cannot express it.
+
+    :param pattern: The regular expression (str or bytes).
+    :param flags: re flags.
+    :param backend: Name of the backend; defaults to the one in use.
+    :return: A (compiled pattern, backend name) pair. The compiled pattern offers re's
+             match, fullmatch, search, findall and finditer.
+    """
+    backend = backend or _backend
+    if backend != 're':
+        try:
+            return _compiler(backend)(pattern, flags), backend
+        except ValueError:
+            pass
+    return re.compile(pattern, flags), 're'
+
+
+try:
+    set_backend(os.environ.get(BACKEND_ENV, 'auto'))
+except (ImportError, ValueError):
+    set_backend('re')
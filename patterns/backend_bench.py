@@ -0,0 +1,203 @@
+import argparse
+import json
+import math
+import random
+import sys
+import time
+
+from patterns import get_pattern, pattern_names
+from patterns.backend import available_backends, compile_pattern
+
+# Inputs making backtracking engines retry every start position: long runs of characters
+# a pattern accepts, never followed by what it needs to finish a match. Keyed by name,
+# each builds a string of the requested length.
+ADVERSARIAL_INPUTS = {
+    'word': lambda n: 'a' * n,
+    'dots': lambda n: ('a.' * n)[:n],
+    'dashes': lambda n: '-' * (n - 1) + '.',
+    'digits': lambda n: '1' * n,
+    'email_chain': lambda n: 'a' * (n // 2) + '@' + ('b.' * n)[:n - n // 2 - 1],
+    'at_signs': lambda n: ('a@' * n)[:n],
+    'url_chain': lambda n: 'http://' + ('a.' * n)[:n - 8] + '!',
+    'hex_colons': lambda n: ('0:' * n)[:n],
+}
+
+# Default input lengths, in characters.
+DEFAULT_SIZES = [1000, 2000, 4000, 8000]
+
+# A pattern stops growing its input once one measurement takes longer than this (seconds).
+DEFAULT_BUDGET = 2.0
+
+# Highest growth exponent (time ~ length ** exponent) accepted from a linear-time backend.
+MAX_LINEAR_EXPONENT = 1.5
+
+# Fragments random fuzz inputs are built from: pieces of every built-in pattern,
+# separators and non-ASCII digits, letters and spaces.
+FUZZ_TOKENS = [
+    'a', 'Z', 'é', 'ß', '0', '1', '7', '9', '٣', '.', '-', '_', '%', '+', '@', ':', '/', '(', ')', ' ',
+    '\n', '\t', ' ', ' ', 'http://', 'https://', 'www.', 'com', 'org', 'io', 'example', '+1 ',
+    '555', '1234', '31-12-2020', '02/29/2000', 'GB82 WEST 1234 5698 7654 32', '4111 1111 1111 1111',
+    '192.168.0.1', '::1', 'fe80::', '123e4567-e89b-12d3-a456-426614174000', 'ABCD',
+]
+
+
+def _measure(regex, text, repeat):
+    """Best time of `repeat` scans (findall) plus whole-string matches of a text."""
+    best = math.inf
+    for _ in range(repeat):
+        started = time.perf_counter()
+        regex.findall(text)
+        regex.fullmatch(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def growth_exponent(sizes, seconds):
+    """
+    Estimate how latency grows with the input length, from the first and last measurement.
+
+    :param sizes: Input lengths.
+    :param seconds: Latency per length; None where the size was skipped.
+    :return: The exponent k of seconds ~ size ** k (about 1 for linear, 2 for quadratic
+             behaviour), or None with fewer than two measurements.
+    """
+    measured = [(size, value) for size, value in zip(sizes, seconds) if value is not None]
+    if len(measured) < 2:
+        return None
+    (first_size, first), (last_size, last) = measured[0], measured[-1]
+    return math.log(max(last, 1e-9) / max(first, 1e-9)) / math.log(last_size / first_size)
+
+
+def worst_case_latency(name, backend, sizes=DEFAULT_SIZES, budget=DEFAULT_BUDGET, repeat=3):
+    """
+    Measure the worst latency of a registered pattern over the adversarial inputs.
+
+    :param name: Name of the registered pattern.
+    :param backend: Name of the regex backend.
+    :param sizes: Input lengths to measure, in ascending order.
+    :param budget: Larger sizes are skipped once a measurement exceeds this many seconds.
+    :param repeat: Number of runs per input; the fastest one is kept.
+    :return: Dict with the pattern, the requested backend, the backend the pattern was
+             compiled with, the worst seconds per size and the growth exponent.
+    """
+    entry = get_pattern(name)
+    regex, compiled_with = compile_pattern(entry.pattern, entry.flags, backend)
+    seconds = []
+    for size in sizes:
+        if seconds and (seconds[-1] is None or seconds[-1] > budget):
+            seconds.append(None)
+            continue
+        seconds.append(max(_measure(regex, build(size), repeat) for build in ADVERSARIAL_INPUTS.values()))
+    return {
+        'pattern': name,
+        'backend': backend,
+        'compiled_with': compiled_with,
+        'seconds': seconds,
+        'exponent': growth_exponent(sizes, seconds),
+    }
+
+
+def _describe(match):
+    return None if match is None else (match.span(), match.groups())
+
+
+def fuzz_equivalence(name, backend, cases=2000, seed=0):
+    """
+    Compare a backend with re on random text made of FUZZ_TOKENS.
+
+    Checks findall and fullmatch on str input, and finditer with random pos/endpos on
+    the UTF-8 bytes, as extract_stream scans them.
+
+    :param name: Name of the registered pattern.
+    :param backend: Name of the backend to compare with re.
+    :param cases: Number of random texts.
+    :param seed: Seed of the random generator.
+    :return: List of (operation, text) pairs the backends disagree on.
+    """
+    entry = get_pattern(name)
+    text_regex, _ = compile_pattern(entry.pattern, entry.flags, 're')
+    text_other, _ = compile_pattern(entry.pattern, entry.flags, backend)
+    bytes_regex, _ = compile_pattern(entry.pattern.encode('ascii'), entry.flags, 're')
+    bytes_other, _ = compile_pattern(entry.pattern.encode('ascii'), entry.flags, backend)
+
+    rng = random.Random(seed)
+    mismatches = []
+    for _ in range(cases):
+        text = ''.join(rng.choices(FUZZ_TOKENS, k=rng.randint(0, 12)))
+        if text_regex.findall(text) != text_other.findall(text):
+            mismatches.append(('findall', text))
+        if _describe(text_regex.fullmatch(text)) != _describe(text_other.fullmatch(text)):
+            mismatches.append(('fullmatch', text))
+
+        data = text.encode('utf-8')
+        pos = rng.randint(0, len(data))
+        endpos = rng.randint(pos, len(data))
+        if ([_describe(match) for match in bytes_regex.finditer(data, pos, endpos)]
+                != [_describe(match) for match in bytes_other.finditer(data, pos, endpos)]):
+            mismatches.append(('finditer bytes', text))
+    return mismatches
+
+
+def run_benchmark(names=None, backends=None, sizes=DEFAULT_SIZES, budget=DEFAULT_BUDGET, fuzz_cases=2000, seed=0):
+    """
+    Run the latency benchmark and the equivalence fuzzer.
+
+    :param names: Registered patterns to test; defaults to all of them.
+    :param backends: Backends to test; defaults to every installed one.
+    :param sizes: Adversarial input lengths.
+    :param budget: Per-measurement time budget in seconds (see worst_case_latency).
+    :param fuzz_cases: Random texts per pattern and linear-time backend.
+    :param seed: Seed of the fuzzer.
+    :return: Report dict with 'sizes', 'latency' (see worst_case_latency), 'mismatches'
+             and 'passed', which is False if a linear-time backend grew faster than
+             MAX_LINEAR_EXPONENT or disagreed with re.
+    """
+    names = names or pattern_names()
+    backends = backends or available_backends()
+    latency = [worst_case_latency(name, backend, sizes, budget) for name in names for backend in backends]
+    mismatches = [{'pattern': name, 'backend': backend, 'operation': operation, 'text': text}
+                  for name in names for backend in backends if backend != 're'
+                  for operation, text in fuzz_equivalence(name, backend, fuzz_cases, seed)]
+
+    unbounded = [row for row in latency if row['compiled_with'] != 're' and row['exponent'] is not None
+                 and row['exponent'] > MAX_LINEAR_EXPONENT]
+    return {
+        'sizes': list(sizes),
+        'latency': latency,
+        'mismatches': mismatches,
+        'passed': not unbounded and not mismatches,
+    }
+
+
+def main(argv=None):
+    """Command line entry point: python -m patterns.backend_bench."""
+    parser = argparse.ArgumentParser(description="Compare worst-case latency and results of the regex backends.")
+    parser.add_argument('--patterns', nargs='+', help="Registered patterns to test (defaults to all).")
+    parser.add_argument('--backends', nargs='+', help="Backends to test (defaults to all installed).")
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES)
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET)
+    parser.add_argument('--fuzz-cases', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON.")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.patterns, args.backends, args.sizes, args.budget, args.fuzz_cases, args.seed)
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print(f"{'pattern':<15}{'backend':<13}" + ''.join(f"{size:>10}" for size in report['sizes']) + "  growth")
+        for row in report['latency']:
+            backend = row['backend'] if row['compiled_with'] == row['backend'] else f"{row['backend']}->re"
+            cells = ''.join(f"{seconds * 1000:>8.1f}ms" if seconds is not None else f"{'skipped':>10}"
+                            for seconds in row['seconds'])
+            exponent = f"n^{row['exponent']:.2f}" if row['exponent'] is not None else '-'
+            print(f"{row['pattern']:<15}{backend:<13}{cells}  {exponent}")
+        for mismatch in report['mismatches']:
+            print(f"Mismatch {mismatch['pattern']} ({mismatch['backend']}, {mismatch['operation']}): "
+                  f"{mismatch['text']!r}")
+        print("Passed" if report['passed'] else "Failed")
+    return 0 if report['passed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+from patterns.registry import register
+from patterns import validators
+
+register(
+    'email',
+    r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}',
+    description="Email address",
+)
+
+register(
+    'url',
+    r'(https?:\/\/)?'                   # Optional protocol (http or https)
+    r'(([a-zA-Z0-9_-]+\.)+[a-zA-Z]{2,})' # Domain name
+    r'(:\d+)?'                          # Optional port number
+    r'(\/[^\s]*)?',                     # Optional path
+    description="URL with any top-level domain, validated by RegexChecker",
+)
+
+# Groups: protocol, 'www.', name, top-level domain, path; RegexExtractor classifies URLs by the TLD group.
+register(
+    'url_known_tld',
+    r'(https?:\/\/)?(www\.)?([a-zA-Z0-9._-]+)\.(com|org|net|info|biz|co|io|me|tech|store|design|online|blog|'
+    r'website|site|app|tv|dev|us|xyz)(\/[^\s]*)?',
+    description="URL with a well-known top-level domain, extracted by RegexExtractor",
+)
+
+register(
+    'phone',
+    r'(\+1\s?)?'                        # Optional country code (+1)
+    r'(\(?\d{3}\)?[-.\s]?)'             # Area code (with or without parentheses)
+    r'(\d{3})[-.\s]?(\d{4})',           # The rest of the phone number (7 digits)
+    description="USA phone number",
+)
+
+register(
+    'date',
+    r'(?:0[1-9]|[12][0-9]|3[01])[-/](?:0[1-9]|1[0-2])[-/](?:19|20)\d{2}|'  # DD-MM-YYYY
+    r'(?:0[1-9]|1[0-2])[-/](?:0[1-9]|[12][0-9]|3[01])[-/](?:19|20)\d{2}',  # MM-DD-YYYY
+    validator=validators.is_valid_date_string,
+    batch_validator=validators.valid_dates_many,
+    arrow_validator=validators.arrow_valid_dates,
+    description="Date in DD-MM-YYYY or MM-DD-YYYY format, validated against the calendar",
+)
+
+register(
+    'iban',
+    r'[A-Z]{2}[0-9]{2}(?: ?[A-Z0-9]){11,30}',
+    validator=validators.iban_valid,
+    description="International Bank Account Number with a mod-97 checksum",
+)
+
+register(
+    'ipv4',
+    r'(?:25[0-5]|2[0-4][0-9]|1[0-9]{2}|[1-9]?[0-9])(?:\.(?:25[0-5]|2[0-4][0-9]|1[0-9]{2}|[1-9]?[0-9])){3}',
+    description="IPv4 address in dotted decimal notation",
+)
+
+register(
+    'ipv6',
+    r'(?:[0-9A-Fa-f]{0,4}:){2,7}(?:[0-9A-Fa-f]{1,4}|[0-9]{1,3}(?:\.[0-9]{1,3}){3})?',
+    validator=validators.is_ipv6_address,
+    description="IPv6 address, including compressed and IPv4-embedded forms",
+)
+
+register(
+    'uuid',
+    r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}',
+    description="UUID in its canonical 8-4-4-4-12 form",
+)
+
+register(
+    'credit_card',
+    r'[0-9](?:[ -]?[0-9]){12,18}',
+    validator=validators.luhn_valid,
+    description="Payment card number of 13 to 19 digits with a Luhn checksum",
+)
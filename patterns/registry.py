@@ -0,0 +1,206 @@
+import re
+import threading
+
+from patterns.backend import LINEAR_MIN_LENGTH, backend_generation, compile_pattern
+
+_registry = {}
+_lock = threading.Lock()
+
+
+class PatternEntry:
+    """
+    A named, versioned regular expression shared by every checker and extractor.
+
+    The pattern is compiled on first use and the compiled form is kept on the entry,
+    so it is compiled at most once per process however many objects use it. Input of
+    LINEAR_MIN_LENGTH characters or more is matched with the linear-time backend in use
+    (see patterns.backend), so adversarial text cannot make matching blow up.
+    """
+
+    def __init__(self, name, pattern, version=1, flags=0, validator=None, batch_validator=None,
+                 arrow_validator=None, description=''):
+        """
+        :param name: Name the pattern is looked up by, e.g. 'email'.
+        :param pattern: The regular expression, without ^/$ anchors.
+        :param version: Version number; the highest registered version is the default.
+        :param flags: re flags to compile the pattern with.
+        :param validator: Optional function of a string matching the whole pattern,
+                          returning whether it is really valid (e.g. a checksum).
+        :param batch_validator: Optional function (entry, values) returning a boolean
+                                NumPy array, used by batch validation instead of the
+                                pattern and the validator.
+        :param arrow_validator: Optional function (entry, column) validating a pyarrow
+                                ChunkedArray of strings into a boolean NumPy array.
+        :param description: Human readable description.
+        """
+        self.name = name
+        self.pattern = pattern
+        self.version = version
+        self.flags = flags
+        self.validator = validator
+        self.batch_validator = batch_validator
+        self.arrow_validator = arrow_validator
+        self.description = description
+        self._regex = None
+        self._bytes_regex = None
+        self._linear = {}
+
+    @property
+    def regex(self):
+        """The compiled pattern."""
+        if self._regex is None:
+            with _lock:
+                if self._regex is None:
+                    self._regex = re.compile(self.pattern, self.flags)
+        return self._regex
+
+    @property
+    def bytes_regex(self):
+        """The pattern compiled for bytes (and memory-mapped) input."""
+        if self._bytes_regex is None:
+            with _lock:
+                if self._bytes_regex is None:
+                    self._bytes_regex = re.compile(self.pattern.encode('ascii'), self.flags)
+        return self._bytes_regex
+
+    def _linear_compiled(self, binary):
+        """The (compiled pattern, backend name) of the backend in use, recompiled when it changes."""
+        generation = backend_generation()
+        cached = self._linear.get(binary)
+        if cached is None or cached[0] != generation:
+            with _lock:
+                cached = self._linear.get(binary)
+                if cached is None or cached[0] != generation:
+                    pattern = self.pattern.encode('ascii') if binary else self.pattern
+                    cached = self._linear[binary] = (generation, *compile_pattern(pattern, self.flags))
+        return cached[1:]
+
+    @property
+    def linear_regex(self):
+        """
+        The pattern compiled with the linear-time backend in use (re if there is none, or if
+        the backend cannot express the pattern).
+        """
+        return self._linear_compiled(False)[0]
+
+    @property
+    def linear_bytes_regex(self):
+        """The linear_regex counterpart for bytes (and memory-mapped) input."""
+        return self._linear_compiled(True)[0]
+
+    @property
+    def backend(self):
+        """Name of the backend linear_regex uses."""
+        return self._linear_compiled(False)[1]
+
+    def regex_for(self, text):
+        """
+        Pick the compiled pattern to scan a text with.
+
+        :param text: The str to match.
+        :return: linear_regex for texts of LINEAR_MIN_LENGTH characters or more, else regex.
+        """
+        return self.linear_regex if len(text) >= LINEAR_MIN_LENGTH else self.regex
+
+    def fullmatch(self, value: str):
+        """
+        Match a whole string against the pattern, without the validator.
+
+        :param value: The string to match.
+        :return: The match object, or None.
+        """
+        return self.regex_for(value).fullmatch(value)
+
+    def is_valid(self, value: str) -> bool:
+        """
+        Check if a whole string matches the pattern and passes the validator.
+
+        :param value: The string to validate.
+        :return: True if valid, False otherwise.
+        """
+        if self.regex_for(value).fullmatch(value) is None:
+            return False
+        return self.validator is None or self.validator(value)
+
+    def __repr__(self):
+        return f'PatternEntry({self.name!r}, version={self.version})'
+
+
+def register(name, pattern, version=1, flags=0, validator=None, batch_validator=None, arrow_validator=None,
+             description='', replace=False):
+    """
+    Add a pattern to the shared registry.
+
+    :param name: Name of the pattern.
+    :param pattern: The regular expression, without ^/$ anchors.
+    :param version: Version number of this pattern.
+    :param flags: re flags to compile the pattern with.
+    :param validator: Optional extra check of matching strings (see PatternEntry).
+    :param batch_validator: Optional vectorized check (see PatternEntry).
+    :param arrow_validator: Optional check of Arrow columns (see PatternEntry).
+    :param description: Human readable description.
+    :param replace: Allow replacing an already registered version.
+    :return: The new PatternEntry.
+    """
+    entry = PatternEntry(name, pattern, version, flags, validator, batch_validator, arrow_validator, description)
+    with _lock:
+        versions = _registry.setdefault(name, {})
+        if version in versions and not replace:
+            raise ValueError(f"Pattern {name!r} version {version} is already registered")
+        versions[version] = entry
+    return entry
+
+
+def unregister(name, version=None):
+    """
+    Remove a pattern from the shared registry.
+
+    :param name: Name of the pattern.
+    :param version: Version to remove; defaults to every registered version.
+    :raises KeyError: If no such pattern (or version) is registered.
+    """
+    with _lock:
+        versions = _registry.get(name)
+        if not versions:
+            raise KeyError(f"Unknown pattern {name!r}")
+        if version is not None and version not in versions:
+            raise KeyError(f"Unknown version {version} of pattern {name!r}")
+        if version is not None:
+            del versions[version]
+        if version is None or not versions:
+            del _registry[name]
+
+
+def get_pattern(name, version=None):
+    """
+    Look up a registered pattern.
+
+    :param name: Name of the pattern.
+    :param version: Version to return; defaults to the highest registered one.
+    :return: The PatternEntry.
+    :raises KeyError: If no such pattern (or version) is registered.
+    """
+    versions = _registry.get(name)
+    if not versions:
+        raise KeyError(f"Unknown pattern {name!r}")
+    if version is None:
+        version = max(versions)
+    try:
+        return versions[version]
+    except KeyError:
+        raise KeyError(f"Unknown version {version} of pattern {name!r}") from None
+
+
+def pattern_names():
+    """
+    :return: Sorted names of the registered patterns.
+    """
+    return sorted(_registry)
+
+
+def pattern_versions(name):
+    """
+    :param name: Name of the pattern.
+    :return: Sorted versions registered under the name.
+    """
+    return sorted(_registry.get(name, ()))
@@ -0,0 +1,68 @@
+import re
+
+import pytest
+
+from patterns import get_pattern, pattern_names, register, unregister
+from patterns.backend import (LINEAR_MIN_LENGTH, available_backends, compile_pattern, get_backend,
+                              set_backend, translate_unicode_classes)
+
+needs_re2 = pytest.mark.skipif('re2' not in available_backends(), reason='google-re2 is not installed')
+
+
+@pytest.fixture
+def backend():
+    previous = get_backend()
+    yield
+    set_backend(previous)
+
+
+def test_translated_classes():
+    assert translate_unicode_classes(r'\d+') == r'[\p{Nd}]+'
+    assert translate_unicode_classes(r'[\w.-]+') == r'[\p{L}\p{N}_.-]+'
+    assert translate_unicode_classes(r'[]\d]') == r'[]\p{Nd}]'
+    assert translate_unicode_classes(r'\W\Z') == r'[^\p{L}\p{N}_]\z'
+    for pattern in (r'\bword', r'end$', r'[\D]'):
+        with pytest.raises(ValueError):
+            translate_unicode_classes(pattern)
+    assert translate_unicode_classes(r'end$', multiline=True) == r'end$'
+
+
+@needs_re2
+def test_re2_matches_what_re_matches(backend):
+    values = ['٣٣٣', 'ééé_1', 'a b', 'abc\n', '３３', 'x' * 5, 'tab\there']
+    for pattern in (r'\d+', r'\w+', r'\w+\s\w+', r'[\w\s]+', r'\S+', r'abc\Z'):
+        compiled, name = compile_pattern(pattern, backend='re2')
+        assert name == 're2'
+        for value in values:
+            expected = re.fullmatch(pattern, value)
+            found = compiled.fullmatch(value)
+            assert (found and found.group()) == (expected and expected.group()), (pattern, value)
+
+    # Patterns RE2 cannot express fall back to re
+    for pattern in (r'(a)\1', r'(?=a)\w', r'\bword\b', r'end$'):
+        assert compile_pattern(pattern, backend='re2')[1] == 're'
+
+
+@needs_re2
+def test_long_input_uses_the_backend(backend):
+    name = 'test_backend_pattern'
+    pattern = register(name, r'(?:[a-z]+\.)*[a-z]+')
+    try:
+        short, long = 'a.b', 'a.' * LINEAR_MIN_LENGTH + 'b'
+        set_backend('re2')
+        assert pattern.regex_for(short) is pattern.regex and pattern.backend == 're2'
+        assert pattern.regex_for(long) is pattern.linear_regex
+        assert pattern.is_valid(long) and not pattern.is_valid(long + '.')
+
+        set_backend('re')
+        assert pattern.backend == 're' and pattern.is_valid(long)
+    finally:
+        unregister(name)
+    assert name not in pattern_names()
+
+
+def test_unknown_backends_are_rejected(backend):
+    with pytest.raises(ValueError):
+        set_backend('pcre')
+    assert set_backend('auto') in available_backends()
+    assert get_pattern('email').is_valid('user@example.com')
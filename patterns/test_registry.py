@@ -0,0 +1,62 @@
+import pytest
+
+from patterns import get_pattern, pattern_names, pattern_versions, register, unregister
+
+
+@pytest.fixture
+def name():
+    name = 'test_registry_pattern'
+    yield name
+    if name in pattern_names():
+        unregister(name)
+
+
+def test_highest_version_is_the_default(name):
+    first = register(name, r'[a-z]+')
+    second = register(name, r'[a-z0-9]+', version=2)
+    assert pattern_versions(name) == [1, 2]
+    assert get_pattern(name) is second
+    assert get_pattern(name, 1) is first
+    assert first.is_valid('abc') and not first.is_valid('abc1')
+    assert second.is_valid('abc1')
+
+
+def test_versions_are_not_replaced_silently(name):
+    register(name, r'a')
+    with pytest.raises(ValueError):
+        register(name, r'b')
+    assert register(name, r'b', replace=True).is_valid('b')
+
+
+def test_unregister(name):
+    register(name, r'a')
+    register(name, r'b', version=2)
+    unregister(name, 2)
+    assert pattern_versions(name) == [1]
+    unregister(name)
+    assert name not in pattern_names()
+    with pytest.raises(KeyError):
+        get_pattern(name)
+    with pytest.raises(KeyError):
+        unregister(name)
+
+
+def test_patterns_are_compiled_once(name):
+    entry = register(name, r'\d+')
+    assert entry.regex is entry.regex
+    assert get_pattern(name).regex is entry.regex
+
+
+def test_validator_runs_after_the_pattern(name):
+    entry = register(name, r'\d+', validator=lambda value: int(value) % 2 == 0)
+    assert entry.is_valid('42')
+    assert not entry.is_valid('43')
+    assert not entry.is_valid('4x')
+    assert entry.fullmatch('43')
+
+
+def test_builtin_patterns_are_registered():
+    for name in ('url', 'phone', 'email', 'date', 'iban', 'ipv4', 'ipv6', 'uuid', 'credit_card'):
+        assert name in pattern_names()
+    assert get_pattern('date').is_valid('29-02-2024')
+    assert not get_pattern('date').is_valid('29-02-2023')
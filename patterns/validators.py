@@ -0,0 +1,188 @@
+import ipaddress
+from itertools import compress
+
+try:
+    import numpy as np
+except ImportError:  # Batch validation falls back to bytearrays without NumPy
+    np = None
+
+# Days per month in a common year, indexed by month number (index 0 is unused).
+DAYS_IN_MONTH = (0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+# Number of dates converted to a character code array at a time by valid_dates_many.
+DATE_BLOCK_SIZE = 1 << 16
+
+# Positions of the digits in a DD-MM-YYYY / MM-DD-YYYY string.
+_DATE_DIGITS = [0, 1, 3, 4, 6, 7, 8, 9]
+
+
+def is_leap_year(year: int) -> bool:
+    """
+    Check if a year is a leap year in the Gregorian calendar.
+
+    :param year: The year to check.
+    :return: True if the year has a 29th of February.
+    """
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+
+def is_valid_day(first: int, second: int, year: int) -> bool:
+    """
+    Check if two day/month numbers form a real date, read as DD-MM or as MM-DD.
+
+    :param first: The first number of the date.
+    :param second: The second number of the date.
+    :param year: The year of the date.
+    :return: True if first-second-year is a valid DD-MM-YYYY or MM-DD-YYYY date.
+    """
+    def days_in_month(month):
+        return 29 if month == 2 and is_leap_year(year) else DAYS_IN_MONTH[month]
+
+    return ((1 <= second <= 12 and 1 <= first <= days_in_month(second))
+            or (1 <= first <= 12 and 1 <= second <= days_in_month(first)))
+
+
+def is_valid_date_string(date_str: str) -> bool:
+    """
+    Check the calendar of a string already matching the date pattern.
+
+    Dates are accepted with '-' separators only, as datetime.strptime with the
+    '%d-%m-%Y' and '%m-%d-%Y' formats used to require.
+
+    :param date_str: A 10 character string matching the date pattern.
+    :return: True if the string is a real date.
+    """
+    if date_str[2] != '-' or date_str[5] != '-':
+        return False
+    return is_valid_day(int(date_str[:2]), int(date_str[3:5]), int(date_str[6:]))
+
+
+def valid_date_codes(codes):
+    """
+    Vectorized date check over the character codes of 10 character strings.
+
+    Checks the whole date pattern (digits, '-' separators, a 19xx or 20xx year) and
+    the calendar, so no regular expression is needed for ASCII rows.
+
+    :param codes: Integer NumPy array of shape (n, 10) holding the code points (or
+                  UTF-8 bytes) of the strings.
+    :return: Boolean NumPy array of length n.
+    """
+    codes = codes.astype(np.int64)
+    digits = codes[:, _DATE_DIGITS] - ord('0')
+    valid = ((digits >= 0) & (digits <= 9)).all(axis=1)
+    valid &= (codes[:, 2] == ord('-')) & (codes[:, 5] == ord('-'))
+
+    first = digits[:, 0] * 10 + digits[:, 1]
+    second = digits[:, 2] * 10 + digits[:, 3]
+    year = digits[:, 4] * 1000 + digits[:, 5] * 100 + digits[:, 6] * 10 + digits[:, 7]
+    valid &= (year // 100 == 19) | (year // 100 == 20)
+
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    days = np.array(DAYS_IN_MONTH)
+
+    def days_in_month(month):
+        month = np.clip(month, 0, 12)
+        return days[month] + ((month == 2) & leap)
+
+    valid &= (((second >= 1) & (second <= 12) & (first >= 1) & (first <= days_in_month(second)))
+              | ((first >= 1) & (first <= 12) & (second >= 1) & (second <= days_in_month(first))))
+    return valid
+
+
+def valid_dates_many(entry, values):
+    """
+    Batch validator of the date pattern: vectorized is_valid over a sequence of strings.
+
+    :param entry: The date PatternEntry, used for rows with non-ASCII characters
+                  (e.g. digits of other scripts).
+    :param values: Sequence of strings.
+    :return: Boolean NumPy array.
+    """
+    lengths = np.fromiter(map(len, values), dtype=np.intp, count=len(values))
+    candidates = list(compress(values, lengths == 10))
+    valid = np.zeros(len(candidates), dtype=bool)
+
+    for start in range(0, len(candidates), DATE_BLOCK_SIZE):
+        block = candidates[start:start + DATE_BLOCK_SIZE]
+        codes = np.array(block, dtype='U10').view(np.uint32).reshape(-1, 10)
+        valid[start:start + len(block)] = valid_date_codes(codes)
+        for row in np.flatnonzero((codes > 127).any(axis=1)):
+            valid[start + row] = entry.is_valid(block[row])
+
+    result = np.zeros(len(values), dtype=bool)
+    result[lengths == 10] = valid
+    return result
+
+
+def arrow_valid_dates(entry, column):
+    """
+    Arrow validator of the date pattern, reading the strings straight from the offset
+    and data buffers of the column.
+
+    :param entry: The date PatternEntry, used for the rare 10 character rows holding
+                  non-ASCII characters.
+    :param column: pyarrow ChunkedArray of strings.
+    :return: Boolean NumPy array; missing values are False.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    results = []
+    for chunk in column.chunks:
+        valid = np.zeros(len(chunk), dtype=bool)
+        offset_type = np.int64 if pa.types.is_large_string(chunk.type) else np.int32
+        _, offsets_buffer, data_buffer = chunk.buffers()
+        if offsets_buffer is not None and data_buffer is not None and len(chunk):
+            offsets = np.frombuffer(offsets_buffer, dtype=offset_type)[chunk.offset:chunk.offset + len(chunk) + 1]
+            data = np.frombuffer(data_buffer, dtype=np.uint8)
+            present = ~pc.is_null(chunk).to_numpy(zero_copy_only=False)
+
+            rows = np.flatnonzero(present & (np.diff(offsets) == 10))
+            valid[rows] = valid_date_codes(data[offsets[rows, None] + np.arange(10)])
+
+            char_lengths = pc.fill_null(pc.utf8_length(chunk), 0).to_numpy(zero_copy_only=False)
+            for row in np.flatnonzero(present & (char_lengths == 10) & (np.diff(offsets) != 10)):
+                valid[row] = entry.is_valid(chunk[row].as_py())
+        results.append(valid)
+    return np.concatenate(results) if results else np.zeros(0, dtype=bool)
+
+
+def luhn_valid(number: str) -> bool:
+    """
+    Check the Luhn checksum of a card number, ignoring spaces and dashes.
+
+    :param number: The card number.
+    :return: True if the checksum is valid.
+    """
+    digits = [int(char) for char in number if char not in ' -']
+    checksum = sum(digits[-1::-2]) + sum(sum(divmod(digit * 2, 10)) for digit in digits[-2::-2])
+    return checksum % 10 == 0
+
+
+def iban_valid(iban: str) -> bool:
+    """
+    Check the length and the ISO 7064 mod-97 checksum of an IBAN, ignoring spaces.
+
+    :param iban: The IBAN.
+    :return: True if the checksum is valid.
+    """
+    iban = iban.replace(' ', '')
+    if not 15 <= len(iban) <= 34:
+        return False
+    rearranged = iban[4:] + iban[:4]
+    return int(''.join(str(int(char, 36)) for char in rearranged)) % 97 == 1
+
+
+def is_ipv6_address(address: str) -> bool:
+    """
+    Check an IPv6 address (compressed, full or with an embedded IPv4 part).
+
+    :param address: The candidate address.
+    :return: True if it is a valid IPv6 address.
+    """
+    try:
+        ipaddress.IPv6Address(address)
+    except ValueError:
+        return False
+    return True
@@ -1 +1,17 @@
-from .document_search import TextSearch
\ No newline at end of file
+import importlib
+
+# Public classes and the modules defining them. They are imported on first access
+# so that importing the package does not load spaCy or rapidfuzz.
+_EXPORTS = {
+    'TextSearch': 'search.document_search',
+    'CorpusSearch': 'search.corpus_search',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module), name)
\ No newline at end of file
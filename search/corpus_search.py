@@ -0,0 +1,234 @@
+import glob
+import heapq
+import os
+from array import array
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from rapidfuzz import process, fuzz
+
+from search.model_registry import DEFAULT_MODEL, get_nlp
+from search.search_index import PhraseIndex
+from search.search_utils import query_cache, find_spelling_correction
+from search.spelling import SpellingCorrector
+
+CorpusMatch = namedtuple('CorpusMatch', ['phrase', 'score', 'document', 'doc_id', 'start', 'end'])
+CorpusMatch.__doc__ = """A matching phrase with the document it comes from and the byte offsets of its sentence."""
+
+# Phrases of the shard served by the current worker process.
+_shard_phrases = None
+
+
+def _load_shard(phrases):
+    """Process pool initializer: keep the shard's phrases in the worker."""
+    global _shard_phrases
+    _shard_phrases = phrases
+
+
+def _search_shard(queries, threshold, top_k, phrases=None):
+    """
+    Score queries against one shard of phrases.
+
+    Args:
+        queries (list): Preprocessed queries.
+        threshold (float): Minimum similarity score.
+        top_k (int): Number of matches kept per query.
+        phrases (list): Phrases of the shard; defaults to the worker's shard.
+
+    Returns:
+        list: For each query, a pair of up to top_k (score, local phrase index) pairs above
+        the threshold, best first, and the best (score, local phrase index) pair of the
+        shard whatever its score, or None for an empty shard.
+    """
+    phrases = _shard_phrases if phrases is None else phrases
+    if not phrases:
+        return [([], None) for _ in queries]
+
+    # No score_cutoff, so the best phrase is known even when it is below the threshold
+    scores = process.cdist(queries, phrases, scorer=fuzz.partial_ratio, dtype=np.float64, workers=1)
+    results = []
+    for query_scores in scores:
+        best_column = int(np.argmax(query_scores))
+        columns = np.flatnonzero(query_scores >= threshold)
+        columns = columns[np.lexsort((columns, -query_scores[columns]))][:top_k]
+        results.append(([(float(query_scores[column]), int(column)) for column in columns],
+                        (float(query_scores[best_column]), best_column)))
+    return results
+
+
+def resolve_document_paths(paths, pattern='*.txt'):
+    """
+    Expand directories, glob patterns and file paths into a sorted list of files.
+
+    Args:
+        paths (str or list): A directory, a glob pattern, a file path or a list of them.
+        pattern (str): Glob pattern applied inside directories (searched recursively).
+
+    Returns:
+        list: Paths of the documents, without duplicates.
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+
+    resolved = []
+    for path in map(os.fspath, paths):
+        if os.path.isdir(path):
+            resolved.extend(glob.glob(os.path.join(path, '**', pattern), recursive=True))
+        elif glob.has_magic(path):
+            resolved.extend(glob.glob(path, recursive=True))
+        else:
+            resolved.append(path)
+
+    return sorted(set(path for path in resolved if os.path.isfile(path)))
+
+
+class CorpusSearch:
+    """
+    Class for fuzzy matching over a collection of documents.
+
+    The phrases of all documents are kept in one store, split into contiguous shards
+    that are scored in parallel by a pool of worker processes, one per shard.
+    """
+
+    def __init__(self, paths, threshold=75, shards=None, pattern='*.txt', use_index=False, n_process=1,
+                 model=DEFAULT_MODEL):
+        """
+        Initialize the CorpusSearch object by loading every document of a collection.
+
+        Args:
+            paths (str or list): Directory, glob pattern, file path or list of them.
+            threshold (int): Minimum similarity score for matching. Default is 75.
+            shards (int): Number of shards (and worker processes) used for scoring.
+                Defaults to the number of CPUs; 1 scores in the calling process.
+            pattern (str): File pattern used when a directory is given. Default is '*.txt'.
+            use_index (bool): Load and save a persistent phrase index next to every
+                document. Default is False.
+            n_process (int): Number of processes used by spaCy when a document has to
+                be parsed. Default is 1.
+            model (str): Name of the spaCy model, shared through the model registry.
+                Default is 'en_core_web_sm'.
+        """
+        self.model = model
+        self.threshold = threshold
+        self.documents = resolve_document_paths(paths, pattern)
+        self.use_index = use_index
+        self.n_process = n_process
+
+        self.phrases = []
+        self.doc_ids = array('I')
+        self.spans = []
+        self._load_documents()
+
+        self.document_words = set(word for phrase in self.phrases for word in phrase.split())
+        self.spelling_corrector = SpellingCorrector(self.document_words)
+
+        self.shards = self._build_shards(shards or os.cpu_count() or 1)
+        self._executors = None
+
+    def _load_documents(self):
+        """Add the phrases of every document to the shared store."""
+        for doc_id, path in enumerate(self.documents):
+            if self.use_index:
+                index = PhraseIndex.load_or_build(path, self.model, path + '.tfidx', n_process=self.n_process)
+            else:
+                index = PhraseIndex.build(path, self.nlp, n_process=self.n_process)
+            self.phrases.extend(index.phrases)
+            self.spans.extend(index.spans)
+            self.doc_ids.extend([doc_id] * len(index.phrases))
+
+    @property
+    def nlp(self):
+        """The shared spaCy model, loaded on first use."""
+        return get_nlp(self.model)
+
+    def _build_shards(self, count):
+        """Split the phrase store into at most `count` contiguous (start, end) ranges."""
+        count = max(1, min(count, len(self.phrases)))
+        bounds = np.linspace(0, len(self.phrases), count + 1).astype(int)
+        return [(int(start), int(end)) for start, end in zip(bounds[:-1], bounds[1:])]
+
+    def _start_workers(self):
+        """Start one single-process pool per shard, each holding only its own phrases."""
+        if self._executors is None:
+            self._executors = [ProcessPoolExecutor(max_workers=1, initializer=_load_shard,
+                                                   initargs=(self.phrases[start:end],))
+                               for start, end in self.shards]
+        return self._executors
+
+    def close(self):
+        """Shut down the worker processes."""
+        if self._executors is not None:
+            for executor in self._executors:
+                executor.shutdown()
+            self._executors = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def search(self, raw_query, top_k=5):
+        """
+        Search the collection for the best matching phrases for a given query.
+
+        Args:
+            raw_query (str): The query to search in the documents.
+            top_k (int): Maximum number of matches returned. Default is 5.
+
+        Returns:
+            tuple: List of CorpusMatch above the threshold (best first), the best
+            CorpusMatch whatever its score (None for an empty collection), and the
+            spelling-corrected query.
+        """
+        return self.search_many([raw_query], top_k)[0]
+
+    def search_many(self, raw_queries, top_k=5):
+        """
+        Search the collection for several queries at once.
+
+        Args:
+            raw_queries (list): Queries to search in the documents.
+            top_k (int): Maximum number of matches returned per query. Default is 5.
+
+        Returns:
+            list: One (matches, best_match, corrected_query) tuple per query, as returned by search().
+        """
+        if not raw_queries:
+            return []
+        queries = query_cache.preprocess_many(raw_queries, self.nlp)
+
+        if len(self.shards) == 1:
+            shard_results = [_search_shard(queries, self.threshold, top_k, self.phrases)]
+        else:
+            futures = [executor.submit(_search_shard, queries, self.threshold, top_k)
+                       for executor in self._start_workers()]
+            shard_results = [future.result() for future in futures]
+
+        results = []
+        for row, raw_query in enumerate(raw_queries):
+            # Merge the per-shard top-k lists; ties keep corpus order
+            candidates = ((score, start + column)
+                          for (start, _), shard in zip(self.shards, shard_results)
+                          for score, column in shard[row][0])
+            top = heapq.nsmallest(top_k, candidates, key=lambda item: (-item[0], item[1]))
+            matches = [self._match(index, score) for score, index in top]
+
+            # Like extractOne, the best match does not depend on the threshold; ties keep corpus order
+            shard_bests = [(score, start + column)
+                           for (start, _), shard in zip(self.shards, shard_results)
+                           if shard[row][1] is not None
+                           for score, column in [shard[row][1]]]
+            best = min(shard_bests, key=lambda item: (-item[0], item[1]), default=None)
+            best_match = self._match(best[1], best[0]) if best is not None else None
+
+            corrected_query = find_spelling_correction(raw_query, self.document_words, self.spelling_corrector)
+            results.append((matches, best_match, corrected_query))
+        return results
+
+    def _match(self, index, score):
+        """Describe the phrase at a position of the store as a CorpusMatch."""
+        doc_id = self.doc_ids[index]
+        start, end = self.spans[index]
+        return CorpusMatch(self.phrases[index], score, self.documents[doc_id], doc_id, start, end)
@@ -1,32 +1,189 @@
-import spacy
+import os
+
+import numpy as np
 from rapidfuzz import process, fuzz
-from search.search_utils import preprocess_text_spacy, load_document_phrases, find_spelling_correction
+from dedup import NearDuplicateDetector
+from instrumentation import stage
+from search.model_registry import DEFAULT_MODEL, get_nlp
+from search.search_utils import query_cache, find_spelling_correction
+from search.search_index import PhraseIndex
+from search.ngram_index import NgramIndex
+from search.spelling import SpellingCorrector
+
+EXACT = 'exact'
+APPROXIMATE = 'approximate'
+
+# Number of matches reported per query.
+MAX_MATCHES = 5
 
 
 class TextSearch:
     """Class for performing text search and fuzzy matching on documents."""
 
-    def __init__(self, file_path, threshold=75):
+    def __init__(self, file_path, threshold=75, index_path=None, mode=EXACT, max_candidates=200, n_process=1,
+                 model=DEFAULT_MODEL, dedupe_threshold=None):
         """
         Initialize the TextSearch object by loading a document and setting a threshold.
 
         Args:
             file_path (str): Path to the document for searching.
             threshold (int): Minimum similarity score for matching. Default is 75.
+            index_path (str): Optional path of a persistent phrase index. If the index
+                matches the document and model it is loaded instead of re-parsing the
+                document; otherwise it is rebuilt and written there. Default is None
+                (no index file is used).
+            mode (str): 'exact' scores every phrase; 'approximate' only scores the phrases
+                picked by a character trigram index. Default is 'exact'.
+            max_candidates (int): Number of phrases scored per query in approximate mode.
+                Default is 200.
+            n_process (int): Number of processes used by spaCy when the document has to be
+                parsed (-1 for all cores). Default is 1.
+            model (str): Name of the spaCy model. The model is loaded once per process,
+                on first use, and shared by all instances. Default is 'en_core_web_sm'.
+            dedupe_threshold (float): Optional MinHash similarity of the phrases' words
+                above which repeated sentences (quotes, boilerplate) are scored once, as
+                the first such phrase. Match indices then refer to the kept phrases;
+                occurrences maps them back to every original phrase. Default is None.
         """
-        self.nlp = spacy.load('en_core_web_sm')
-        self.file_path = file_path
+        if mode not in (EXACT, APPROXIMATE):
+            raise ValueError(f"mode must be '{EXACT}' or '{APPROXIMATE}', got {mode!r}")
+        self.model = model
+        # Resolved once, so a later change of working directory does not affect refresh
+        self.file_path = os.path.abspath(file_path)
         self.threshold = threshold
-        self.phrases = self._load_phrases()
+        self.index_path = index_path
+        self.n_process = n_process
+        self.index = self._load_index()
+        self.dedupe_threshold = dedupe_threshold
+        self._select_phrases()
         self.document_words = self._build_word_set()
+        self.spelling_corrector = self._build_spelling_corrector()
+        self.mode = mode
+        self.max_candidates = max_candidates
+        self._ngram_index = None
+
+    def _load_index(self):
+        """Load the document phrases, from the persistent index when one is configured."""
+        with stage('search.load_index'):
+            if self.index_path is None:
+                return PhraseIndex.build(self.file_path, self.nlp, n_process=self.n_process)
+            return PhraseIndex.load_or_build(self.file_path, self.model, self.index_path, n_process=self.n_process)
+
+    def _select_phrases(self):
+        """Pick the phrases to search: all of the index's, or one per near-duplicate group."""
+        if self.dedupe_threshold is None:
+            self.phrases = self.index.phrases
+            self.spans = self.index.spans
+            self.phrase_groups = None
+            return
+
+        self._detector = NearDuplicateDetector(self.dedupe_threshold)
+        self._detector.add_many(phrase.split() for phrase in self.index.phrases)
+        # Detector id of every phrase of the index
+        self._phrase_ids = list(range(len(self.index.phrases)))
+        self._group_phrases()
+
+    def _group_phrases(self):
+        """Collect the kept phrases and their near-duplicate groups from the detector."""
+        representatives = self._detector.representatives
+        kept = [position for position, item_id in enumerate(self._phrase_ids)
+                if representatives[item_id] == item_id]
+        rows = {self._phrase_ids[position]: row for row, position in enumerate(kept)}
+        self.phrases = [self.index.phrases[i] for i in kept]
+        self.spans = [self.index.spans[i] for i in kept]
+        # Indices of the index's phrases collapsed into every kept phrase, in document order
+        self.phrase_groups = [[] for _ in kept]
+        for position, item_id in enumerate(self._phrase_ids):
+            self.phrase_groups[rows[representatives[item_id]]].append(position)
 
-    def _load_phrases(self):
-        """Load the document and extract relevant phrases."""
-        return load_document_phrases(self.file_path, self.nlp)
+    def _update_groups(self, patch):
+        """Apply a refresh patch to the near-duplicate groups, hashing only the added phrases."""
+        old_phrases = self.phrases
+        stop = patch.start + len(patch.removed)
+        for item_id in self._phrase_ids[patch.start:stop]:
+            self._detector.remove(item_id)
+        first_id = len(self._detector)
+        self._detector.add_many(phrase.split() for phrase in patch.added)
+        self._phrase_ids[patch.start:stop] = range(first_id, len(self._detector))
+        self._group_phrases()
+
+        if self._ngram_index is not None:
+            # Only the kept phrases between the unchanged head and tail are re-indexed
+            new_phrases = self.phrases
+            limit = min(len(old_phrases), len(new_phrases))
+            start = 0
+            while start < limit and old_phrases[start] == new_phrases[start]:
+                start += 1
+            suffix = 0
+            while suffix < limit - start and old_phrases[-1 - suffix] == new_phrases[-1 - suffix]:
+                suffix += 1
+            self._ngram_index.replace(start, old_phrases[start:len(old_phrases) - suffix],
+                                      new_phrases[start:len(new_phrases) - suffix])
+
+    def occurrences(self, index):
+        """
+        Map a match back to every phrase of the document it stands for.
+
+        Args:
+            index (int): Index of a phrase in self.phrases, e.g. from a best match.
+
+        Returns:
+            list: (phrase, (start, end) byte span) of the phrase and of every
+            near-duplicate collapsed into it, in document order.
+        """
+        originals = [index] if self.phrase_groups is None else self.phrase_groups[index]
+        return [(self.index.phrases[i], self.index.spans[i]) for i in originals]
+
+    @property
+    def nlp(self):
+        """The shared spaCy model, loaded on first use."""
+        return get_nlp(self.model)
 
     def _build_word_set(self):
         """Build a set of words from the document to check for spelling corrections."""
-        return set(word for phrase in self.phrases for word in phrase.split())
+        return set(self.index.word_counts)
+
+    def _build_spelling_corrector(self):
+        """Precompute the spelling corrector over the document words."""
+        return SpellingCorrector(self.document_words)
+
+    @property
+    def ngram_index(self):
+        """Trigram index over the phrases, built on first use in approximate mode."""
+        if self._ngram_index is None:
+            self._ngram_index = NgramIndex(self.phrases)
+        return self._ngram_index
+
+    def refresh(self):
+        """
+        Pick up changes to the document without rebuilding everything.
+
+        Only the changed paragraphs are re-parsed; the phrases, word set, spelling
+        corrector and trigram index are patched in place. After an append only the
+        new data is parsed. With deduplication only the new phrases are hashed. The
+        persistent index, if any, is rewritten.
+
+        Returns:
+            bool: True if the document had changed.
+        """
+        patch = self.index.refresh(self.file_path, self.nlp, n_process=self.n_process)
+        if patch is None:
+            return False
+
+        self.document_words.difference_update(patch.removed_words)
+        self.document_words.update(patch.added_words)
+        for word in patch.removed_words:
+            self.spelling_corrector.remove_word(word)
+        for word in patch.added_words:
+            self.spelling_corrector.add_word(word)
+        if self.dedupe_threshold is not None:
+            self._update_groups(patch)
+        elif self._ngram_index is not None:
+            self._ngram_index.replace(patch.start, patch.removed, patch.added)
+
+        if self.index_path is not None:
+            self.index.save(self.index_path)
+        return True
 
     def search(self, raw_query):
         """
@@ -36,38 +193,129 @@ class TextSearch:
             raw_query (str): The query to search in the document.
 
         Returns:
-            tuple: A tuple containing a list of best matches and the single best match.
+            tuple: A tuple containing a list of best matches, the single best match
+            and the spelling-corrected query.
         """
-        query = preprocess_text_spacy(raw_query, self.nlp)
+        query = query_cache.preprocess(raw_query, self.nlp)
 
         # Find the best matches
         matches, best_match = self._search_document(query)
 
         # Suggest spelling correction if necessary
-        corrected_query = find_spelling_correction(raw_query, self.document_words)
+        corrected_query = find_spelling_correction(raw_query, self.document_words, self.spelling_corrector)
 
         return matches, best_match, corrected_query
 
-    def _search_document(self, query):
+    def search_many(self, raw_queries):
+        """
+        Search the document for several queries at once.
+
+        All queries are scored against the phrases in a single vectorized call.
+
+        Args:
+            raw_queries (list): Queries to search in the document.
+
+        Returns:
+            list: One (matches, best_match, corrected_query) tuple per query, as returned by search().
+        """
+        queries = query_cache.preprocess_many(raw_queries, self.nlp)
+        results = self._search_documents(queries)
+        return [(matches, best_match,
+                 find_spelling_correction(raw_query, self.document_words, self.spelling_corrector))
+                for raw_query, (matches, best_match) in zip(raw_queries, results)]
+
+    def _search_document(self, query, mode=None):
         """
         Perform fuzzy matching between the query and phrases from the document.
 
         Args:
             query (str): Preprocessed query.
+            mode (str): 'exact' or 'approximate'. Defaults to the instance's mode.
 
         Returns:
             tuple: List of matches above the threshold and the single best match.
         """
-        best_matches = []
+        return self._search_documents([query], mode)[0]
 
-        # Fuzzy match using partial ratio
-        results = process.extract(query, self.phrases, scorer=fuzz.partial_ratio)
+    def _search_documents(self, queries, mode=None):
+        """
+        Score preprocessed queries against the phrases in one pass.
+
+        Every phrase is scored once per query with partial ratio; the same scores give
+        both the matches above the threshold and the best match.
+
+        Args:
+            queries (list): Preprocessed queries.
+            mode (str): 'exact' or 'approximate'. Defaults to the instance's mode.
+
+        Returns:
+            list: For each query, the list of (phrase, score) matches above the threshold
+            (best first, at most MAX_MATCHES) and the best (phrase, score, index) match
+            whatever its score, or None if there are no phrases to score.
+        """
+        if not queries:
+            return []
 
-        # Filter results based on threshold score
-        filtered_results = [(result[0], result[1]) for result in results if result[1] >= self.threshold]
-        best_matches.extend(filtered_results)
+        candidate_lists = None
+        if (mode or self.mode) == APPROXIMATE:
+            with stage('search.candidates', len(queries)):
+                candidate_lists = [self.ngram_index.candidates(query, self.max_candidates) for query in queries]
+
+        # Queries without indexed trigrams are scored against every phrase
+        if candidate_lists is None or any(candidates is None for candidates in candidate_lists):
+            choice_ids = np.arange(len(self.phrases))
+            choices = self.phrases
+        else:
+            choice_ids = np.unique(np.concatenate([np.asarray(c, dtype=np.int64) for c in candidate_lists]))
+            choices = [self.phrases[i] for i in choice_ids]
+
+        with stage('search.score', len(queries)):
+            scores = process.cdist(queries, choices, scorer=fuzz.partial_ratio, dtype=np.float64, workers=-1)
+
+        results = []
+        for row, query_scores in enumerate(scores):
+            scored = np.flatnonzero(np.isin(choice_ids, candidate_lists[row])) \
+                if candidate_lists is not None and candidate_lists[row] is not None else np.arange(len(choices))
+
+            # Like extractOne, the best match does not depend on the threshold; ties keep document order
+            best_match = None
+            if len(scored):
+                column = scored[np.argmax(query_scores[scored])]
+                best_match = (choices[column], float(query_scores[column]), int(choice_ids[column]))
+
+            # Highest score first; ties keep document order
+            columns = scored[query_scores[scored] >= self.threshold]
+            columns = columns[np.lexsort((columns, -query_scores[columns]))][:MAX_MATCHES]
+            matches = [(choices[column], float(query_scores[column])) for column in columns]
+            results.append((matches, best_match))
+
+        return results
+
+    def measure_recall(self, queries):
+        """
+        Compare approximate search against the exact (brute-force) search.
+
+        Args:
+            queries (list): Raw queries to run through both search modes.
+
+        Returns:
+            dict: 'recall', the share of exact matches also returned by the approximate
+            mode, and 'best_match_agreement', the share of queries whose best match is
+            the same phrase in both modes.
+        """
+        found = expected = agreed = 0
+        for raw_query in queries:
+            query = query_cache.preprocess(raw_query, self.nlp)
+            exact_matches, exact_best = self._search_document(query, mode=EXACT)
+            approximate_matches, approximate_best = self._search_document(query, mode=APPROXIMATE)
 
-        # Get the best match
-        best_match = process.extractOne(query, self.phrases, scorer=fuzz.partial_ratio)
+            approximate_phrases = {phrase for phrase, _ in approximate_matches}
+            expected += len(exact_matches)
+            found += sum(1 for phrase, _ in exact_matches if phrase in approximate_phrases)
+            if (exact_best and exact_best[0]) == (approximate_best and approximate_best[0]):
+                agreed += 1
 
-        return best_matches, best_match
\ No newline at end of file
+        return {
+            'recall': found / expected if expected else 1.0,
+            'best_match_agreement': agreed / len(queries) if queries else 1.0,
+        }
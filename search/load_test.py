@@ -0,0 +1,137 @@
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from urllib.parse import quote, urlsplit
+
+DEFAULT_QUERIES = [
+    "Artificial Inteligence",
+    "programing language",
+    "web developement",
+    "cloud computing platforms",
+    "cybersecurity encryption",
+    "blockchain transactions",
+    "mobile apps",
+    "machine lerning",
+]
+
+
+def percentile(sorted_values, fraction):
+    """
+    Return a percentile of already sorted values using the nearest-rank method.
+
+    Args:
+        sorted_values (list): Values in ascending order.
+        fraction (float): Percentile as a fraction, e.g. 0.99.
+
+    Returns:
+        float: The percentile, or 0.0 for an empty list.
+    """
+    if not sorted_values:
+        return 0.0
+    # Smallest rank covering the fraction; rounding first keeps e.g. 0.07 * 100 from becoming 8
+    rank = max(1, math.ceil(round(fraction * len(sorted_values), 9)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def _client(host, port, path, queries, count, latencies, errors, rng):
+    """Send `count` keep-alive GET requests over one connection, recording latencies."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(count):
+            query = rng.choice(queries)
+            request = (f"GET {path}?q={quote(query)} HTTP/1.1\r\n"
+                       f"Host: {host}\r\nConnection: keep-alive\r\n\r\n")
+            started = time.perf_counter()
+            writer.write(request.encode('latin-1'))
+            await writer.drain()
+
+            status_line = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if not line.strip():
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                if name.strip().lower() == 'content-length':
+                    length = int(value)
+            body = await reader.readexactly(length)
+            latencies.append(time.perf_counter() - started)
+
+            if b' 200 ' not in status_line:
+                errors.append(body.decode('utf-8', 'replace'))
+    finally:
+        writer.close()
+
+
+async def run_load_test(url, queries, concurrency=32, requests=2000, seed=0):
+    """
+    Fire requests at a running search server and measure latency and throughput.
+
+    Args:
+        url (str): Base URL of the server, e.g. http://127.0.0.1:8080.
+        queries (list): Queries to sample from.
+        concurrency (int): Number of concurrent keep-alive connections.
+        requests (int): Total number of requests.
+        seed (int): Seed for the query sampling.
+
+    Returns:
+        dict: Request count, error count, QPS and p50/p90/p99/max latency in milliseconds.
+    """
+    parts = urlsplit(url)
+    host, port = parts.hostname or '127.0.0.1', parts.port or 80
+    path = (parts.path.rstrip('/') or '') + '/search'
+
+    latencies, errors = [], []
+    rng = random.Random(seed)
+    per_client = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, path, queries, count, latencies, errors,
+                                   random.Random(rng.random()))
+                           for count in per_client if count))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'seconds': elapsed,
+        'qps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p90_ms': percentile(latencies, 0.90) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'max_ms': (latencies[-1] if latencies else 0.0) * 1000,
+    }
+
+
+def main(argv=None):
+    """Load-test a search server: python -m search.load_test [--url URL] [--concurrency N]"""
+    parser = argparse.ArgumentParser(description="Measure latency and throughput of python -m search.serve.")
+    parser.add_argument('--url', default='http://127.0.0.1:8080')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--queries', help="File with one query per line (defaults to a built-in set).")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON.")
+    args = parser.parse_args(argv)
+
+    queries = DEFAULT_QUERIES
+    if args.queries:
+        with open(args.queries, 'r', encoding='utf-8') as file:
+            queries = [line.strip() for line in file if line.strip()]
+
+    report = asyncio.run(run_load_test(args.url, queries, args.concurrency, args.requests, args.seed))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['requests']} requests, {report['errors']} errors in {report['seconds']:.2f}s")
+        print(f"QPS: {report['qps']:.1f}")
+        print(f"Latency p50: {report['p50_ms']:.2f} ms | p90: {report['p90_ms']:.2f} ms | "
+              f"p99: {report['p99_ms']:.2f} ms | max: {report['max_ms']:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
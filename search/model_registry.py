@@ -0,0 +1,84 @@
+import importlib.util
+import json
+import threading
+from pathlib import Path
+
+DEFAULT_MODEL = 'en_core_web_sm'
+
+# Components the search path never uses: phrases and queries only need lemmas,
+# stop word and punctuation flags and sentence boundaries.
+UNUSED_COMPONENTS = ['ner']
+
+_models = {}
+_lock = threading.Lock()
+
+
+def get_nlp(name=DEFAULT_MODEL):
+    """
+    Return the process-wide spaCy model for the search path, loading it on first use.
+
+    Args:
+        name (str): Package name or path of the spaCy model.
+
+    Returns:
+        spacy.Language: The shared model.
+    """
+    with _lock:
+        nlp = _models.get(name)
+        if nlp is None:
+            nlp = _models[name] = load_search_model(name)
+        return nlp
+
+
+def load_search_model(name=DEFAULT_MODEL):
+    """
+    Load a spaCy model with only the components the search path needs.
+
+    The entity recognizer is not loaded. When the model ships a sentence recognizer,
+    it replaces the dependency parser, and a rule-based sentencizer is added if the
+    model cannot split sentences at all.
+
+    Args:
+        name (str): Package name or path of the spaCy model.
+
+    Returns:
+        spacy.Language: The reduced model.
+    """
+    import spacy
+
+    nlp = spacy.load(name, exclude=UNUSED_COMPONENTS)
+    if 'senter' in nlp.disabled and 'parser' in nlp.pipe_names:
+        nlp.enable_pipe('senter')
+        nlp.remove_pipe('parser')
+    elif not any(component in nlp.pipe_names for component in ('parser', 'senter', 'sentencizer')):
+        nlp.add_pipe('sentencizer', first=True)
+    return nlp
+
+
+def get_model_meta(name=DEFAULT_MODEL):
+    """
+    Return the meta data of a spaCy model, reading meta.json instead of loading it when possible.
+
+    Args:
+        name (str): Package name or path of the spaCy model.
+
+    Returns:
+        dict: The model's meta data (lang, name, version, ...).
+    """
+    with _lock:
+        if name in _models:
+            return _models[name].meta
+
+    path = Path(name)
+    if not path.exists():
+        try:
+            spec = importlib.util.find_spec(name)
+        except (ImportError, ValueError):
+            spec = None
+        if spec is not None and spec.submodule_search_locations:
+            path = Path(list(spec.submodule_search_locations)[0])
+
+    meta_path = path / 'meta.json'
+    if meta_path.is_file():
+        return json.loads(meta_path.read_text(encoding='utf-8'))
+    return get_nlp(name).meta
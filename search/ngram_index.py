@@ -0,0 +1,137 @@
+import heapq
+from bisect import bisect_left
+from collections import Counter
+
+# Spacing of the ids given to consecutive phrases, leaving room for phrases inserted between them.
+ID_GAP = 1 << 16
+
+
+class NgramIndex:
+    """
+    Character n-gram inverted index used to pick candidate phrases before fuzzy scoring.
+
+    Each phrase is broken into lowercase character n-grams (trigrams by default). A query
+    is answered by counting how many of its n-grams every phrase shares and keeping the
+    phrases with the highest counts, so only a bounded candidate set needs exact scoring.
+
+    Postings hold stable phrase ids that increase with the phrase position but leave
+    gaps, so replacing a range of phrases only touches the postings of those phrases;
+    the ids are only renumbered when a gap runs out.
+    """
+
+    def __init__(self, phrases=(), n=3, max_gram_share=0.5):
+        """
+        Args:
+            phrases (iterable): Phrases to index, in order.
+            n (int): Length of the character n-grams. Default is 3.
+            max_gram_share (float): N-grams that occur in more than this share of the
+                phrases are ignored when counting, since they barely discriminate.
+                Default is 0.5.
+        """
+        self.n = n
+        self.max_gram_share = max_gram_share
+        self.postings = {}
+        self.size = 0
+        # Stable id of the phrase at every position, in increasing order
+        self.ids = []
+        for position, phrase in enumerate(phrases):
+            self.ids.append(position * ID_GAP)
+            self.add(position * ID_GAP, phrase)
+
+    def grams(self, text):
+        """
+        Split a text into its distinct lowercase character n-grams.
+
+        Args:
+            text (str): Text to split.
+
+        Returns:
+            set: The n-grams of the text; the whole text if it is shorter than n.
+        """
+        text = text.lower()
+        if len(text) <= self.n:
+            return {text} if text else set()
+        return {text[i:i + self.n] for i in range(len(text) - self.n + 1)}
+
+    def add(self, phrase_id, phrase):
+        """Add a phrase to the index under the given id."""
+        for gram in self.grams(phrase):
+            self.postings.setdefault(gram, set()).add(phrase_id)
+        self.size += 1
+
+    def remove(self, phrase_id, phrase):
+        """Remove a phrase previously added under the given id."""
+        for gram in self.grams(phrase):
+            ids = self.postings.get(gram)
+            if ids is not None:
+                ids.discard(phrase_id)
+                if not ids:
+                    del self.postings[gram]
+        self.size -= 1
+
+    def candidates(self, query, limit):
+        """
+        Select the phrases sharing the most n-grams with a query.
+
+        Args:
+            query (str): Preprocessed query.
+            limit (int): Maximum number of candidates to return.
+
+        Returns:
+            list: Positions of at most `limit` candidate phrases in ascending order, or None
+            if the query has no indexed n-grams and every phrase has to be scored.
+        """
+        postings = [self.postings[gram] for gram in self.grams(query) if gram in self.postings]
+        if not postings:
+            return None
+
+        max_postings = max(1, int(self.size * self.max_gram_share))
+        selective = [ids for ids in postings if len(ids) <= max_postings]
+
+        counts = Counter()
+        for ids in selective or postings:
+            counts.update(ids)
+
+        # Highest counts first; ties go to the earliest phrase, as ids follow positions
+        best = heapq.nsmallest(limit, counts.items(), key=lambda item: (-item[1], item[0]))
+        return sorted(bisect_left(self.ids, phrase_id) for phrase_id, _ in best)
+
+    def replace(self, start, removed, added):
+        """
+        Replace a range of phrases; the phrases after it keep their ids.
+
+        Args:
+            start (int): Position of the first replaced phrase.
+            removed (list): Phrases currently at positions start, start + 1, ...
+            added (list): Phrases taking their place.
+        """
+        stop = start + len(removed)
+        for phrase_id, phrase in zip(self.ids[start:stop], removed):
+            self.remove(phrase_id, phrase)
+        del self.ids[start:stop]
+
+        new_ids = self._free_ids(start, len(added))
+        if new_ids is None:
+            self._renumber()
+            new_ids = self._free_ids(start, len(added))
+        self.ids[start:start] = new_ids
+        for phrase_id, phrase in zip(new_ids, added):
+            self.add(phrase_id, phrase)
+
+    def _free_ids(self, position, count):
+        """Return `count` increasing unused ids fitting before position, or None if the gap is too small."""
+        if position == len(self.ids):
+            low = self.ids[-1] if self.ids else -ID_GAP
+            return [low + ID_GAP * (i + 1) for i in range(count)]
+        high = self.ids[position]
+        low = self.ids[position - 1] if position else high - ID_GAP * (count + 1)
+        step = (high - low) // (count + 1)
+        if step < 1:
+            return None
+        return [low + step * (i + 1) for i in range(count)]
+
+    def _renumber(self):
+        """Space the ids of all phrases ID_GAP apart again."""
+        renumbered = {phrase_id: position * ID_GAP for position, phrase_id in enumerate(self.ids)}
+        self.postings = {gram: {renumbered[i] for i in ids} for gram, ids in self.postings.items()}
+        self.ids = [position * ID_GAP for position in range(len(self.ids))]
@@ -0,0 +1,701 @@
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from bisect import bisect_left
+from collections import Counter, namedtuple
+from collections.abc import Sequence
+
+from search.model_registry import DEFAULT_MODEL, get_model_meta, get_nlp
+from search.search_utils import iter_document_chunks, iter_chunk_phrases
+
+INDEX_MAGIC = b'TFIDX'
+INDEX_VERSION = 4
+
+# Size in bytes of the digests identifying the content of a document chunk.
+CHUNK_DIGEST_SIZE = 16
+
+IndexPatch = namedtuple('IndexPatch', ['start', 'removed', 'added', 'removed_words', 'added_words'])
+IndexPatch.__doc__ = """
+Change applied to a PhraseIndex by refresh(): the phrases at positions
+start:start + len(removed) were replaced by `added`, and the listed words
+left or entered the vocabulary.
+"""
+
+# Magic, format version and length of the JSON header that follows it.
+_PREAMBLE = struct.Struct('<5sHI')
+_ALIGNMENT = 8
+
+# Sections of an index file, in file order.
+_SECTIONS = ('phrase_offsets', 'span_chunks', 'spans', 'phrases', 'words', 'word_counts', 'chunks',
+             'chunk_digests')
+
+
+class IndexFormatError(ValueError):
+    """Raised when a file is not a phrase index, is truncated or corrupt, or uses another format version."""
+
+
+class _MappedSequence(Sequence):
+    """Read-only sequence whose items are decoded from a memory-mapped index on access."""
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self._item(i) for i in range(*position.indices(self._length))]
+        if position < 0:
+            position += self._length
+        if not 0 <= position < self._length:
+            raise IndexError('index out of range')
+        return self._item(position)
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence) or isinstance(other, str):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __iter__(self):
+        for position in range(self._length):
+            yield self._item(position)
+
+    def __repr__(self):
+        return f"<{type(self).__name__} of {self._length} items>"
+
+
+class _MappedPhrases(_MappedSequence):
+    """
+    Phrases of a memory-mapped index, decoded from the UTF-8 blob on first access.
+
+    Ranges can be replaced by new phrases, so refresh() patches a loaded index
+    without decoding the phrases it keeps.
+    """
+
+    def __init__(self, offsets, blob):
+        self._offsets = offsets
+        self._blob = blob
+        # Phrase at every position, None until it is first decoded
+        self._decoded = [None] * (len(offsets) - 1)
+        # Position of every phrase in the mapping (-1 for new ones), once a range was replaced
+        self._mapped = None
+
+    @property
+    def _length(self):
+        return len(self._decoded)
+
+    def _item(self, position):
+        phrase = self._decoded[position]
+        if phrase is None:
+            mapped = position if self._mapped is None else self._mapped[position]
+            phrase = str(self._blob[self._offsets[mapped]:self._offsets[mapped + 1]], 'utf-8')
+            self._decoded[position] = phrase
+        return phrase
+
+    def __setitem__(self, positions, phrases):
+        if not isinstance(positions, slice) or positions.step not in (None, 1):
+            raise TypeError('only contiguous ranges of phrases can be replaced')
+        phrases = list(phrases)
+        if self._mapped is None:
+            self._mapped = array('q', range(len(self._decoded)))
+        self._decoded[positions] = phrases
+        self._mapped[positions] = array('q', [-1]) * len(phrases)
+
+
+class _RelativeSpans(_MappedSequence):
+    """(start, end) sentence spans of a PhraseIndex, computed from the offsets of their chunks."""
+
+    def __init__(self, index):
+        self._index = index
+
+    @property
+    def _length(self):
+        return len(self._index._span_chunks)
+
+    def _item(self, position):
+        index = self._index
+        chunk_start = index._chunk_starts[index._span_chunks[position]]
+        return (chunk_start + index._span_offsets[2 * position],
+                chunk_start + index._span_offsets[2 * position + 1])
+
+
+def file_content_hash(file_path, chunk_size=1 << 20):
+    """
+    Compute the SHA-256 digest of a file without reading it into memory at once.
+
+    Args:
+        file_path (str): Path to the file.
+        chunk_size (int): Number of bytes read per step.
+
+    Returns:
+        str: Hex digest of the file contents.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def model_signature(meta):
+    """
+    Describe the spaCy model used to build an index.
+
+    Args:
+        meta (dict): Meta data of the spaCy model.
+
+    Returns:
+        str: Model name and version, e.g. "en_core_web_sm==3.7.1".
+    """
+    return f"{meta.get('lang', '')}_{meta.get('name', '')}=={meta.get('version', '')}"
+
+
+def build_index_key(file_path, meta, content_hash=None):
+    """
+    Build the key identifying which document and model an index was built from.
+
+    Args:
+        file_path (str): Path to the indexed document.
+        meta (dict): Meta data of the spaCy model.
+        content_hash (str): Precomputed content hash of the document, if known.
+
+    Returns:
+        dict: Absolute path, modification time, size, content hash and model signature.
+    """
+    stat = os.stat(file_path)
+    return {
+        'path': os.path.abspath(file_path),
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'sha256': content_hash or file_content_hash(file_path),
+        'model': model_signature(meta),
+    }
+
+
+def chunk_digest(text):
+    """Return the digest identifying the content of a document chunk."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=CHUNK_DIGEST_SIZE).digest()
+
+
+def default_index_path(file_path):
+    """Return the index path used next to a document when none is given."""
+    return file_path + '.tfidx'
+
+
+class PhraseIndex:
+    """
+    Lemmatized phrases, word set and sentence offsets of one document.
+
+    The index can be written to a versioned binary file and memory-mapped back,
+    so a warm start does not need to run the spaCy pipeline over the document.
+    A loaded index keeps its phrases and spans in the mapping and decodes them
+    on access. It also remembers the paragraph chunks the document was parsed in,
+    so that refresh() only has to re-parse the chunks that changed.
+
+    Spans are stored relative to the chunk their sentence belongs to, and chunks
+    have stable ids, so refresh() only touches the phrases of the re-parsed chunks;
+    the chunks after them just get their new start offsets.
+    """
+
+    def __init__(self, phrases, spans, word_counts, key, chunks=None):
+        """
+        Args:
+            phrases (sequence): Preprocessed phrases, in document order.
+            spans (sequence): (start, end) byte offsets of each phrase's sentence in the document.
+            word_counts (dict): Number of occurrences of every word used in the phrases.
+            key (dict): Key describing the source document and model (see build_index_key).
+            chunks (list): (start, end, digest) of every chunk the document was parsed in.
+        """
+        self.phrases = phrases
+        self.word_counts = word_counts
+        self.key = key
+        self.chunks = chunks if chunks is not None else []
+        self._words = None
+        # Start offset of every chunk by id; ids are never reused, so replaced chunks leave stale entries
+        self._chunk_starts = [start for start, _, _ in self.chunks] or [0]
+        # Id of every chunk, in document order
+        self._chunk_ids = list(range(len(self.chunks)))
+        # Chunk id of every phrase, and its span relative to the chunk start
+        self._span_chunks, self._span_offsets = _relative_spans(spans, self._chunk_starts, self._chunk_ids)
+        self.spans = _RelativeSpans(self)
+
+    @property
+    def words(self):
+        """Sorted list of distinct words used in the phrases."""
+        if self._words is None:
+            self._words = sorted(self.word_counts)
+        return self._words
+
+    @classmethod
+    def build(cls, file_path, nlp, n_process=1):
+        """
+        Build an index by running the spaCy pipeline over a document.
+
+        Args:
+            file_path (str): Path to the document.
+            nlp (spacy.Language): spaCy language model.
+            n_process (int): Number of processes used by spaCy (-1 for all cores).
+
+        Returns:
+            PhraseIndex: The freshly built index.
+        """
+        key = build_index_key(file_path, nlp.meta)
+        phrases, spans, chunks = _parse_chunks(iter_document_chunks(file_path), nlp, n_process)
+        word_counts = Counter(word for phrase in phrases for word in phrase.split())
+        return cls(phrases, spans, word_counts, key, chunks)
+
+    def is_current(self, file_path, meta):
+        """
+        Check whether the index still describes the document and model.
+
+        The content hash is only recomputed when the modification time or size changed.
+
+        Args:
+            file_path (str): Path to the document.
+            meta (dict): Meta data of the spaCy model.
+
+        Returns:
+            bool: True if the index can be used as is.
+        """
+        if self.key.get('path') != os.path.abspath(file_path):
+            return False
+        if self.key.get('model') != model_signature(meta):
+            return False
+        stat = os.stat(file_path)
+        if self.key.get('mtime_ns') == stat.st_mtime_ns and self.key.get('size') == stat.st_size:
+            return True
+        return self.key.get('size') == stat.st_size and self.key.get('sha256') == file_content_hash(file_path)
+
+    def save(self, index_path):
+        """
+        Write the index to disk atomically.
+
+        Layout: magic, format version and header length, a JSON header with the
+        key and section table, then 8-byte aligned sections holding the phrase
+        offsets (uint64), the chunk of every phrase (uint64) and its sentence span
+        relative to the chunk (uint64 pairs), the UTF-8 phrase blob,
+        the newline-separated word list and word counts (uint64), and the chunk
+        offsets (uint64 pairs) and digests.
+
+        Args:
+            index_path (str): Destination path of the index file.
+        """
+        encoded = [phrase.encode('utf-8') for phrase in self.phrases]
+        offsets = array('Q', [0])
+        for data in encoded:
+            offsets.append(offsets[-1] + len(data))
+        chunk_positions = {chunk_id: position for position, chunk_id in enumerate(self._chunk_ids)} or {0: 0}
+        span_chunks = array('Q', [chunk_positions[chunk_id] for chunk_id in self._span_chunks])
+        spans = array('Q', self._span_offsets)
+        words = self.words
+        counts = array('Q', [self.word_counts[word] for word in words])
+        chunk_offsets = array('Q', [offset for start, end, _ in self.chunks for offset in (start, end)])
+
+        sections = [
+            ('phrase_offsets', offsets.tobytes()),
+            ('span_chunks', span_chunks.tobytes()),
+            ('spans', spans.tobytes()),
+            ('phrases', b''.join(encoded)),
+            ('words', '\n'.join(words).encode('utf-8')),
+            ('word_counts', counts.tobytes()),
+            ('chunks', chunk_offsets.tobytes()),
+            ('chunk_digests', b''.join(digest for _, _, digest in self.chunks)),
+        ]
+        header = {'key': self.key, 'phrase_count': len(self.phrases), 'sections': {}}
+
+        # Section offsets depend on the header length, which depends on the offsets,
+        # so lay the file out until the header size is stable.
+        header_bytes = b''
+        while True:
+            position = _align(_PREAMBLE.size + len(header_bytes))
+            for name, data in sections:
+                header['sections'][name] = [position, len(data)]
+                position = _align(position + len(data))
+            encoded_header = json.dumps(header, sort_keys=True).encode('utf-8')
+            stable = len(encoded_header) == len(header_bytes)
+            header_bytes = encoded_header
+            if stable:
+                break
+
+        directory = os.path.dirname(os.path.abspath(index_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(_PREAMBLE.pack(INDEX_MAGIC, INDEX_VERSION, len(header_bytes)))
+                file.write(header_bytes)
+                for name, data in sections:
+                    file.write(b'\0' * (header['sections'][name][0] - file.tell()))
+                    file.write(data)
+            os.replace(tmp_path, index_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, index_path):
+        """
+        Memory-map an index file written by save().
+
+        The header and the section table are checked against the file, so a truncated
+        or corrupt file is reported here rather than when a phrase is read. Phrases and
+        spans stay in the mapping, which is kept open as long as they are used.
+
+        Args:
+            index_path (str): Path of the index file.
+
+        Returns:
+            PhraseIndex: The loaded index.
+
+        Raises:
+            IndexFormatError: If the file is not an index, is truncated or corrupt, or uses
+                another format version.
+        """
+        with open(index_path, 'rb') as file:
+            try:
+                buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # An empty file cannot be mapped
+                raise IndexFormatError(f"{index_path} is not a phrase index") from None
+
+        header, sections = _read_sections(buffer, index_path)
+        phrase_count = header['phrase_count']
+        if (len(sections['phrase_offsets']) != 8 * (phrase_count + 1)
+                or len(sections['span_chunks']) != 8 * phrase_count or len(sections['spans']) != 16 * phrase_count):
+            raise IndexFormatError(f"{index_path} has sections of the wrong size for {phrase_count} phrases")
+        offsets = sections['phrase_offsets'].cast('Q')
+        if offsets[0] != 0 or offsets[-1] != len(sections['phrases']):
+            raise IndexFormatError(f"{index_path} has phrase offsets outside the phrase section")
+
+        try:
+            words_blob = str(sections['words'], 'utf-8')
+        except UnicodeDecodeError as error:
+            raise IndexFormatError(f"{index_path} has a corrupt word list") from error
+        words = words_blob.split('\n') if words_blob else []
+        if len(sections['word_counts']) != 8 * len(words):
+            raise IndexFormatError(f"{index_path} has {len(words)} words but a different number of counts")
+        word_counts = dict(zip(words, sections['word_counts'].cast('Q')))
+
+        raw_chunks = sections['chunks']
+        digests = bytes(sections['chunk_digests'])
+        if len(raw_chunks) % 16 or len(digests) != len(raw_chunks) // 16 * CHUNK_DIGEST_SIZE:
+            raise IndexFormatError(f"{index_path} has a corrupt chunk table")
+        raw_chunks = raw_chunks.cast('Q')
+        chunks = [(raw_chunks[2 * i], raw_chunks[2 * i + 1],
+                   digests[i * CHUNK_DIGEST_SIZE:(i + 1) * CHUNK_DIGEST_SIZE])
+                  for i in range(len(raw_chunks) // 2)]
+
+        index = cls(_MappedPhrases(offsets, sections['phrases']), (), word_counts, header['key'], chunks)
+        # Chunk ids start out as chunk positions, which is what the file stores
+        index._span_chunks = sections['span_chunks'].cast('Q')
+        index._span_offsets = sections['spans'].cast('Q')
+        return index
+
+    def refresh(self, file_path, nlp, n_process=1):
+        """
+        Bring the index up to date with the document, re-parsing only what changed.
+
+        If the old contents are still a prefix of the file, only the last chunk and the
+        appended data are read and parsed. Otherwise the file is split into chunks again,
+        hashing it in the same pass, and compared with the stored chunk digests; only the
+        changed range of chunks goes through spaCy. Only the phrases of that range are
+        replaced: the spans after it are relative to their chunks, which just get their
+        new offsets. An index built from another path or model is replaced entirely.
+
+        Args:
+            file_path (str): Path to the document.
+            nlp (spacy.Language): spaCy language model.
+            n_process (int): Number of processes used by spaCy.
+
+        Returns:
+            IndexPatch: The change applied to the phrases, or None if the document is unchanged.
+        """
+        stat = os.stat(file_path)
+        same_source = (self.key.get('path') == os.path.abspath(file_path)
+                       and self.key.get('model') == model_signature(nlp.meta))
+        if same_source and self.key.get('mtime_ns') == stat.st_mtime_ns and self.key.get('size') == stat.st_size:
+            return None
+
+        old_chunks = self.chunks if same_source else []
+        appended, content_hash = _check_append(file_path, self.key) if old_chunks else (False, None)
+
+        new_chunks = None
+        if appended:
+            # Only the last chunk can have grown; everything before it is unchanged
+            first = len(old_chunks) - 1
+            changed = list(iter_document_chunks(file_path, start=old_chunks[first][0]))
+            records = [(offset, offset + len(text.encode('utf-8')), chunk_digest(text)) for offset, text in changed]
+            if records and records[0] == old_chunks[first]:
+                first += 1
+                changed, records = changed[1:], records[1:]
+            old_stop = len(old_chunks)
+        else:
+            digest = hashlib.sha256()
+            new_chunks = [(offset, offset + len(text.encode('utf-8')), chunk_digest(text))
+                          for offset, text in iter_document_chunks(file_path, digest=digest)]
+            content_hash = digest.hexdigest()
+            first = 0
+            limit = min(len(old_chunks), len(new_chunks))
+            while first < limit and old_chunks[first][2] == new_chunks[first][2]:
+                first += 1
+            suffix = 0
+            while (suffix < limit - first
+                   and old_chunks[-1 - suffix][2] == new_chunks[-1 - suffix][2]):
+                suffix += 1
+            old_stop = len(old_chunks) - suffix
+            records = new_chunks[first:len(new_chunks) - suffix]
+            changed = []
+            if records:
+                changed = list(iter_document_chunks(file_path, start=records[0][0], stop=records[-1][1]))
+
+        if same_source:
+            # Phrases of the replaced chunks, located by the start offsets of their sentences
+            start = (len(self.phrases) if first >= len(old_chunks)
+                     else bisect_left(self.spans, old_chunks[first][0], key=lambda span: span[0]))
+            stop = (len(self.phrases) if old_stop >= len(old_chunks)
+                    else bisect_left(self.spans, old_chunks[old_stop][0], key=lambda span: span[0]))
+        else:
+            # Nothing parsed from another document or with another model can be kept
+            start, stop, old_stop = 0, len(self.phrases), len(self.chunks)
+
+        added, added_spans, _ = _parse_chunks(changed, nlp, n_process)
+        removed = self.phrases[start:stop]
+        self.phrases[start:stop] = added
+
+        # The new chunks get fresh ids, and the spans of their phrases are made relative to them
+        record_ids = list(range(len(self._chunk_starts), len(self._chunk_starts) + len(records)))
+        self._chunk_starts.extend(chunk_start for chunk_start, _, _ in records)
+        span_chunks, span_offsets = _relative_spans(added_spans, self._chunk_starts, record_ids)
+        if not isinstance(self._span_chunks, array):
+            # Spans mapped from an index file are copied once so that they can be patched
+            self._span_chunks = array('Q', self._span_chunks.tobytes())
+            self._span_offsets = array('Q', self._span_offsets.tobytes())
+        self._span_chunks[start:stop] = span_chunks
+        self._span_offsets[2 * start:2 * stop] = span_offsets
+        self._chunk_ids[first:old_stop] = record_ids
+
+        if new_chunks is None:
+            self.chunks[first:old_stop] = records
+        else:
+            # The chunks after the change may have moved; the spans of their phrases move with them
+            self.chunks = new_chunks
+            for position in range(first + len(records), len(new_chunks)):
+                self._chunk_starts[self._chunk_ids[position]] = new_chunks[position][0]
+
+        removed_words, added_words = self._update_word_counts(removed, added)
+        self.key = build_index_key(file_path, nlp.meta, content_hash)
+        return IndexPatch(start, removed, added, removed_words, added_words)
+
+    def _update_word_counts(self, removed, added):
+        """Update the word counts and return the words that left and entered the vocabulary."""
+        removed_words, added_words = set(), set()
+        for phrase in removed:
+            for word in phrase.split():
+                self.word_counts[word] -= 1
+                if not self.word_counts[word]:
+                    del self.word_counts[word]
+                    removed_words.add(word)
+        for phrase in added:
+            for word in phrase.split():
+                if word not in self.word_counts:
+                    self.word_counts[word] = 0
+                    added_words.add(word)
+                self.word_counts[word] += 1
+        if removed_words or added_words:
+            self._words = None
+        # A word can leave and re-enter the vocabulary within the same patch
+        return removed_words - added_words, added_words - removed_words
+
+    @classmethod
+    def load_or_build(cls, file_path, model, index_path, n_process=1):
+        """
+        Load an index from disk if it is current, otherwise rebuild and save it.
+
+        The spaCy model is only loaded when the index has to be rebuilt. Index files
+        that are truncated, corrupt or of another format version are rebuilt too.
+
+        Args:
+            file_path (str): Path to the document.
+            model (str): Name of the spaCy model, resolved through the model registry.
+            index_path (str): Path of the index file.
+            n_process (int): Number of processes used by spaCy when rebuilding.
+
+        Returns:
+            PhraseIndex: An index matching the document and model.
+        """
+        if os.path.exists(index_path):
+            try:
+                index = cls.load(index_path)
+            except IndexFormatError:
+                index = None
+            if index is not None and index.is_current(file_path, get_model_meta(model)):
+                return index
+
+        index = cls.build(file_path, get_nlp(model), n_process=n_process)
+        index.save(index_path)
+        return index
+
+
+def _parse_chunks(chunks, nlp, n_process):
+    """
+    Parse document chunks into phrases.
+
+    Args:
+        chunks (iterable): (byte offset, text) chunks.
+        nlp (spacy.Language): spaCy language model.
+        n_process (int): Number of processes used by spaCy.
+
+    Returns:
+        tuple: Lists of phrases, their (start, end) spans and (start, end, digest) chunk records.
+    """
+    phrases, spans, records = [], [], []
+    for offset, text, chunk_phrases in iter_chunk_phrases(chunks, nlp, n_process=n_process):
+        records.append((offset, offset + len(text.encode('utf-8')), chunk_digest(text)))
+        for phrase, start, end in chunk_phrases:
+            phrases.append(phrase)
+            spans.append((start, end))
+    return phrases, spans, records
+
+
+def _relative_spans(spans, chunk_starts, chunk_ids):
+    """
+    Express sentence spans relative to the chunks containing them.
+
+    Args:
+        spans (iterable): Absolute (start, end) spans, in document order.
+        chunk_starts (list): Start offset of every chunk by id.
+        chunk_ids (list): Ids of the chunks the spans fall in, in document order.
+
+    Returns:
+        tuple: Arrays of the chunk id of every span and of the flattened relative
+        (start, end) offsets.
+    """
+    span_chunks, offsets = array('Q'), array('Q')
+    position = 0
+    for start, end in spans:
+        while position + 1 < len(chunk_ids) and chunk_starts[chunk_ids[position + 1]] <= start:
+            position += 1
+        chunk_id = chunk_ids[position] if chunk_ids else 0
+        span_chunks.append(chunk_id)
+        offsets.append(start - chunk_starts[chunk_id])
+        offsets.append(end - chunk_starts[chunk_id])
+    return span_chunks, offsets
+
+
+def _read_sections(buffer, index_path):
+    """
+    Parse the preamble and header of a mapped index file and slice out its sections.
+
+    Args:
+        buffer (mmap.mmap): The mapped file.
+        index_path (str): Path of the file, for error messages.
+
+    Returns:
+        tuple: The header dict and a dict of memoryviews over the sections.
+
+    Raises:
+        IndexFormatError: If the preamble, header or section table does not fit the file.
+    """
+    if len(buffer) < _PREAMBLE.size:
+        raise IndexFormatError(f"{index_path} is not a phrase index")
+    magic, version, header_length = _PREAMBLE.unpack_from(buffer, 0)
+    if magic != INDEX_MAGIC:
+        raise IndexFormatError(f"{index_path} is not a phrase index")
+    if version != INDEX_VERSION:
+        raise IndexFormatError(f"{index_path} has index version {version}, expected {INDEX_VERSION}")
+    header_end = _PREAMBLE.size + header_length
+    if header_end > len(buffer):
+        raise IndexFormatError(f"{index_path} is truncated")
+    try:
+        header = json.loads(buffer[_PREAMBLE.size:header_end])
+    except ValueError as error:
+        raise IndexFormatError(f"{index_path} has a corrupt header") from error
+
+    try:
+        table = header['sections']
+        valid = (isinstance(header['key'], dict) and isinstance(header['phrase_count'], int)
+                 and header['phrase_count'] >= 0
+                 and all(isinstance(value, int) for name in _SECTIONS for value in table[name])
+                 and all(len(table[name]) == 2 for name in _SECTIONS))
+    except (KeyError, TypeError):
+        valid = False
+    if not valid:
+        raise IndexFormatError(f"{index_path} has a corrupt header")
+
+    view = memoryview(buffer)
+    sections = {}
+    for name in _SECTIONS:
+        start, length = table[name]
+        if start < header_end or length < 0 or start + length > len(buffer):
+            raise IndexFormatError(f"{index_path} is truncated or corrupt: section {name!r} is out of bounds")
+        sections[name] = view[start:start + length]
+    return header, sections
+
+
+def _check_append(file_path, key, chunk_size=1 << 20):
+    """
+    Check whether a file only grew since an index key was built.
+
+    Args:
+        file_path (str): Path to the document.
+        key (dict): Key of the index.
+        chunk_size (int): Number of bytes read per step.
+
+    Returns:
+        tuple: Whether the old contents are a prefix of the file, and the SHA-256 digest
+        of the whole file if they are (None otherwise).
+    """
+    old_size = key.get('size', 0)
+    if os.stat(file_path).st_size < old_size:
+        return False, None
+
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        remaining = old_size
+        while remaining:
+            chunk = file.read(min(chunk_size, remaining))
+            if not chunk:
+                return False, None
+            digest.update(chunk)
+            remaining -= len(chunk)
+        if digest.hexdigest() != key.get('sha256'):
+            return False, None
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return True, digest.hexdigest()
+
+
+def _align(position):
+    """Round a file position up to the section alignment."""
+    return (position + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def main(argv=None):
+    """Build phrase indexes ahead of time: python -m search.search_index DOCUMENT [DOCUMENT ...]"""
+    parser = argparse.ArgumentParser(description="Build persistent phrase indexes for TextSearch.")
+    parser.add_argument('documents', nargs='+', help="Documents to index.")
+    parser.add_argument('-o', '--output', help="Index path (only valid with a single document). "
+                                               "Defaults to DOCUMENT.tfidx.")
+    parser.add_argument('--model', default=DEFAULT_MODEL, help="spaCy model used for preprocessing.")
+    parser.add_argument('--processes', type=int, default=1,
+                        help="Number of processes used by spaCy (-1 for all cores).")
+    parser.add_argument('--force', action='store_true', help="Rebuild even if the index is current.")
+    args = parser.parse_args(argv)
+
+    if args.output and len(args.documents) > 1:
+        parser.error("--output can only be used with a single document")
+
+    for document in args.documents:
+        index_path = args.output or default_index_path(document)
+        if args.force:
+            index = PhraseIndex.build(document, get_nlp(args.model), n_process=args.processes)
+            index.save(index_path)
+        else:
+            index = PhraseIndex.load_or_build(document, args.model, index_path, n_process=args.processes)
+        print(f"{document}: {len(index.phrases)} phrases, {len(index.words)} words -> {index_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,17 @@
-import spacy
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
 from rapidfuzz import process, fuzz
 
+from instrumentation import cache_access, stage
+
+# Upper bound on the text handed to spaCy at once when streaming a document.
+MAX_CHUNK_BYTES = 100000
+
+# Number of preprocessed queries kept by the shared query cache.
+QUERY_CACHE_SIZE = 10000
+
 def preprocess_text_spacy(text, nlp):
     """
     Preprocess and tokenize the text using spaCy: lemmatize and lowercase.
@@ -12,9 +23,115 @@ def preprocess_text_spacy(text, nlp):
     Returns:
         str: Preprocessed text with lemmatized words, excluding stopwords and punctuation.
     """
-    doc = nlp(text.lower())
-    tokens = [token.lemma_ for token in doc if not token.is_punct and not token.is_stop]
-    return ' '.join(tokens)
+    with stage('search.spacy_preprocess', 1):
+        doc = nlp(text.lower())
+        tokens = [token.lemma_ for token in doc if not token.is_punct and not token.is_stop]
+        return ' '.join(tokens)
+
+
+def preprocess_texts_spacy(texts, nlp, batch_size=64):
+    """
+    Preprocess several texts like preprocess_text_spacy, batching them through nlp.pipe.
+
+    Args:
+        texts (list): Input texts for preprocessing.
+        nlp (spacy.Language): spaCy language model.
+        batch_size (int): Number of texts processed per batch.
+
+    Returns:
+        list: Preprocessed texts, in input order.
+    """
+    with stage('search.spacy_preprocess', len(texts)):
+        docs = nlp.pipe((text.lower() for text in texts), batch_size=batch_size)
+        return [' '.join(token.lemma_ for token in doc if not token.is_punct and not token.is_stop) for doc in docs]
+
+
+class QueryCache:
+    """
+    Bounded LRU cache in front of preprocess_text_spacy.
+
+    Entries are keyed by model and raw text, so one cache can be shared by every
+    searcher in the process. The cache is safe to use from several threads.
+    """
+
+    def __init__(self, maxsize=QUERY_CACHE_SIZE):
+        """
+        Args:
+            maxsize (int): Maximum number of cached queries.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        """Return a cached entry and mark it as recently used, or None."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+        cache_access('search.query_cache', hits=value is not None, misses=value is None)
+        return value
+
+    def _put(self, key, value):
+        """Store an entry, evicting the least recently used ones beyond maxsize."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def preprocess(self, text, nlp):
+        """
+        Preprocess a query like preprocess_text_spacy, reusing earlier results.
+
+        Args:
+            text (str): Input text for preprocessing.
+            nlp (spacy.Language): spaCy language model.
+
+        Returns:
+            str: Preprocessed text.
+        """
+        key = (nlp, text)
+        value = self._get(key)
+        if value is None:
+            value = preprocess_text_spacy(text, nlp)
+            self._put(key, value)
+        return value
+
+    def preprocess_many(self, texts, nlp):
+        """
+        Preprocess several queries, running only the uncached ones through nlp.pipe.
+
+        Args:
+            texts (list): Input texts for preprocessing.
+            nlp (spacy.Language): spaCy language model.
+
+        Returns:
+            list: Preprocessed texts, in input order.
+        """
+        results = [self._get((nlp, text)) for text in texts]
+        missing = list(dict.fromkeys(text for text, value in zip(texts, results) if value is None))
+        if missing:
+            processed = dict(zip(missing, preprocess_texts_spacy(missing, nlp)))
+            for text, value in processed.items():
+                self._put((nlp, text), value)
+            results = [processed[text] if value is None else value for text, value in zip(texts, results)]
+        return results
+
+    def clear(self):
+        """Drop every cached query and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+# Process-wide cache shared by all searchers.
+query_cache = QueryCache()
 
 
 def load_document_phrases(file_path, nlp):
@@ -28,36 +145,206 @@ def load_document_phrases(file_path, nlp):
     Returns:
         list: List of preprocessed phrases from the document.
     """
-    with open(file_path, 'r', encoding='utf-8') as file:
-        document_text = file.read()
-        doc = nlp(document_text)
-        phrases = []
-        for sent in doc.sents:
-            phrase = ' '.join([token.lemma_ for token in sent if not token.is_stop and not token.is_punct])
-            if phrase.strip():
-                phrases.append(phrase.strip())
-        return phrases
+    return [phrase for phrase, _, _ in iter_document_phrases(file_path, nlp)]
 
 
-def find_spelling_correction(query, words_set):
+def load_document_phrase_spans(file_path, nlp, n_process=1):
+    """
+    Load phrases from a document together with the location of their source sentence.
+
+    Args:
+        file_path (str): Path to the document.
+        nlp (spacy.Language): spaCy language model.
+        n_process (int): Number of processes used by spaCy.
+
+    Returns:
+        list: List of (phrase, start, end) tuples, where start and end are the
+        byte offsets of the sentence in the document.
+    """
+    return list(iter_document_phrases(file_path, nlp, n_process=n_process))
+
+
+def iter_document_chunks(file_path, max_chunk_bytes=MAX_CHUNK_BYTES, start=0, stop=None, digest=None):
+    """
+    Read a document paragraph by paragraph without loading it into memory at once.
+
+    Paragraphs are separated by blank lines. Paragraphs longer than max_chunk_bytes
+    are split at line boundaries, and single lines longer than that at character
+    boundaries, so every chunk stays well below spaCy's max_length.
+
+    Args:
+        file_path (str): Path to the document.
+        max_chunk_bytes (int): Maximum size of a chunk in bytes.
+        start (int): Byte offset to start reading at; must be the start of a chunk.
+        stop (int): Byte offset to stop reading at; must be the end of a chunk.
+            Defaults to the end of the file.
+        digest (hashlib hash): Optional hash updated with every byte read, so the
+            file can be hashed in the same pass.
+
+    Yields:
+        tuple: (byte offset of the chunk in the file, decoded chunk text).
+    """
+    with open(file_path, 'rb') as file:
+        file.seek(start)
+        chunk = bytearray()
+        chunk_start = position = start
+        for line in file:
+            if stop is not None and position >= stop:
+                break
+            if digest is not None:
+                digest.update(line)
+            if not line.strip():
+                if chunk:
+                    yield chunk_start, chunk.decode('utf-8')
+                    chunk.clear()
+                position += len(line)
+                chunk_start = position
+                continue
+
+            if chunk and len(chunk) + len(line) > max_chunk_bytes:
+                yield chunk_start, chunk.decode('utf-8')
+                chunk.clear()
+                chunk_start = position
+
+            while len(line) > max_chunk_bytes:
+                # Cut before a UTF-8 continuation byte so the piece decodes on its own
+                cut = max_chunk_bytes
+                while cut > 0 and line[cut] & 0xC0 == 0x80:
+                    cut -= 1
+                yield position, line[:cut].decode('utf-8')
+                position += cut
+                chunk_start = position
+                line = line[cut:]
+
+            chunk += line
+            position += len(line)
+
+        if chunk:
+            yield chunk_start, chunk.decode('utf-8')
+
+
+@contextmanager
+def phrase_pipeline(nlp):
+    """
+    Temporarily reduce a spaCy pipeline to what phrase extraction needs.
+
+    Phrases only use lemmas, stop word and punctuation flags and sentence boundaries,
+    so the entity recognizer is switched off and, when the model ships a sentence
+    recognizer, it replaces the much slower dependency parser. A rule-based
+    sentencizer is added if the pipeline cannot split sentences at all.
+
+    Args:
+        nlp (spacy.Language): spaCy language model.
+
+    Yields:
+        spacy.Language: The same model with the reduced pipeline.
+    """
+    disabled = [name for name in ('ner',) if name in nlp.pipe_names]
+    enabled = []
+    added = []
+    if 'senter' in nlp.disabled and 'parser' in nlp.pipe_names:
+        nlp.enable_pipe('senter')
+        enabled.append('senter')
+        disabled.append('parser')
+    elif not any(name in nlp.pipe_names for name in ('parser', 'senter', 'sentencizer')):
+        nlp.add_pipe('sentencizer', first=True)
+        added.append('sentencizer')
+
+    try:
+        with nlp.select_pipes(disable=disabled):
+            yield nlp
+    finally:
+        for name in enabled:
+            nlp.disable_pipe(name)
+        for name in added:
+            nlp.remove_pipe(name)
+
+
+def iter_chunk_phrases(chunks, nlp, batch_size=64, n_process=1):
+    """
+    Run document chunks through nlp.pipe and extract the phrases of each one.
+
+    Args:
+        chunks (iterable): (byte offset, text) chunks, as yielded by iter_document_chunks.
+        nlp (spacy.Language): spaCy language model.
+        batch_size (int): Number of chunks processed per batch.
+        n_process (int): Number of processes used by spaCy (-1 for all cores).
+
+    Yields:
+        tuple: (byte offset, text, phrases) for every chunk, in input order, where phrases
+        is a list of (phrase, start, end) with the byte offsets of the sentence in the document.
+    """
+    with phrase_pipeline(nlp):
+        inputs = ((text, offset) for offset, text in chunks)
+        for doc, offset in nlp.pipe(inputs, as_tuples=True, batch_size=batch_size, n_process=n_process):
+            text = doc.text
+            char_position = 0
+            byte_position = offset
+            phrases = []
+            for sent in doc.sents:
+                phrase = ' '.join([token.lemma_ for token in sent if not token.is_stop and not token.is_punct])
+                byte_position += len(text[char_position:sent.start_char].encode('utf-8'))
+                start = byte_position
+                end = start + len(sent.text.encode('utf-8'))
+                byte_position, char_position = end, sent.end_char
+                if phrase.strip():
+                    phrases.append((phrase.strip(), start, end))
+            yield offset, text, phrases
+
+
+def iter_document_phrases(file_path, nlp, batch_size=64, n_process=1, max_chunk_bytes=MAX_CHUNK_BYTES):
+    """
+    Stream the phrases of a document with the byte offsets of their sentences.
+
+    The document is read in paragraph-sized chunks which are fed through nlp.pipe,
+    so memory use does not grow with the document size.
+
+    Args:
+        file_path (str): Path to the document.
+        nlp (spacy.Language): spaCy language model.
+        batch_size (int): Number of chunks processed per batch.
+        n_process (int): Number of processes used by spaCy (-1 for all cores).
+        max_chunk_bytes (int): Maximum size of a chunk in bytes.
+
+    Yields:
+        tuple: (phrase, start, end) with the byte offsets of the sentence in the document.
+    """
+    chunks = iter_document_chunks(file_path, max_chunk_bytes)
+    for _, _, phrases in iter_chunk_phrases(chunks, nlp, batch_size, n_process):
+        yield from phrases
+
+
+def find_spelling_correction(query, words_set, corrector=None):
     """
     Suggest spelling corrections for individual words in a query.
 
     Args:
         query (str): Original query text.
         words_set (set): Set of words extracted from the document for comparison.
+        corrector (SpellingCorrector): Optional precomputed corrector over the same
+            words. When given, it is used instead of scanning words_set.
 
     Returns:
         str: Corrected query, if any spelling mistakes are detected.
     """
+    with stage('search.spelling', 1):
+        if corrector is not None:
+            return corrector.correct_query(query)
+        return _scan_spelling_correction(query, words_set)
+
+
+def _scan_spelling_correction(query, words_set):
+    """find_spelling_correction without a corrector: score every token against every word."""
     query_tokens = query.split()
     corrected_tokens = []
+    # Sorted, so ties go to the alphabetically first word as with SpellingCorrector
+    words = sorted(words_set)
 
     for token in query_tokens:
-        correction = process.extractOne(token, words_set, scorer=fuzz.ratio)
+        correction = process.extractOne(token, words, scorer=fuzz.ratio)
         if correction and correction[1] >= 80 and correction[0] != token:
             corrected_tokens.append(correction[0])
         else:
             corrected_tokens.append(token)
 
-    return ' '.join(corrected_tokens)
\ No newline at end of file
+    return ' '.join(corrected_tokens)
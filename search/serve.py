@@ -0,0 +1,316 @@
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from search.document_search import TextSearch, EXACT, APPROXIMATE
+
+# Largest request body accepted, in bytes.
+MAX_BODY_BYTES = 1 << 20
+
+# Most header lines accepted per request; each line is also bounded by the reader's 64 KiB limit.
+MAX_HEADER_LINES = 100
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            413: 'Payload Too Large', 431: 'Request Header Fields Too Large', 500: 'Internal Server Error'}
+
+
+class _HeaderTooLarge(Exception):
+    """Raised when the request line or headers exceed the reader's limits."""
+
+
+class QueryBatcher:
+    """
+    Collect concurrent queries into micro-batches and run them through TextSearch.search_many.
+
+    A batch is dispatched as soon as it holds max_batch queries or max_wait seconds after
+    its first query arrived. Batches run one at a time on a worker thread, so the event
+    loop keeps accepting requests while spaCy and rapidfuzz work.
+    """
+
+    def __init__(self, text_search, max_batch=64, max_wait=0.005):
+        """
+        Args:
+            text_search (TextSearch): Searcher answering the queries.
+            max_batch (int): Maximum number of queries per batch. Default is 64.
+            max_wait (float): Maximum time in seconds a query waits for its batch to fill.
+                Default is 0.005.
+        """
+        self.text_search = text_search
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches = 0
+        self.batched_queries = 0
+        self._queue = None
+        self._task = None
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def start(self):
+        """Start dispatching batches on the running event loop."""
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop dispatching and release the worker thread."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown()
+
+    async def search(self, raw_query):
+        """
+        Queue a query and wait for its result.
+
+        Args:
+            raw_query (str): The query to search in the document.
+
+        Returns:
+            tuple: (matches, best_match, corrected_query), as returned by TextSearch.search.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((raw_query, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            queries = [query for query, _ in batch]
+            self.batches += 1
+            self.batched_queries += len(batch)
+            try:
+                results = await loop.run_in_executor(self._executor, self.text_search.search_many, queries)
+            except Exception as error:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+def result_to_json(result):
+    """Convert a (matches, best_match, corrected_query) tuple into a JSON-serializable dict."""
+    matches, best_match, corrected_query = result
+    return {
+        'matches': [[phrase, score] for phrase, score in matches],
+        'best_match': list(best_match) if best_match is not None else None,
+        'corrected_query': corrected_query,
+    }
+
+
+class SearchServer:
+    """
+    Minimal HTTP/1.1 server exposing a TextSearch over asyncio.
+
+    Endpoints:
+        GET /search?q=QUERY                 -> one result object
+        POST /search {"query": QUERY}       -> one result object
+        POST /search {"queries": [...]}     -> {"results": [result objects]}
+        GET /health                         -> {"status": "ok", ...}
+    """
+
+    def __init__(self, batcher, host='127.0.0.1', port=8080):
+        """
+        Args:
+            batcher (QueryBatcher): Batcher answering the queries.
+            host (str): Interface to listen on.
+            port (int): Port to listen on.
+        """
+        self.batcher = batcher
+        self.host = host
+        self.port = port
+
+    async def serve_forever(self):
+        """Start the batcher and serve requests until cancelled."""
+        self.batcher.start()
+        server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        print(f"Serving {self.batcher.text_search.file_path} on http://{self.host}:{self.port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request_line, headers = await self._read_head(reader)
+                except _HeaderTooLarge:
+                    # The rest of the head cannot be skipped reliably, so the connection is closed
+                    await self._respond(writer, 431, {'error': 'request header fields too large'},
+                                        keep_alive=False)
+                    await self._discard_input(reader, writer)
+                    break
+                if request_line is None:
+                    break
+
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._respond(writer, 400, {'error': 'malformed request line'}, keep_alive=False)
+                    break
+
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    # The body cannot be delimited, so the connection cannot be reused
+                    await self._respond(writer, 400, {'error': 'invalid Content-Length'}, keep_alive=False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {'error': 'request body too large'}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                try:
+                    status, payload = await self._dispatch(method, target, body)
+                except Exception as error:
+                    status, payload = 500, {'error': str(error)}
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_head(reader):
+        """
+        Read a request line and its headers.
+
+        Returns:
+            tuple: (request_line, headers), or (None, None) when the client closed the connection.
+
+        Raises:
+            _HeaderTooLarge: If a line exceeds the reader's limit or there are more than
+                MAX_HEADER_LINES headers.
+        """
+        try:
+            request_line = await reader.readline()
+            if not request_line.strip():
+                return None, None
+            headers = {}
+            for _ in range(MAX_HEADER_LINES + 1):
+                line = await reader.readline()
+                if not line.strip():
+                    return request_line, headers
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+        except ValueError as error:
+            # StreamReader.readline reports lines over its limit as ValueError
+            raise _HeaderTooLarge() from error
+        raise _HeaderTooLarge()
+
+    @staticmethod
+    async def _discard_input(reader, writer, timeout=1.0):
+        """
+        Half-close the connection and drop what the client is still sending.
+
+        Closing a socket with unread data makes the kernel reset it, which can discard
+        the response before the client reads it.
+        """
+        if writer.can_write_eof():
+            writer.write_eof()
+        async def drain():
+            discarded = 0
+            while discarded < MAX_BODY_BYTES:
+                chunk = await reader.read(1 << 16)
+                if not chunk:
+                    break
+                discarded += len(chunk)
+
+        try:
+            await asyncio.wait_for(drain(), timeout)
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+
+    async def _dispatch(self, method, target, body):
+        """Route a request and return the status code and JSON payload."""
+        url = urlsplit(target)
+        if url.path == '/health':
+            batches = self.batcher.batches
+            return 200, {'status': 'ok', 'batches': batches,
+                         'mean_batch_size': self.batcher.batched_queries / batches if batches else 0.0}
+        if url.path != '/search':
+            return 404, {'error': f'unknown path {url.path}'}
+
+        if method == 'GET':
+            queries = parse_qs(url.query).get('q')
+            if not queries:
+                return 400, {'error': "missing query parameter 'q'"}
+            return 200, result_to_json(await self.batcher.search(queries[0]))
+
+        if method == 'POST':
+            try:
+                request = json.loads(body or b'{}')
+            except ValueError:
+                return 400, {'error': 'body is not valid JSON'}
+            if not isinstance(request, dict):
+                return 400, {'error': 'request body must be a JSON object'}
+            if isinstance(request.get('query'), str):
+                return 200, result_to_json(await self.batcher.search(request['query']))
+            queries = request.get('queries')
+            if isinstance(queries, list) and all(isinstance(query, str) for query in queries):
+                results = await asyncio.gather(*(self.batcher.search(query) for query in queries))
+                return 200, {'results': [result_to_json(result) for result in results]}
+            return 400, {'error': "expected a 'query' string or a 'queries' list"}
+
+        return 405, {'error': f'method {method} not allowed'}
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode('utf-8')
+        head = (f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+
+def main(argv=None):
+    """Serve a document over HTTP: python -m search.serve DOCUMENT [--index PATH] [--port 8080]"""
+    parser = argparse.ArgumentParser(description="Serve TextSearch queries over HTTP with request batching.")
+    parser.add_argument('document', help="Document to search.")
+    parser.add_argument('--index', help="Persistent phrase index to load (built if missing or stale).")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--threshold', type=float, default=75)
+    parser.add_argument('--mode', choices=[EXACT, APPROXIMATE], default=EXACT)
+    parser.add_argument('--max-batch', type=int, default=64, help="Maximum number of queries per batch.")
+    parser.add_argument('--max-wait-ms', type=float, default=5.0,
+                        help="Maximum time a query waits for its batch to fill.")
+    args = parser.parse_args(argv)
+
+    text_search = TextSearch(args.document, threshold=args.threshold, index_path=args.index, mode=args.mode)
+    # Load the model now rather than on the first request
+    text_search.nlp
+
+    batcher = QueryBatcher(text_search, max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000)
+    try:
+        asyncio.run(SearchServer(batcher, args.host, args.port).serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+from functools import lru_cache
+
+from rapidfuzz import fuzz
+
+from instrumentation import cache_access, is_enabled
+
+
+class SpellingCorrector:
+    """
+    Symmetric-delete spelling corrector over a fixed vocabulary.
+
+    Two strings reach a `fuzz.ratio` score of `min_score` only if deleting at most a
+    length-dependent number of characters from each (a third of its length for a score
+    of 80) turns them into the same string. Every vocabulary word is indexed under all
+    strings obtained that way, and a token is looked up by generating its own deletes,
+    so only words sharing one of them are scored, independently of the vocabulary size.
+    Between such short words and tokens, every word a full scan would accept is found.
+
+    A string long enough to need more than `max_edit_distance` deletions would have too
+    many deletes to index, so, as in SymSpell, only its first `prefix_length` characters
+    are expanded, up to `max_edit_distance` deletions. A long word is then found when
+    the prefixes of the token and the word are that close, which covers the usual typos
+    but misses corrections whose prefixes differ more (for example three typos among
+    the first seven characters). The lookup cost stays bounded by the number of deletes
+    either way. The correction is picked with the rule of a full scan: the best score
+    must reach `min_score`, ties going to the alphabetically first word.
+    """
+
+    def __init__(self, words, max_edit_distance=2, min_score=80, cache_size=4096, prefix_length=7):
+        """
+        Args:
+            words (iterable): Vocabulary of correctly spelled words.
+            max_edit_distance (int): Maximum number of characters deleted from either
+                the token or a word (or the prefix of a long one) when indexing it.
+                Default is 2.
+            min_score (int): Minimum `fuzz.ratio` score for a correction. Default is 80.
+            cache_size (int): Number of looked-up tokens kept in the LRU cache.
+                Default is 4096.
+            prefix_length (int): Number of leading characters indexed for pairs
+                involving a long word or token. Default is 7.
+        """
+        self.max_edit_distance = max_edit_distance
+        self.min_score = min_score
+        self.prefix_length = prefix_length
+        self.words = set()
+        self.deletes = {}
+        # Deletes of every word's prefix, for the lookups involving long words or tokens
+        self.prefix_deletes = {}
+        # Shortest length needing more than max_edit_distance deletions (never reached for a score of 100)
+        self._long_length = float('inf')
+        if min_score < 100:
+            self._long_length = -(-(max_edit_distance + 1) * (200 - min_score) // (2 * (100 - min_score)))
+        self.correct = lru_cache(maxsize=cache_size)(self._correct)
+        for word in words:
+            self._index_word(word)
+
+    def max_deletes(self, length):
+        """
+        Return the number of characters a string of this length can lose on the way to a
+        common subsequence with a string it scores at least min_score against.
+
+        With L the common subsequence and x, y the characters deleted from either string,
+        the score is 100 * (1 - (x + y) / (2L + x + y)), which reaches min_score only if
+        x <= length * 2(100 - min_score) / (200 - min_score).
+        """
+        return int(length * 2 * (100 - self.min_score) // (200 - self.min_score))
+
+    def _length_range(self, length):
+        """Return the lowest and highest word lengths that can reach min_score against a token."""
+        return (-(-length * self.min_score // (200 - self.min_score)),
+                length * (200 - self.min_score) // self.min_score)
+
+    def _index_word(self, word):
+        """Add a word to the indexes, without clearing the cache."""
+        self.words.add(word)
+        distance = self.max_deletes(len(word))
+        if distance <= self.max_edit_distance:
+            for variant in self._deletes(word, distance):
+                self.deletes.setdefault(variant, []).append(word)
+        for variant in self._deletes(word[:self.prefix_length], self.max_edit_distance):
+            self.prefix_deletes.setdefault(variant, []).append(word)
+
+    @staticmethod
+    def _unindex(index, variants, word):
+        """Remove a word from the lists of an index, dropping the emptied ones."""
+        for variant in variants:
+            words = index.get(variant)
+            if words is not None:
+                words.remove(word)
+                if not words:
+                    del index[variant]
+
+    def add_word(self, word):
+        """Add a word to the vocabulary."""
+        if word in self.words:
+            return
+        self._index_word(word)
+        self.correct.cache_clear()
+
+    def remove_word(self, word):
+        """Remove a word from the vocabulary."""
+        if word not in self.words:
+            return
+        self.words.discard(word)
+        distance = self.max_deletes(len(word))
+        if distance <= self.max_edit_distance:
+            self._unindex(self.deletes, self._deletes(word, distance), word)
+        self._unindex(self.prefix_deletes, self._deletes(word[:self.prefix_length], self.max_edit_distance), word)
+        self.correct.cache_clear()
+
+    @staticmethod
+    def _deletes(word, distance):
+        """Return the word and every string obtained by deleting up to `distance` characters."""
+        variants = {word}
+        frontier = {word}
+        for _ in range(distance):
+            frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+            variants |= frontier
+        return variants
+
+    def _correct(self, token):
+        """
+        Find the best correction for a single token.
+
+        Use `correct`, which caches the result, rather than calling this directly.
+
+        Args:
+            token (str): Token to correct.
+
+        Returns:
+            tuple: The best matching word and its score, or None if no word reaches min_score.
+        """
+        if token in self.words:
+            return token, 100.0
+
+        candidates = set()
+        shortest, longest = self._length_range(len(token))
+        distance = self.max_deletes(len(token))
+        if distance <= self.max_edit_distance:
+            for variant in self._deletes(token, distance):
+                candidates.update(self.deletes.get(variant, ()))
+            # Short words are all found above; long ones only through their prefix
+            shortest = max(shortest, self._long_length)
+        if shortest <= longest:
+            for variant in self._deletes(token[:self.prefix_length], self.max_edit_distance):
+                candidates.update(word for word in self.prefix_deletes.get(variant, ())
+                                  if shortest <= len(word) <= longest)
+
+        best = None
+        for word in candidates:
+            score = fuzz.ratio(token, word, score_cutoff=self.min_score)
+            if not score:
+                continue
+            # Highest score wins; ties go to the alphabetically first word
+            if best is None or score > best[1] or (score == best[1] and word < best[0]):
+                best = (word, score)
+        return best
+
+    def correct_query(self, query):
+        """
+        Suggest spelling corrections for individual words in a query.
+
+        Args:
+            query (str): Original query text.
+
+        Returns:
+            str: Query with every token replaced by its best correction, if any.
+        """
+        before = self.correct.cache_info() if is_enabled() else None
+        corrected_tokens = []
+        for token in query.split():
+            correction = self.correct(token)
+            corrected_tokens.append(correction[0] if correction else token)
+        if before is not None:
+            after = self.correct.cache_info()
+            cache_access('search.spelling_cache', after.hits - before.hits, after.misses - before.misses)
+        return ' '.join(corrected_tokens)
@@ -0,0 +1,31 @@
+from rapidfuzz import fuzz, process
+
+from benchmarks import synthetic
+from search import CorpusSearch
+from search.search_utils import query_cache
+
+
+def write_corpus(tmp_path, documents=3):
+    for seed in range(documents):
+        synthetic.write_document(str(tmp_path / f'document{seed}.txt'), 8, seed=seed)
+    return str(tmp_path)
+
+
+def test_best_match_does_not_depend_on_the_threshold(tmp_path):
+    queries = synthetic.typo_queries(30, seed=4)
+    with CorpusSearch(write_corpus(tmp_path), threshold=101, shards=3) as corpus_search:
+        results = corpus_search.search_many(queries)
+        for raw_query, (matches, best_match, _) in zip(queries, results):
+            query = query_cache.preprocess(raw_query, corpus_search.nlp)
+            phrase, score, index = process.extractOne(query, corpus_search.phrases, scorer=fuzz.partial_ratio)
+            assert matches == []
+            assert (best_match.phrase, best_match.score) == (phrase, score)
+            assert best_match.doc_id == corpus_search.doc_ids[index]
+
+
+def test_sharded_results_match_a_single_shard(tmp_path):
+    path = write_corpus(tmp_path)
+    queries = synthetic.typo_queries(30, seed=5)
+    with CorpusSearch(path, threshold=60, shards=1) as single, CorpusSearch(path, threshold=60, shards=4) as sharded:
+        assert len(sharded.shards) == 4
+        assert single.search_many(queries, top_k=8) == sharded.search_many(queries, top_k=8)
@@ -0,0 +1,41 @@
+from rapidfuzz import fuzz, process
+
+from benchmarks import synthetic
+from search import TextSearch
+from search.search_utils import query_cache
+
+
+def make_search(tmp_path, **options):
+    path = synthetic.write_document(str(tmp_path / 'document.txt'), 40, seed=3)
+    return TextSearch(path, **options)
+
+
+def test_recall_is_complete_when_every_phrase_is_a_candidate(tmp_path):
+    text_search = make_search(tmp_path, max_candidates=10 ** 6)
+    report = text_search.measure_recall(synthetic.typo_queries(100, seed=1))
+    assert report == {'recall': 1.0, 'best_match_agreement': 1.0}
+
+
+def test_recall_counts_exact_matches_found_by_the_approximate_mode(tmp_path):
+    text_search = make_search(tmp_path, max_candidates=5)
+    queries = synthetic.typo_queries(100, seed=2)
+    found = expected = 0
+    for raw_query in queries:
+        query = query_cache.preprocess(raw_query, text_search.nlp)
+        exact, _ = text_search._search_document(query, mode='exact')
+        approximate, _ = text_search._search_document(query, mode='approximate')
+        expected += len(exact)
+        found += len({phrase for phrase, _ in exact} & {phrase for phrase, _ in approximate})
+    report = text_search.measure_recall(queries)
+    assert report['recall'] == found / expected
+    assert 0 <= report['best_match_agreement'] <= 1
+
+
+def test_best_match_does_not_depend_on_the_threshold(tmp_path):
+    text_search = make_search(tmp_path, threshold=90)
+    queries = synthetic.typo_queries(100, seed=5) + ['xylophone quartet']
+    for raw_query, (matches, best_match, _) in zip(queries, text_search.search_many(queries)):
+        query = query_cache.preprocess(raw_query, text_search.nlp)
+        phrase, score, index = process.extractOne(query, text_search.phrases, scorer=fuzz.partial_ratio)
+        assert best_match == (phrase, score, index)
+        assert all(match_score >= 90 for _, match_score in matches)
@@ -0,0 +1,17 @@
+import pytest
+
+from search.load_test import percentile
+
+
+@pytest.mark.parametrize('count, fraction, expected', [
+    (10, 0.50, 5), (10, 0.90, 9), (10, 0.99, 10), (10, 1.0, 10), (10, 0.0, 1),
+    (100, 0.50, 50), (100, 0.90, 90), (100, 0.99, 99), (100, 0.07, 7), (100, 0.29, 29),
+    (1, 0.5, 1), (3, 0.5, 2),
+])
+def test_nearest_rank(count, fraction, expected):
+    values = list(range(1, count + 1))
+    assert percentile(values, fraction) == expected
+
+
+def test_empty():
+    assert percentile([], 0.5) == 0.0
@@ -0,0 +1,192 @@
+import os
+import random
+from bisect import bisect_left
+
+from benchmarks import synthetic
+from search import TextSearch
+from search.model_registry import DEFAULT_MODEL, get_nlp
+from search.search_index import IndexFormatError, PhraseIndex
+
+
+def write(path, paragraphs):
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('\n\n'.join(paragraphs) + '\n')
+
+
+def touch(path, step):
+    # Refresh compares modification times, which can be equal within a test run
+    os.utime(path, ns=(step * 10 ** 9, step * 10 ** 9))
+
+
+def assert_same_index(index, fresh):
+    assert index.phrases == fresh.phrases
+    assert index.spans == fresh.spans
+    assert index.chunks == fresh.chunks
+    assert dict(index.word_counts) == dict(fresh.word_counts)
+
+
+def positional_postings(ngram_index):
+    # Phrase ids are stable across refreshes, so compare the postings by phrase position
+    return {gram: sorted(bisect_left(ngram_index.ids, phrase_id) for phrase_id in ids)
+            for gram, ids in ngram_index.postings.items()}
+
+
+def test_refresh_matches_a_fresh_build(tmp_path):
+    path = str(tmp_path / 'document.txt')
+    paragraphs = synthetic.prose_documents(30, 4, seed=1)
+    write(path, paragraphs)
+    nlp = get_nlp()
+    index = PhraseIndex.build(path, nlp)
+
+    rng = random.Random(0)
+    for step in range(1, 16):
+        position = rng.randrange(len(paragraphs))
+        edit = step % 4
+        if edit == 0:
+            del paragraphs[position]
+        elif edit == 1:
+            paragraphs.insert(position, synthetic.prose_documents(1, 3, seed=step)[0])
+        elif edit == 2:
+            paragraphs[position] = synthetic.prose_documents(1, 5, seed=step)[0]
+        else:
+            paragraphs.append(synthetic.prose_documents(1, 2, seed=step)[0])
+        write(path, paragraphs)
+        touch(path, step)
+        assert index.refresh(path, nlp) is not None
+        assert_same_index(index, PhraseIndex.build(path, nlp))
+
+    assert index.refresh(path, nlp) is None
+
+
+def test_refresh_replaces_an_index_of_another_document(tmp_path):
+    nlp = get_nlp()
+    first = synthetic.write_document(str(tmp_path / 'first.txt'), 10, seed=1)
+    second = synthetic.write_document(str(tmp_path / 'second.txt'), 6, seed=2)
+    index = PhraseIndex.build(first, nlp)
+    patch = index.refresh(second, nlp)
+    assert patch.start == 0
+    assert_same_index(index, PhraseIndex.build(second, nlp))
+
+
+def test_text_search_refresh_after_chdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    synthetic.write_document('document.txt', 8, seed=1)
+    text_search = TextSearch('document.txt', mode='approximate', dedupe_threshold=0.8)
+    text_search.search('orbit planet')
+    monkeypatch.chdir(os.path.dirname(str(tmp_path)))
+
+    path = str(tmp_path / 'document.txt')
+    synthetic.write_document(path, 8, seed=2)
+    touch(path, 1)
+    assert text_search.refresh()
+    fresh = TextSearch(path, dedupe_threshold=0.8)
+    assert text_search.index.phrases == fresh.index.phrases
+    assert text_search.phrases == fresh.phrases
+    assert text_search.phrase_groups == fresh.phrase_groups
+    assert text_search.document_words == fresh.document_words
+    assert positional_postings(text_search.ngram_index) == positional_postings(fresh.ngram_index)
+
+
+def test_load_maps_the_saved_index(tmp_path):
+    path = synthetic.write_document(str(tmp_path / 'document.txt'), 10, seed=1)
+    index = PhraseIndex.build(path, get_nlp())
+    index.save(path + '.tfidx')
+    loaded = PhraseIndex.load(path + '.tfidx')
+    assert not isinstance(loaded.phrases, list)
+    assert loaded.phrases[3] == index.phrases[3] and loaded.phrases[-1] == index.phrases[-1]
+    assert loaded.phrases[2:5] == index.phrases[2:5]
+    assert_same_index(loaded, index)
+    assert loaded.key == index.key
+
+
+def test_corrupt_index_files_are_rebuilt(tmp_path):
+    path = synthetic.write_document(str(tmp_path / 'document.txt'), 10, seed=1)
+    index_path = path + '.tfidx'
+    PhraseIndex.build(path, get_nlp()).save(index_path)
+    with open(index_path, 'rb') as file:
+        data = file.read()
+    header_end = data.index(b'}}') + 2
+
+    for corrupt in (b'', data[:8], data[:header_end - 5], data[:len(data) // 2], data[:-1],
+                    data.replace(b'"phrase_count": ', b'"phrase_count": 9', 1)):
+        with open(index_path, 'wb') as file:
+            file.write(corrupt)
+        try:
+            PhraseIndex.load(index_path)
+        except IndexFormatError:
+            pass
+        else:
+            raise AssertionError(f'{len(corrupt)} bytes loaded')
+        rebuilt = PhraseIndex.load_or_build(path, DEFAULT_MODEL, index_path)
+        assert_same_index(rebuilt, PhraseIndex.load(index_path))
+
+
+def test_refresh_of_a_loaded_index(tmp_path):
+    path = str(tmp_path / 'document.txt')
+    paragraphs = synthetic.prose_documents(12, 3, seed=1)
+    write(path, paragraphs)
+    TextSearch(path, index_path=path + '.tfidx')
+    text_search = TextSearch(path, index_path=path + '.tfidx', mode='approximate')
+    assert not isinstance(text_search.phrases, list)
+    text_search.search('orbit planet')
+
+    paragraphs[4] = synthetic.prose_documents(1, 4, seed=9)[0]
+    write(path, paragraphs)
+    touch(path, 1)
+    assert text_search.refresh()
+    fresh = TextSearch(path, mode='approximate')
+    assert text_search.phrases == fresh.phrases
+    assert text_search.spans == fresh.spans
+    assert positional_postings(text_search.ngram_index) == positional_postings(fresh.ngram_index)
+    assert_same_index(PhraseIndex.load(path + '.tfidx'), fresh.index)
+
+
+def test_refresh_only_touches_the_changed_chunks(tmp_path):
+    path = str(tmp_path / 'document.txt')
+    paragraphs = synthetic.prose_documents(30, 4, seed=1)
+    write(path, paragraphs)
+    nlp = get_nlp()
+    PhraseIndex.build(path, nlp).save(path + '.tfidx')
+    index = PhraseIndex.load(path + '.tfidx')
+
+    rng = random.Random(3)
+    for step in range(1, 13):
+        position = rng.randrange(len(paragraphs))
+        if step % 3 == 0:
+            del paragraphs[position]
+        else:
+            paragraphs.insert(position, synthetic.prose_documents(1, 3, seed=step)[0])
+        write(path, paragraphs)
+        touch(path, step)
+        patch = index.refresh(path, nlp)
+        assert len(patch.removed) + len(patch.added) <= 10
+        assert index.spans == PhraseIndex.build(path, nlp).spans
+    # Phrases outside the edited chunks were never decoded from the mapping
+    assert sum(phrase is not None for phrase in index.phrases._decoded) < len(index.phrases) // 2
+    assert_same_index(index, PhraseIndex.build(path, nlp))
+
+    index.save(path + '.tfidx')
+    assert_same_index(PhraseIndex.load(path + '.tfidx'), index)
+
+
+def test_ngram_ids_stay_stable(tmp_path):
+    path = str(tmp_path / 'document.txt')
+    paragraphs = synthetic.prose_documents(10, 3, seed=1)
+    write(path, paragraphs)
+    text_search = TextSearch(path, mode='approximate')
+    ngram_index = text_search.ngram_index
+    tail_ids = ngram_index.ids[-5:]
+
+    # Inserting at the same place over and over eventually runs out of ids there
+    for step in range(1, 20):
+        paragraphs.insert(3, synthetic.prose_documents(1, 2, seed=step)[0])
+        write(path, paragraphs)
+        touch(path, step)
+        assert text_search.refresh()
+        if step == 1:
+            assert ngram_index.ids[-5:] == tail_ids
+        assert ngram_index.ids == sorted(set(ngram_index.ids))
+    fresh = TextSearch(path, mode='approximate')
+    assert positional_postings(ngram_index) == positional_postings(fresh.ngram_index)
+    for query in synthetic.typo_queries(20, seed=2):
+        assert text_search.search(query) == fresh.search(query)
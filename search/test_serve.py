@@ -0,0 +1,75 @@
+import asyncio
+import json
+
+import pytest
+
+from search.serve import MAX_HEADER_LINES, QueryBatcher, SearchServer
+
+
+class EchoSearch:
+    """Stands in for TextSearch, answering every query with itself."""
+
+    file_path = 'echo.txt'
+
+    def search_many(self, queries):
+        return [([(query, 100.0)], (query, 100.0), query) for query in queries]
+
+
+async def _exchange(raw_request):
+    batcher = QueryBatcher(EchoSearch(), max_wait=0.001)
+    batcher.start()
+    server = await asyncio.start_server(SearchServer(batcher)._handle_connection, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(raw_request)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+    finally:
+        server.close()
+        await server.wait_closed()
+        await batcher.stop()
+    head, _, body = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(body)
+
+
+def exchange(raw_request):
+    return asyncio.run(_exchange(raw_request))
+
+
+def post(body):
+    return (b'POST /search HTTP/1.1\r\nConnection: close\r\nContent-Length: %d\r\n\r\n' % len(body)) + body
+
+
+def test_get_and_post_queries():
+    status, payload = exchange(b'GET /search?q=hello HTTP/1.1\r\nConnection: close\r\n\r\n')
+    assert status == 200 and payload['best_match'] == ['hello', 100.0]
+
+    status, payload = exchange(post(b'{"queries": ["a", "b"]}'))
+    assert status == 200
+    assert [result['corrected_query'] for result in payload['results']] == ['a', 'b']
+
+
+@pytest.mark.parametrize('body', [b'[1]', b'"x"', b'3', b'null'])
+def test_non_object_body_is_rejected(body):
+    status, payload = exchange(post(body))
+    assert status == 400
+    assert payload == {'error': 'request body must be a JSON object'}
+
+
+def test_oversized_header_line_is_rejected():
+    request = b'GET /search?q=a HTTP/1.1\r\nX-Filler: ' + b'a' * (1 << 17) + b'\r\n\r\n'
+    status, _ = exchange(request)
+    assert status == 431
+
+
+def test_too_many_header_lines_are_rejected():
+    headers = b''.join(b'X-Header-%d: 1\r\n' % i for i in range(MAX_HEADER_LINES + 1))
+    status, _ = exchange(b'GET /search?q=a HTTP/1.1\r\n' + headers + b'\r\n')
+    assert status == 431
+
+
+def test_invalid_content_length_is_rejected():
+    status, payload = exchange(b'POST /search HTTP/1.1\r\nContent-Length: nope\r\n\r\n')
+    assert status == 400 and payload == {'error': 'invalid Content-Length'}
@@ -0,0 +1,79 @@
+import os
+import random
+import string
+
+from rapidfuzz import fuzz
+
+from search.search_index import PhraseIndex
+from search.search_utils import _scan_spelling_correction
+from search.model_registry import get_nlp
+from search.spelling import SpellingCorrector
+
+TEST_DOCUMENT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_document.txt')
+
+
+def misspell(rng, word):
+    """Apply one to three random deletions, insertions or substitutions to a word."""
+    for _ in range(rng.randint(1, 3)):
+        position = rng.randrange(len(word) + 1)
+        edit = rng.randrange(3)
+        if edit == 0 and len(word) > 1:
+            word = word[:position] + word[position + 1:]
+        elif edit == 1:
+            word = word[:position] + rng.choice(string.ascii_lowercase) + word[position:]
+        else:
+            word = word[:position] + rng.choice(string.ascii_lowercase) + word[position + 1:]
+    return word
+
+
+def prefixes_close(corrector, token, word):
+    """Whether the prefixes of a token and a word share a delete, so the prefix index links them."""
+    def prefix_deletes(string):
+        return corrector._deletes(string[:corrector.prefix_length], corrector.max_edit_distance)
+    return bool(prefix_deletes(token) & prefix_deletes(word))
+
+
+def test_corrector_matches_full_scan():
+    words = set(PhraseIndex.build(TEST_DOCUMENT, get_nlp()).word_counts)
+    corrector = SpellingCorrector(words)
+    rng = random.Random(0)
+    tokens = [misspell(rng, word) for word in sorted(words) for _ in range(3)]
+    tokens += ['lie', 'x', 'internationalisations', 'a' * 30]
+    missed = 0
+    for token in tokens:
+        expected = _scan_spelling_correction(token, words)
+        if corrector.correct_query(token) != expected:
+            # Only corrections involving a long string, through distant prefixes, can be missed
+            assert max(len(token), len(expected)) >= corrector._long_length, token
+            assert not prefixes_close(corrector, token, expected), token
+            missed += 1
+    assert missed <= len(tokens) // 100
+
+
+def test_long_words_need_more_deletes():
+    words = ['characterization', 'uncharacteristically']
+    corrector = SpellingCorrector(words)
+    # Five edits away, but still a ratio of 80 or more
+    assert corrector.correct_query('charcterisaton') == _scan_spelling_correction('charcterisaton', words)
+    assert corrector.correct_query('uncharacteristicly') == 'uncharacteristically'
+
+
+def test_long_words_are_not_scanned(monkeypatch):
+    rng = random.Random(1)
+    words = {''.join(rng.choice(string.ascii_lowercase) for _ in range(14)) for _ in range(5000)}
+    words.add('characterization')
+    corrector = SpellingCorrector(words)
+    scored = []
+    ratio = fuzz.ratio
+    monkeypatch.setattr(fuzz, 'ratio', lambda *args, **kwargs: scored.append(args) or ratio(*args, **kwargs))
+    assert corrector.correct_query('charactrizatoin') == 'characterization'
+    assert len(scored) < 10
+
+
+def test_vocabulary_updates():
+    corrector = SpellingCorrector(['live', 'like'])
+    assert corrector.correct_query('lie') == 'like'
+    corrector.remove_word('like')
+    assert corrector.correct_query('lie') == 'live'
+    corrector.add_word('lime')
+    assert corrector.correct_query('lie') == 'lime'